@@ -1,46 +1,48 @@
-from flask import Flask, request, jsonify, current_app
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
+import json
 import time
-import pandas as pd
-import google.generativeai as genai
-from config import GOOGLE_API_KEY, LOCAL_URL, PRODUCTION_URL
+from config import LOCAL_URL, PRODUCTION_URL
 
-from models.managers.mysql import prepare_data
-from models.processors.similar_questions import recommend_similar_questions
-from models.processors.llm_chain import get_gemini_answer, get_gemini_mysql
+from models.managers.mysql import load_or_prepare_data
+from models.storages.qa_store import QAStore
+from models.processors.similar_questions import (
+    recommend_similar_questions, ensure_recommend_data_loaded, publish_recommend_data
+)
+from models.processors.llm_chain import get_gemini_answer, check_relevance_batch
 from models.managers.pdf import process_directory_pdfs
 from models.processors.text_splitter import get_text_chunks
-from models.storages.vector_database import get_vector_database
-from models.processors.query_processor import process_query
+from models.processors.query_processor import process_query, process_query_stream, warm_up_vector_db
+from models.processors.llm_clients import configure_genai
+from models.managers.metrics import render_prometheus, request_timing, timing_breakdown
+from models.managers.cache import get_cache_stats
+from models.managers.semantic_cache import get_semantic_cache_stats
+from models.managers.single_flight import get_single_flight_stats
+from models.managers.index_refresher import start_index_refresher, get_index_refresher_stats
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": [LOCAL_URL, PRODUCTION_URL, "*"]}})
 
-genai.configure(api_key=GOOGLE_API_KEY)
+configure_genai()
 
 def initialize_app():
     result = True
     
     try:
-        df, vectorizer, tfidf_matrix = prepare_data()
-        app.config['df'] = df
-        app.config['vectorizer'] = vectorizer
-        app.config['tfidf_matrix'] = tfidf_matrix
-        if df.empty or vectorizer is None or tfidf_matrix is None:
+        qa_store, vectorizer, tfidf_matrix = load_or_prepare_data()
+        publish_recommend_data(app.config, qa_store, vectorizer, tfidf_matrix)
+        if qa_store.empty or vectorizer is None or tfidf_matrix is None:
             result = False
     except Exception as e:
-        app.config['df'] = pd.DataFrame(columns=['question', 'answer', 'source'])
-        app.config['vectorizer'] = None
-        app.config['tfidf_matrix'] = None
+        publish_recommend_data(app.config, QAStore(), None, None)
         result = False
     
     try:
         if not (os.path.exists("faiss_index") and os.path.exists("faiss_index/index.faiss")):
-            success = process_directory_pdfs(
+            _, success = process_directory_pdfs(
                 force_reprocess=False,
-                get_text_chunks_fn=get_text_chunks,
-                get_vector_database_fn=get_vector_database
+                get_text_chunks_fn=get_text_chunks
             )
             if not success:
                 result = False
@@ -49,27 +51,23 @@ def initialize_app():
     
     return result
 
-def ensure_recommend_data_loaded():
-    if (
-        'df' not in app.config
-        or app.config['df'] is None
-        or app.config.get('vectorizer') is None
-        or app.config.get('tfidf_matrix') is None
-    ):
-        try:
-            df, vectorizer, tfidf_matrix = prepare_data()
-            app.config['df'] = df
-            app.config['vectorizer'] = vectorizer
-            app.config['tfidf_matrix'] = tfidf_matrix
-        except Exception as e:
-            app.config['df'] = pd.DataFrame(columns=['question', 'answer', 'source'])
-            app.config['vectorizer'] = None
-            app.config['tfidf_matrix'] = None
+def warm_up_worker():
+    """
+    Load the recommender data and the vector index at worker boot instead of on the first request, then start the
+    background refresher that keeps both up to date
+    """
+    start_time = time.time()
+    with app.app_context():
+        ensure_recommend_data_loaded()
+    loaded = warm_up_vector_db()
+    start_index_refresher(app.config)
+    print(f"Worker {os.getpid()} warmed up in {time.time() - start_time:.2f}s (vector index: {loaded})")
+    return loaded
 
 @app.route('/recommend', methods=['GET'])
 def recommend():
     try:
-        ensure_recommend_data_loaded()
+        snapshot = ensure_recommend_data_loaded()
         query = request.args.get('text', '').strip()
         if not query:
             return jsonify({
@@ -77,7 +75,7 @@ def recommend():
                 'message': 'Tham số truy vấn "text" là bắt buộc và không được rỗng'
             }), 400
 
-        recommended_indices, similarity_scores = recommend_similar_questions(query, 5)
+        recommended_indices, similarity_scores = recommend_similar_questions(query, 5, snapshot=snapshot)
         if not recommended_indices or not similarity_scores:
             return jsonify({
                 'status': 'success',
@@ -85,45 +83,19 @@ def recommend():
                 'data': []
             })
 
-        df = current_app.config['df']
+        qa_store = snapshot.qa_store
         recommendations = []
 
-        for idx, score in zip(recommended_indices, similarity_scores):
-            if idx < len(df) and score > 0.3:  # Tăng ngưỡng lên 0.3
-                question = df.iloc[idx]['question']
-                answer = df.iloc[idx]['answer']
-                
-                prompt = f"""
-                    Bạn là trợ lý AI chuyên phân tích độ phù hợp của câu hỏi và câu trả lời.
-                    CÂU HỎI CỦA NGƯỜI DÙNG: {query}
-                    CÂU HỎI TRONG DB: {question}
-                    CÂU TRẢ LỜI: {answer}
-                    Nhiệm vụ của bạn:
-                    Phân tích xem câu hỏi của người dùng và câu hỏi trong DB có thực sự liên quan không
-                    Kiểm tra xem câu trả lời có phù hợp và hữu ích cho câu hỏi của người dùng không
-                    Chỉ trả về True nếu cả hai điều kiện trên đều đúng, ngược lại trả về False
-                    KHÔNG giải thích gì thêm, chỉ trả về True hoặc False
-                """
-                try:
-                    response = get_gemini_mysql(prompt, "")
-                    is_relevant = response and response[0].strip().lower() == "true"
-                except Exception as e:
-                    current_app.logger.warning(f"Gemini check failed: {e}")
-                    is_relevant = True  # fallback nếu Gemini lỗi
-
-                if is_relevant:
-                    result = {
-                        'question': question,
-                        'answer': answer,
-                        'similarity_score': float(score)
-                    }
-                    if 'source' in df.columns:
-                        result['source'] = df.iloc[idx]['source']
-                    if 'question_id' in df.columns and not pd.isna(df.iloc[idx].get('question_id')):
-                        result['question_id'] = int(df.iloc[idx]['question_id'])
-                    if 'answer_id' in df.columns and not pd.isna(df.iloc[idx].get('answer_id')):
-                        result['answer_id'] = int(df.iloc[idx]['answer_id'])
-                    recommendations.append(result)
+        candidates = [
+            (idx, score) for idx, score in zip(recommended_indices, similarity_scores)
+            if idx < len(qa_store) and score > 0.3
+        ]
+        rows = [qa_store.row(idx) for idx, _ in candidates]
+        relevance = check_relevance_batch(query, [(row['question'], row['answer']) for row in rows])
+
+        for row, (_, score), is_relevant in zip(rows, candidates, relevance):
+            if is_relevant:
+                recommendations.append({**row, 'similarity_score': float(score)})
 
         if not recommendations:
             return jsonify({
@@ -186,23 +158,37 @@ def chat():
         }), 400
 
     try:
-        answer = process_query(question)
-        process_time = round(time.time() - start_time, 2)
-        
-        if "*(Kết quả từ cache" in answer:
-            parts = answer.split("\n\n*(")
-            main_answer = parts[0]
-            return jsonify({
-                "status": "success",
-                "message": "Lấy câu trả lời từ cache thành công",
-                "data": {
-                    "question": question,
-                    "answer": main_answer,
-                    "time": process_time
-                }
-            })
+        with request_timing(is_debug_request(request.args)) as timings:
+            answer = process_query(question)
+        return jsonify(chat_payload(question, answer, start_time, timings))
 
+    except Exception as e:
         return jsonify({
+            "status": "error",
+            "message": f"Lỗi khi xử lý câu hỏi: {str(e)}",
+            "data": {"time": round(time.time() - start_time, 2)}
+        }), 500
+
+def is_debug_request(args):
+    return args.get("debug", "").lower() in ("1", "true")
+
+def chat_payload(question, answer, start_time, timings=None):
+    process_time = round(time.time() - start_time, 2)
+
+    if "*(Kết quả từ cache" in answer:
+        parts = answer.split("\n\n*(")
+        main_answer = parts[0]
+        payload = {
+            "status": "success",
+            "message": "Lấy câu trả lời từ cache thành công",
+            "data": {
+                "question": question,
+                "answer": main_answer,
+                "time": process_time
+            }
+        }
+    else:
+        payload = {
             "status": "success",
             "message": "Tìm câu trả lời thành công",
             "data": {
@@ -210,15 +196,65 @@ def chat():
                 "answer": answer,
                 "time": process_time
             }
-        })
+        }
 
-    except Exception as e:
+    if timings is not None:
+        payload["data"]["timings"] = timing_breakdown(timings)
+    return payload
+
+def sse_event(event, data, question, start_time):
+    if event == "answer":
+        data = {"question": question, **data, "time": round(time.time() - start_time, 2)}
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def stream_error(error, start_time):
+    """
+    Payload of the SSE "error" event sent when the pipeline fails after the stream has started
+    """
+    return {
+        "status": "error",
+        "message": f"Lỗi khi xử lý câu hỏi: {str(error)}",
+        "time": round(time.time() - start_time, 2)
+    }
+
+@app.route('/chat/stream', methods=['GET'])
+def chat_stream():
+    start_time = time.time()
+    question = request.args.get("text", "").strip()
+
+    if not question:
         return jsonify({
-            "status": "error",
-            "message": f"Lỗi khi xử lý câu hỏi: {str(e)}",
+            "status": "fail",
+            "message": "Vui lòng nhập câu hỏi",
             "data": {"time": round(time.time() - start_time, 2)}
-        }), 500
+        }), 400
+
+    def generate():
+        try:
+            for event, data in process_query_stream(question):
+                yield sse_event(event, data, question, start_time)
+        except Exception as e:
+            yield sse_event("error", stream_error(e, start_time), question, start_time)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def stats_gauges(name, help_text, stats):
+    return {name: (help_text, {(("field", field),): value for field, value in stats.items()})}
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    gauges = {}
+    gauges.update(stats_gauges("answer_cache", "Exact answer cache statistics.", get_cache_stats()))
+    gauges.update(stats_gauges("semantic_cache", "Semantic answer cache statistics.", get_semantic_cache_stats()))
+    gauges.update(stats_gauges("single_flight", "Request coalescing statistics.", get_single_flight_stats()))
+    gauges.update(stats_gauges("index_refresh", "Background index refresh statistics.", get_index_refresher_stats()))
+    return Response(render_prometheus(gauges), mimetype="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     initialize_app()
+    start_index_refresher(app.config)
     app.run(host="0.0.0.0", port=5000, debug=False)
\ No newline at end of file
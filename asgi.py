@@ -0,0 +1,113 @@
+"""
+ASGI entry point: /chat and /chat/stream run on the async pipeline so one worker serves many concurrent chats,
+every other route is served by the Flask app through asgiref's WSGI adapter.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+import json
+import time
+from urllib.parse import parse_qs
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app, initialize_app, warm_up_worker, chat_payload, sse_event, stream_error, is_debug_request
+from models.managers.metrics import request_timing
+from models.processors.async_query_processor import run_stage, process_query_async, process_query_stream_async
+from config import WORKER_WARMUP
+
+JSON_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"access-control-allow-origin", b"*"),
+]
+SSE_HEADERS = [
+    (b"content-type", b"text/event-stream; charset=utf-8"),
+    (b"cache-control", b"no-cache"),
+    (b"x-accel-buffering", b"no"),
+    (b"access-control-allow-origin", b"*"),
+]
+
+wsgi_application = WsgiToAsgi(app)
+
+async def send_json(send, payload, status=200):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({"type": "http.response.start", "status": status, "headers": JSON_HEADERS})
+    await send({"type": "http.response.body", "body": body})
+
+async def send_sse(send, event):
+    await send({"type": "http.response.body", "body": event.encode("utf-8"), "more_body": True})
+
+def query_params(scope):
+    params = parse_qs(scope.get("query_string", b"").decode("utf-8"))
+    return {name: values[0] for name, values in params.items()}
+
+def query_text(scope):
+    return query_params(scope).get("text", "").strip()
+
+async def missing_question(send, start_time):
+    await send_json(send, {
+        "status": "fail",
+        "message": "Vui lòng nhập câu hỏi",
+        "data": {"time": round(time.time() - start_time, 2)}
+    }, 400)
+
+async def chat(scope, receive, send):
+    start_time = time.time()
+    question = query_text(scope)
+    if not question:
+        await missing_question(send, start_time)
+        return
+
+    try:
+        with app.app_context(), request_timing(is_debug_request(query_params(scope))) as timings:
+            answer = await process_query_async(question)
+        await send_json(send, chat_payload(question, answer, start_time, timings))
+    except Exception as e:
+        await send_json(send, {
+            "status": "error",
+            "message": f"Lỗi khi xử lý câu hỏi: {str(e)}",
+            "data": {"time": round(time.time() - start_time, 2)}
+        }, 500)
+
+async def chat_stream(scope, receive, send):
+    start_time = time.time()
+    question = query_text(scope)
+    if not question:
+        await missing_question(send, start_time)
+        return
+
+    await send({"type": "http.response.start", "status": 200, "headers": SSE_HEADERS})
+    try:
+        with app.app_context():
+            async for event, data in process_query_stream_async(question):
+                await send_sse(send, sse_event(event, data, question, start_time))
+    except Exception as e:
+        # Headers are already out, so the failure is reported in the stream
+        await send_sse(send, sse_event("error", stream_error(e, start_time), question, start_time))
+    await send({"type": "http.response.body", "body": b""})
+
+ASYNC_ROUTES = {
+    "/chat": chat,
+    "/chat/stream": chat_stream,
+}
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await run_stage(initialize_app)
+            if WORKER_WARMUP:
+                await run_stage(warm_up_worker)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+
+    route = ASYNC_ROUTES.get(scope.get("path")) if scope["type"] == "http" and scope.get("method") == "GET" else None
+    if route is None:
+        await wsgi_application(scope, receive, send)
+        return
+    await route(scope, receive, send)
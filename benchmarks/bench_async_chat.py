@@ -0,0 +1,150 @@
+"""
+Load test of /chat against a local fake Gemini server: N synchronous WSGI workers (one request at a time each, like
+gunicorn sync workers) vs a single ASGI worker running the async pipeline. Every question misses MySQL, so each chat
+makes the MySQL and the RAG round trips.
+
+Usage: python benchmarks/bench_async_chat.py [--requests 200] [--concurrency 50] [--latency 0.5] [--sync-workers 4]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+
+from common import FakeEmbeddings, synthetic_pdf_chunks, synthetic_qa_rows, synthetic_sentence
+from fake_gemini_server import start_fake_gemini
+
+def prepare_environment(latency):
+    server, url, stats = start_fake_gemini(latency=latency)
+    os.environ["GEMINI_TRANSPORT"] = "rest"
+    os.environ["GEMINI_API_ENDPOINT"] = url
+    os.environ.setdefault("SEMANTIC_CACHE_ENABLED", "false")
+    return stats
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def load_application():
+    import pandas as pd
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.embeddings import Embeddings
+    from langchain.docstore.document import Document
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    import app as application
+    from models.processors import query_processor
+    from models.processors.similar_questions import publish_recommend_data
+    from models.storages.qa_store import QAStore
+    from models.processors.llm_clients import get_embeddings
+    from models.storages import vector_database as vdb
+
+    class OfflineEmbeddings(FakeEmbeddings, Embeddings):
+        pass
+
+    df = pd.DataFrame(synthetic_qa_rows(2000))
+    vectorizer = TfidfVectorizer(analyzer='word', token_pattern=r'\w{1,}', ngram_range=(1, 2))
+    publish_recommend_data(
+        application.app.config, QAStore.from_frame(df), vectorizer, vectorizer.fit_transform(df['question'] + ' ' + df['answer'])
+    )
+    application.app.config['recommend_refreshed_at'] = time.time() + 3600
+
+    chunks = synthetic_pdf_chunks(200)
+    database = FAISS.from_documents(
+        [Document(page_content=c["page_content"], metadata=c["metadata"]) for c in chunks],
+        OfflineEmbeddings()
+    )
+    # Query embeddings go through the SDK to the fake server, like in production
+    database.embedding_function = get_embeddings()
+    vdb.load_sparse_index(database, os.path.join(tempfile.mkdtemp(), "sparse_index"))
+    query_processor.vector_database = database
+    return application
+
+def start_sync_workers(application, count):
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    ports = []
+    for _ in range(count):
+        server = make_server("127.0.0.1", free_port(), application.app, threaded=False)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        ports.append(server.server_port)
+    return ports
+
+def start_async_worker():
+    import uvicorn
+    from asgi import application
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(application, host="127.0.0.1", port=port, lifespan="off", log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return [port]
+
+async def run_load(ports, questions, concurrency):
+    import aiohttp
+    latencies = []
+    failures = 0
+    pending = iter(enumerate(questions))
+
+    async def client(session):
+        nonlocal failures
+        for i, question in pending:
+            port = ports[i % len(ports)]
+            start = time.perf_counter()
+            try:
+                async with session.get(f"http://127.0.0.1:{port}/chat", params={"text": question}) as response:
+                    payload = await response.json()
+                    if response.status != 200 or payload.get("status") != "success":
+                        failures += 1
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    timeout = aiohttp.ClientTimeout(total=600)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "throughput": len(questions) / elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "failures": failures,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5, help="fake Gemini generateContent latency in seconds")
+    parser.add_argument("--sync-workers", type=int, default=4)
+    args = parser.parse_args()
+
+    stats = prepare_environment(args.latency)
+    application = load_application()
+
+    rng = random.Random(3)
+    print(f"{args.requests} chats, {args.concurrency} concurrent clients, {args.latency:.2f}s model latency")
+    print(f"{'mode':>18} {'req/s':>8} {'p50 s':>8} {'p99 s':>8} {'failed':>7} {'max model calls':>16}")
+    for label, start_workers in (
+        (f"{args.sync_workers} sync workers", lambda: start_sync_workers(application, args.sync_workers)),
+        ("1 async worker", start_async_worker),
+    ):
+        ports = start_workers()
+        questions = [synthetic_sentence(rng) for _ in range(args.requests)]
+        stats.max_in_flight = 0
+        result = asyncio.run(run_load(ports, questions, args.concurrency))
+        print(
+            f"{label:>18} {result['throughput']:>8.1f} {result['p50']:>8.2f} {result['p99']:>8.2f} "
+            f"{result['failures']:>7} {stats.snapshot()['max_in_flight']:>16}"
+        )
+
+if __name__ == "__main__":
+    main()
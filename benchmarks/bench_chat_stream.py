@@ -0,0 +1,88 @@
+"""
+Time to first token of /chat/stream vs total latency of /chat, with a fake streaming Gemini model.
+
+Usage: python benchmarks/bench_chat_stream.py [--tokens 40] [--token-latency 0.02]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import FakeEmbeddings, synthetic_pdf_chunks
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+from langchain.docstore.document import Document
+
+import app as application
+from models.managers import cache
+from models.processors import llm_chain, query_processor
+from models.storages import vector_database as vdb
+
+class OfflineEmbeddings(FakeEmbeddings, Embeddings):
+    pass
+
+class FakeChunk:
+    def __init__(self, content):
+        self.content = content
+
+class FakeStreamingChatModel:
+    def __init__(self, tokens, token_latency):
+        self.tokens = tokens
+        self.token_latency = token_latency
+
+    def stream(self, prompt):
+        for i in range(self.tokens):
+            time.sleep(self.token_latency)
+            yield FakeChunk(f"từ{i} ")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    model = FakeStreamingChatModel(args.tokens, args.token_latency)
+    chunks = synthetic_pdf_chunks(200)
+    database = FAISS.from_documents(
+        [Document(page_content=c["page_content"], metadata=c["metadata"]) for c in chunks],
+        OfflineEmbeddings()
+    )
+    # Keep the benchmark's BM25 index out of faiss_index/
+    vdb.load_sparse_index(database, os.path.join(tempfile.mkdtemp(), "sparse_index"))
+    query_processor.vector_database = database
+
+    def blocking_rag(db, question, filter_pdf=None, cancelled=None):
+        llm_chain.retrieve_rag_documents(db, question, filter_pdf)
+        return {"output_text": "".join(chunk.content for chunk in model.stream(question))}
+
+    query_processor.get_gemini_mysql = lambda prompt: None
+    query_processor.get_gemini_rag = blocking_rag
+    llm_chain.get_chat_model = lambda: model
+    client = application.app.test_client()
+    question = "học phí học kỳ này đóng khi nào vậy"
+
+    start = time.perf_counter()
+    client.get("/chat", query_string={"text": question})
+    blocking = time.perf_counter() - start
+    cache.cache.clear()
+
+    start = time.perf_counter()
+    response = client.get("/chat/stream", query_string={"text": question}, buffered=False)
+    first_token = None
+    for part in response.response:
+        if first_token is None and part.startswith(b"event: token"):
+            first_token = time.perf_counter() - start
+    streamed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cached = b"".join(client.get("/chat/stream", query_string={"text": question}).response)
+    cached_time = time.perf_counter() - start
+
+    print(f"/chat total:              {blocking * 1000:8.1f} ms")
+    print(f"/chat/stream first token: {first_token * 1000:8.1f} ms")
+    print(f"/chat/stream total:       {streamed * 1000:8.1f} ms")
+    print(f"/chat/stream cache hit:   {cached_time * 1000:8.1f} ms ({cached.count(b'event:')} event)")
+
+if __name__ == "__main__":
+    main()
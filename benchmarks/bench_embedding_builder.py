@@ -0,0 +1,201 @@
+"""
+Embedding builder and incremental PDF ingestion against a flaky fake embedding model.
+
+1. Builds the FAISS index through a model that randomly fails, times out or returns short batches, and checks the
+   index is complete and its vectors equal the deterministic ones.
+2. Aborts a build half way, rebuilds and checks the second run reuses the cached vectors.
+3. Re-ingests a handbook with a few edited and deleted pages and checks only the changed pages are re-embedded.
+4. Rebuilds the whole index from scratch and checks every vector comes from the embedding cache.
+5. Compares wall time of the sequential per-batch path with EMBED_CONCURRENCY batches in flight.
+
+Usage: python benchmarks/bench_embedding_builder.py [--pages 120] [--failure-rate 0.3] [--latency 0.05]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+
+class FlakyEmbeddings:
+    """
+    Wraps a deterministic embedding model: each batch call sleeps, then fails with `failure_rate`
+    (an exception or a truncated result) or returns the real vectors
+    """
+    def __init__(self, embeddings, failure_rate=0.3, latency=0.0, seed=1, abort_after=None):
+        self.embeddings = embeddings
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.abort_after = abort_after
+        self.calls = 0
+        self.failures = 0
+        self.embedded = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.calls += 1
+            roll = self.rng.random()
+            if self.abort_after is not None and self.embedded >= self.abort_after:
+                raise KeyboardInterrupt("build aborted")
+        if self.latency:
+            time.sleep(self.latency)
+        if roll < self.failure_rate / 2:
+            with self._lock:
+                self.failures += 1
+            raise RuntimeError("429 Resource has been exhausted")
+        vectors = self.embeddings.embed_documents(texts)
+        if roll < self.failure_rate:
+            with self._lock:
+                self.failures += 1
+            return vectors[:-1]
+        with self._lock:
+            self.embedded += len(texts)
+        return vectors
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+def mismatched_vectors(vector_database, reference):
+    import numpy as np
+    mismatched = []
+    for position, doc_id in vector_database.index_to_docstore_id.items():
+        text = vector_database.docstore.search(doc_id).page_content
+        expected = np.array(reference.embed_query(text), dtype=np.float32)
+        if not np.allclose(vector_database.index.reconstruct(position), expected, atol=1e-6):
+            mismatched.append(text)
+    return mismatched
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=120)
+    parser.add_argument("--failure-rate", type=float, default=0.3)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake embedding latency per batch call")
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="chatbot-embed-bench-"))
+    (workdir / "data").mkdir()
+    os.environ["DATA_DIR"] = str(workdir / "data")
+    os.chdir(workdir)
+    sys.path.insert(0, str(BENCHMARK_DIR))
+
+    import common  # noqa: F401
+    from corpus import handbook_pages
+    from fakes import FakeGoogleEmbeddings, install_fake_backend
+
+    install_fake_backend()
+    from models.managers import pdf
+    from models.processors.text_splitter import get_text_chunks
+    from models.storages import vector_database as vector_store
+    from models.storages.embedding_builder import EmbeddingBuilder, EmbeddingCache
+
+    reference = FakeGoogleEmbeddings()
+    pages = handbook_pages(args.pages)
+    chunks = get_text_chunks(pages)
+    cache_path = workdir / "data" / "embedding_cache"
+
+    def builder(embeddings, concurrency=4, cache=None):
+        return EmbeddingBuilder(
+            embeddings, batch_size=args.batch_size, concurrency=concurrency, requests_per_minute=60000,
+            max_retries=8, base_delay=0.001, cache=cache if cache is not None else EmbeddingCache(cache_path, reference.model)
+        )
+
+    # 1. Flaky build
+    flaky = FlakyEmbeddings(reference, args.failure_rate, args.latency)
+    flaky_builder = builder(flaky)
+    start = time.perf_counter()
+    database = vector_store.build_vector_database(((None, chunk) for chunk in chunks), flaky_builder)
+    elapsed = time.perf_counter() - start
+    mismatched = mismatched_vectors(database, reference)
+    assert database.index.ntotal == len(chunks), (database.index.ntotal, len(chunks))
+    assert not mismatched, f"{len(mismatched)} vectors differ from the reference model"
+    assert len(EmbeddingCache(cache_path, reference.model)) == len({chunk["page_content"] for chunk in chunks})
+    print(f"flaky build: {len(chunks)} chunks in {elapsed:.2f}s, {flaky.calls} calls, "
+          f"{flaky.failures} injected failures, {flaky_builder.retries} retries")
+
+    # 2. Abort half way, then resume from the cache
+    shutil.rmtree(workdir / "data")
+    aborting = FlakyEmbeddings(reference, 0.0, args.latency, abort_after=len(chunks) // 2)
+    try:
+        vector_store.build_vector_database(((None, chunk) for chunk in chunks), builder(aborting, concurrency=1))
+        raise AssertionError("build should have been aborted")
+    except KeyboardInterrupt:
+        pass
+    resumed = FlakyEmbeddings(reference, 0.0, args.latency)
+    resumed_builder = builder(resumed, concurrency=1)
+    database = vector_store.build_vector_database(((None, chunk) for chunk in chunks), resumed_builder)
+    mismatched = mismatched_vectors(database, reference)
+    assert database.index.ntotal == len(chunks) and not mismatched
+    assert resumed_builder.reused >= len(chunks) // 2 - args.batch_size, resumed_builder.reused
+    print(f"resume: {resumed_builder.reused} of {len(chunks)} chunks reused from the cache, "
+          f"{resumed.calls} calls instead of {-(-len(chunks) // args.batch_size)}")
+
+    # 3. Incremental re-ingestion of edited pages
+    shutil.rmtree("faiss_index", ignore_errors=True)
+    cache_path = workdir / "data" / "incremental_cache"
+    current_pages = [dict(page) for page in pages]
+    pdf.list_pdf_files = lambda directory: ["SoTaySinhVien2024.pdf"]
+    pdf.iter_pdf_pages = lambda pdf_paths, *a, **kw: iter(current_pages)
+    counting = FlakyEmbeddings(reference, 0.0, 0.0)
+    shared_cache = EmbeddingCache(cache_path, reference.model)
+    vector_store.get_embedding_builder = lambda use_cache=True: builder(counting, cache=shared_cache)
+
+    message, success = pdf.process_directory_pdfs(force_reprocess=True, get_text_chunks_fn=get_text_chunks)
+    assert success, message
+    full_embedded = counting.embedded
+
+    edited = random.Random(9).sample(range(len(current_pages)), 3)
+    for i in edited:
+        current_pages[i] = {**current_pages[i], "text": current_pages[i]["text"] + "\n\nCập nhật: quy định mới."}
+    deleted = current_pages.pop()
+    counting.embedded = 0
+    start = time.perf_counter()
+    message, success = pdf.process_directory_pdfs(force_reprocess=True, get_text_chunks_fn=get_text_chunks)
+    elapsed = time.perf_counter() - start
+    assert success, message
+    expected_chunks = get_text_chunks(current_pages)
+    database, _ = vector_store.load_vector_database()
+    sources = sorted(database.docstore.texts.values())
+    assert database.index.ntotal == len(expected_chunks), (database.index.ntotal, len(expected_chunks))
+    assert sources == sorted(chunk["page_content"] for chunk in expected_chunks)
+    # Unchanged chunks of an edited page come from the embedding cache
+    edited_chunks = len(get_text_chunks([current_pages[i] for i in edited]))
+    assert 0 < counting.embedded <= edited_chunks, (counting.embedded, edited_chunks)
+    assert all(metadata["page"] != deleted["metadata"]["page"] for metadata in database.docstore.metadatas.values())
+    print(f"incremental: {message}")
+    print(f"  re-chunked {edited_chunks} chunks of edited pages, embedded {counting.embedded} of {full_embedded} "
+          f"in {elapsed:.2f}s")
+
+    # 4. Full rebuild: nothing changed since the last ingest, so nothing is embedded
+    counting.embedded = counting.calls = 0
+    start = time.perf_counter()
+    message, success = pdf.process_directory_pdfs(
+        force_reprocess=True, get_text_chunks_fn=get_text_chunks, full_rebuild=True
+    )
+    elapsed = time.perf_counter() - start
+    assert success, message
+    assert counting.calls == 0, counting.calls
+    assert not mismatched_vectors(vector_store.load_vector_database()[0], reference)
+    print(f"full rebuild from cache: {len(expected_chunks)} chunks in {elapsed:.2f}s, {counting.calls} embedding calls, "
+          f"cache {shared_cache.stats()}")
+
+    # 5. Sequential vs concurrent batches
+    for concurrency in (1, 4):
+        steady = FlakyEmbeddings(reference, 0.0, args.latency)
+        start = time.perf_counter()
+        EmbeddingBuilder(
+            steady, batch_size=args.batch_size, concurrency=concurrency, requests_per_minute=60000
+        ).embed_texts([chunk["page_content"] for chunk in chunks])
+        print(f"concurrency={concurrency}: {time.perf_counter() - start:.2f}s for {steady.calls} batch calls")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
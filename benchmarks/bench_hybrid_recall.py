@@ -0,0 +1,66 @@
+"""
+Offline recall@k of dense (FAISS), sparse (BM25) and hybrid (reciprocal-rank fusion) retrieval.
+
+Queries ask for an exact course code or fee amount of one synthetic handbook chunk; that chunk is the relevant one.
+
+Usage: python benchmarks/bench_hybrid_recall.py [--chunks 2000] [--queries 300] [--k 1 5 10]
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from common import FakeEmbeddings, synthetic_pdf_chunks
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+from langchain.docstore.document import Document
+
+from models.storages import vector_database as vdb
+
+class OfflineEmbeddings(FakeEmbeddings, Embeddings):
+    pass
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10])
+    args = parser.parse_args()
+
+    chunks = synthetic_pdf_chunks(args.chunks)
+    documents = [Document(page_content=c["page_content"], metadata=c["metadata"]) for c in chunks]
+    database = FAISS.from_documents(documents, OfflineEmbeddings())
+    sparse_path = os.path.join(tempfile.mkdtemp(), "sparse_index")
+    vdb.save_sparse_index(database, sparse_path)
+    sparse_index = vdb.load_sparse_index(database, sparse_path)
+
+    rng = random.Random(3)
+    targets = rng.sample(range(args.chunks), args.queries)
+    queries = [
+        f"học phần {chunks[t]['metadata']['code']} học phí bao nhiêu" if i % 2 == 0
+        else f"khoản phí {chunks[t]['metadata']['fee']} đồng là gì"
+        for i, t in enumerate(targets)
+    ]
+    # A fee amount may appear in more than one chunk, so any chunk carrying the asked value counts as relevant
+    relevant = [
+        {j for j, c in enumerate(chunks) if c["metadata"]["code"] in q or c["metadata"]["fee"] + " " in q}
+        for q in queries
+    ]
+
+    depth = max(args.k)
+    dense = [vdb.similarity_search_positions(database, q, k=depth) for q in queries]
+    sparse = [[p for p, _ in sparse_index.search(q, depth)] for q in queries]
+    hybrid = [vdb.reciprocal_rank_fusion([d, s]) for d, s in zip(dense, sparse)]
+
+    print(f"{args.chunks} chunks, {args.queries} exact-term queries")
+    print(f"{'k':>4} {'dense':>8} {'bm25':>8} {'hybrid':>8}")
+    for k in args.k:
+        row = [
+            sum(bool(set(ranking[:k]) & rel) for ranking, rel in zip(rankings, relevant)) / len(queries)
+            for rankings in (dense, sparse, hybrid)
+        ]
+        print(f"{k:>4} {row[0]:>8.3f} {row[1]:>8.3f} {row[2]:>8.3f}")
+
+if __name__ == "__main__":
+    main()
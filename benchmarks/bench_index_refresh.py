@@ -0,0 +1,175 @@
+"""
+Background index refresh under load. Reader threads keep querying the recommender and the FAISS index while:
+
+1. nothing changes (baseline latency);
+2. new Q&A rows land in MySQL, one question is deleted (so the recommender is rebuilt from scratch) and a bigger
+   vector index is saved, and the background refresher picks all of it up and swaps it in.
+
+Every reader request checks that the snapshot it holds is consistent (matrix rows == DataFrame rows, every hit
+resolves in the docstore). The last line times the same rebuild run inline, which is what a user request used to
+pay when the lazy reload in ensure_recommend_data_loaded() fell on it.
+
+Usage: python benchmarks/bench_index_refresh.py [--rows 10000] [--chunks 2000] [--readers 4] [--seconds 2]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="chatbot-refresh-bench-"))
+    (workdir / "data").mkdir()
+    (workdir / "faiss_index").mkdir()
+    stopwords = BENCHMARK_DIR.parent / "data" / "vietnamese-stopwords.txt"
+    if stopwords.exists():
+        shutil.copy(stopwords, workdir / "data" / stopwords.name)
+    os.environ["DATA_DIR"] = str(workdir / "data")
+    os.chdir(workdir)
+    sys.path.insert(0, str(BENCHMARK_DIR))
+
+    warnings.filterwarnings("ignore", message="Your stop_words may be inconsistent")
+    import common  # noqa: F401
+    import numpy as np
+    from flask import Flask
+    from common import synthetic_pdf_chunks
+    from corpus import qa_rows, user_questions
+    from fakes import FakeGoogleEmbeddings, install_fake_backend
+    from mysql_standin import install_sqlite_mysql
+    from langchain_community.vectorstores import FAISS
+
+    install_fake_backend()
+    from models.managers import mysql
+    from models.managers.index_refresher import IndexRefresher
+    from models.processors import query_processor
+    from models.processors.similar_questions import (
+        ensure_recommend_data_loaded, publish_recommend_data, recommend_similar_questions
+    )
+    from models.storages.vector_database import save_vector_database
+
+    rows = qa_rows(args.rows + 200)
+    database = install_sqlite_mysql(workdir / "mysql.sqlite3", rows[:args.rows])
+    embeddings = FakeGoogleEmbeddings()
+
+    def save_index(chunks):
+        texts = [chunk["page_content"] for chunk in synthetic_pdf_chunks(chunks)]
+        vectors = embeddings.embed_documents(texts)
+        save_vector_database(FAISS.from_embeddings(
+            list(zip(texts, vectors)), embeddings,
+            metadatas=[{"source": "SoTaySinhVien2024.pdf", "page": i // 4 + 1} for i in range(chunks)]
+        ))
+
+    app = Flask(__name__)
+    save_index(args.chunks)
+    publish_recommend_data(app.config, *mysql.load_or_prepare_data())
+    query_processor.load_vector_db_once()
+
+    queries = user_questions(200)
+    query_vectors = [embeddings.embed_query(query) for query in queries[:50]]
+    stop = threading.Event()
+    latencies, errors, seen = [], [], set()
+    lock = threading.Lock()
+
+    def reader(seed):
+        rng = np.random.default_rng(seed)
+        with app.app_context():
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    snapshot = ensure_recommend_data_loaded()
+                    assert snapshot.tfidf_matrix.shape[0] == len(snapshot.qa_store)
+                    indices, _ = recommend_similar_questions(queries[rng.integers(len(queries))], 5, snapshot=snapshot)
+                    assert all(index < len(snapshot.qa_store) for index in indices)
+                    vector_database = query_processor.load_vector_db_once()
+                    docs = vector_database.similarity_search_by_vector(query_vectors[rng.integers(len(query_vectors))], k=5)
+                    assert all(hasattr(doc, "page_content") for doc in docs)
+                    generations = (snapshot.generation, query_processor.vector_database_generation)
+                except Exception as e:
+                    with lock:
+                        errors.append(repr(e))
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+                    seen.add(generations)
+
+    def run_readers(during=None):
+        stop.clear()
+        latencies.clear()
+        threads = [threading.Thread(target=reader, args=(seed,)) for seed in range(args.readers)]
+        for thread in threads:
+            thread.start()
+        start = time.perf_counter()
+        if during is not None:
+            during()
+        time.sleep(max(0.0, args.seconds - (time.perf_counter() - start)))
+        stop.set()
+        for thread in threads:
+            thread.join()
+        ordered = sorted(latencies)
+        return len(ordered), percentile(ordered, 0.5) * 1000, percentile(ordered, 0.99) * 1000, ordered[-1] * 1000
+
+    def report(label, result):
+        count, p50, p99, worst = result
+        print(f"{label:<28} {count:>8} req   p50 {p50:7.2f} ms   p99 {p99:7.2f} ms   max {worst:8.2f} ms")
+
+    report("baseline", run_readers())
+
+    refresher = IndexRefresher(interval=3600, refresh_pdfs=False)
+    refresher.start(app.config)
+    before = refresher.stats()
+
+    def change_and_refresh():
+        database.add_rows(rows[args.rows:])
+        with database.connect() as conn:
+            conn.execute("UPDATE question SET status_delete = 1 WHERE id = 1")
+        save_index(args.chunks + args.chunks // 2)
+        refresher.trigger()
+        while refresher.stats()["runs"] == before["runs"]:
+            time.sleep(0.05)
+
+    report("during background refresh", run_readers(change_and_refresh))
+    after = refresher.stats()
+    assert not errors, errors[:5]
+    assert after["errors"] == 0, after
+    assert after["recommend_generation"] == before["recommend_generation"] + 1, after
+    assert after["vector_generation"] == before["vector_generation"] + 1, after
+    assert after["recommend_rows"] == args.rows + 199, after
+    assert query_processor.vector_database.index.ntotal == args.chunks + args.chunks // 2
+    print(
+        f"recommender generation {before['recommend_generation']} -> {after['recommend_generation']}"
+        f" ({after['recommend_rows']} rows, built in {after['recommend_build_seconds']:.2f}s off the request path)"
+    )
+    print(
+        f"vector index generation {before['vector_generation']} -> {after['vector_generation']}"
+        f" ({query_processor.vector_database.index.ntotal} vectors, loaded in {after['vector_build_seconds']:.2f}s)"
+    )
+    print(f"(recommender, vector) generations seen by readers: {sorted(seen)}; errors: {len(errors)}")
+
+    with database.connect() as conn:
+        conn.execute("UPDATE question SET status_delete = 1 WHERE id = 2")
+    snapshot = app.config['recommend_snapshot']
+    start = time.perf_counter()
+    mysql.update_data(snapshot.qa_store, snapshot.vectorizer, snapshot.tfidf_matrix)
+    print(f"same rebuild inline:         {(time.perf_counter() - start) * 1000:9.1f} ms in the unlucky request")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
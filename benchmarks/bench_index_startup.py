@@ -0,0 +1,176 @@
+"""
+Per-worker startup time and memory of the PDF vector index in each storage format: the legacy pickled docstore,
+the columnar docstore with the index read into RAM or memory-mapped, and int8 / PQ quantized (memory-mapped).
+W worker processes load the index at the same time (like gunicorn workers booting) and report load time,
+first-search latency, RSS and PSS; PSS splits pages shared between workers, so it shows what memory-mapping saves.
+
+Usage: python benchmarks/bench_index_startup.py [--chunks 20000] [--workers 4] [--dimension 768]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+MODES = {
+    "pickle": {"mmap": False, "quantization": "none"},
+    "columnar": {"mmap": False, "quantization": "none"},
+    "columnar+mmap": {"mmap": True, "quantization": "none"},
+    "int8+mmap": {"mmap": True, "quantization": "int8"},
+    "pq+mmap": {"mmap": True, "quantization": "pq"},
+}
+
+def memory_kb():
+    values = {}
+    for path, fields in (("/proc/self/status", ("VmRSS",)), ("/proc/self/smaps_rollup", ("Pss",))):
+        try:
+            with open(path) as f:
+                for line in f:
+                    name, _, rest = line.partition(":")
+                    if name in fields:
+                        values[name] = int(rest.split()[0])
+        except OSError:
+            pass
+    return values.get("VmRSS", 0), values.get("Pss", 0)
+
+def worker(index_dir, mode, dimension):
+    """
+    Load the index like a booting worker, wait until every worker has loaded, then report memory
+    """
+    import common  # noqa: F401
+    import numpy as np
+    from fakes import install_fake_backend
+
+    install_fake_backend()
+    os.chdir(index_dir)
+    from models.storages.vector_database import load_vector_database
+
+    rss_before, pss_before = memory_kb()
+    start = time.perf_counter()
+    vector_database, error = load_vector_database(**MODES[mode])
+    load_seconds = time.perf_counter() - start
+    assert vector_database is not None, error
+
+    rng = np.random.default_rng(os.getpid())
+    queries = rng.standard_normal((20, dimension)).astype(np.float32)
+    start = time.perf_counter()
+    vector_database.similarity_search_by_vector(queries[0].tolist(), k=10)
+    first_search = time.perf_counter() - start
+    start = time.perf_counter()
+    for query in queries[1:]:
+        vector_database.similarity_search_by_vector(query.tolist(), k=10)
+    search_seconds = (time.perf_counter() - start) / (len(queries) - 1)
+
+    print("ready", flush=True)
+    sys.stdin.readline()
+    rss_after, pss_after = memory_kb()
+    print(json.dumps({
+        "load_ms": round(load_seconds * 1000, 2),
+        "first_search_ms": round(first_search * 1000, 2),
+        "search_ms": round(search_seconds * 1000, 3),
+        "rss_mb": round((rss_after - rss_before) / 1024, 1),
+        "pss_mb": round((pss_after - pss_before) / 1024, 1),
+    }), flush=True)
+
+def build_indexes(workdir, chunks, dimension):
+    """
+    One synthetic index saved in every format; returns {mode: index directory}
+    """
+    import common  # noqa: F401
+    import numpy as np
+    from common import synthetic_pdf_chunks
+    from fakes import FakeGoogleEmbeddings, install_fake_backend
+    from langchain_community.vectorstores import FAISS
+
+    install_fake_backend()
+    from models.storages import vector_database as vector_store
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((chunks, dimension)).astype(np.float32)
+    texts = [chunk["page_content"] for chunk in synthetic_pdf_chunks(chunks)]
+    database = FAISS.from_embeddings(
+        list(zip(texts, vectors.tolist())),
+        FakeGoogleEmbeddings(),
+        metadatas=[{"source": "SoTaySinhVien2024.pdf", "page": i // 4 + 1} for i in range(chunks)]
+    )
+
+    directories = {}
+    legacy = workdir / "pickle"
+    database.save_local(str(legacy / "faiss_index"))
+    directories["pickle"] = legacy
+    for mode in ("columnar", "int8+mmap", "pq+mmap"):
+        directory = workdir / mode
+        (directory / "faiss_index").mkdir(parents=True)
+        os.chdir(directory)
+        vector_store.save_sparse_index = lambda vector_database, path=None: None
+        vector_store.save_vector_database(database, quantization=MODES[mode]["quantization"])
+        directories[mode] = directory
+    directories["columnar+mmap"] = directories["columnar"]
+    os.chdir(workdir)
+    return directories
+
+def run_mode(index_dir, mode, workers, dimension):
+    processes = [
+        subprocess.Popen(
+            [sys.executable, __file__, "--worker", str(index_dir), mode, str(dimension)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, cwd=BENCHMARK_DIR
+        )
+        for _ in range(workers)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        line = process.stdout.readline()
+        while line and line.strip() != "ready":
+            line = process.stdout.readline()
+    boot_seconds = time.perf_counter() - start
+    results = []
+    for process in processes:
+        process.stdin.write("measure\n")
+        process.stdin.flush()
+    for process in processes:
+        results.append(json.loads(process.stdout.readline()))
+        process.wait()
+    average = {name: round(sum(result[name] for result in results) / len(results), 3) for name in results[0]}
+    average["all_workers_ready_s"] = round(boot_seconds, 2)
+    return average
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        sys.path.insert(0, str(BENCHMARK_DIR))
+        worker(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        return
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--dimension", type=int, default=768)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="chatbot-index-bench-"))
+    (workdir / "data").mkdir()
+    os.environ["DATA_DIR"] = str(workdir / "data")
+    sys.path.insert(0, str(BENCHMARK_DIR))
+    os.chdir(workdir)
+    start = time.perf_counter()
+    directories = build_indexes(workdir, args.chunks, args.dimension)
+    print(f"built {args.chunks} x {args.dimension} index in {time.perf_counter() - start:.1f}s")
+    for mode, directory in sorted(directories.items()):
+        size = sum(path.stat().st_size for path in (directory / "faiss_index").iterdir() if "sparse" not in path.name)
+        print(f"  {mode:<14} {size / 2 ** 20:8.1f} MiB on disk")
+
+    print(f"\nper worker, {args.workers} workers loading at once")
+    header = ["load_ms", "first_search_ms", "search_ms", "rss_mb", "pss_mb", "all_workers_ready_s"]
+    print(f"{'mode':<14}" + "".join(f"{name:>20}" for name in header))
+    for mode in MODES:
+        result = run_mode(directories[mode], mode, args.workers, args.dimension)
+        print(f"{mode:<14}" + "".join(f"{result[name]:>20}" for name in header))
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
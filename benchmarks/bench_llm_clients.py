@@ -0,0 +1,65 @@
+"""
+Per-request client overhead: building Gemini/LangChain objects on every call vs the shared llm_clients registry.
+
+The transport is stubbed (generate_content never leaves the process), so the numbers are pure object-construction cost.
+
+Usage: python benchmarks/bench_llm_clients.py [--requests 2000]
+"""
+import argparse
+import time
+
+from common import FakeResponse
+
+import google.generativeai as genai
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain.chains.question_answering import load_qa_chain
+from langchain.prompts import PromptTemplate
+
+from config import GEMINI_MODEL, TEMPERATURE, MAX_OUTPUT_TOKENS, TOP_K, TOP_P
+from models.processors import llm_clients
+from models.processors.llm_chain import RAG_PROMPT_TEMPLATE
+
+def stub_generate_content(self, prompt, generation_config=None, **kwargs):
+    return FakeResponse("True")
+
+def per_call_model():
+    model = genai.GenerativeModel(GEMINI_MODEL)
+    return model.generate_content("câu hỏi", generation_config=genai.GenerationConfig(
+        temperature=TEMPERATURE, top_p=TOP_P, top_k=TOP_K, max_output_tokens=MAX_OUTPUT_TOKENS,
+    ))
+
+def registry_model():
+    return llm_clients.get_generative_model().generate_content(
+        "câu hỏi", generation_config=llm_clients.get_generation_config()
+    )
+
+def per_call_chain():
+    llm = ChatGoogleGenerativeAI(
+        model=GEMINI_MODEL, temperature=TEMPERATURE, max_output_tokens=MAX_OUTPUT_TOKENS, top_k=TOP_K, top_p=TOP_P
+    )
+    prompt = PromptTemplate(template=RAG_PROMPT_TEMPLATE, input_variables=["context", "question"])
+    return load_qa_chain(llm, chain_type="stuff", prompt=prompt)
+
+def registry_chain():
+    return llm_clients.get_qa_chain(RAG_PROMPT_TEMPLATE)
+
+def measure(fn, requests):
+    fn()
+    start = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    return (time.perf_counter() - start) / requests * 1e6
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    genai.GenerativeModel.generate_content = stub_generate_content
+    print(f"{'path':>24} {'per call us':>12} {'registry us':>12}")
+    print(f"{'GenerativeModel':>24} {measure(per_call_model, args.requests):>12.1f} {measure(registry_model, args.requests):>12.1f}")
+    chain_requests = max(args.requests // 10, 1)
+    print(f"{'RAG qa chain':>24} {measure(per_call_chain, chain_requests):>12.1f} {measure(registry_chain, chain_requests):>12.1f}")
+
+if __name__ == "__main__":
+    main()
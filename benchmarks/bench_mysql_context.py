@@ -0,0 +1,60 @@
+"""
+Prompt size and end-to-end latency of get_gemini_mysql: full-table prompt vs top-N retrieval.
+
+Usage: python benchmarks/bench_mysql_context.py [--rows 1000 10000 100000] [--latency 0.0]
+"""
+import argparse
+
+from common import FakeGenerativeModel, synthetic_qa_rows, timed
+
+import pandas as pd
+from flask import Flask
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from config import MYSQL_CONTEXT_TOP_N
+from models.processors import llm_chain
+from models.processors.similar_questions import publish_recommend_data
+from models.storages.qa_store import QAStore
+
+def build_app(rows):
+    df = pd.DataFrame(rows)
+    vectorizer = TfidfVectorizer(analyzer='word', token_pattern=r'\w{1,}', ngram_range=(1, 2))
+    tfidf_matrix = vectorizer.fit_transform(df['question'] + ' ' + df['answer'])
+    app = Flask(__name__)
+    publish_recommend_data(app.config, QAStore.from_frame(df), vectorizer, tfidf_matrix)
+    return app, df
+
+def full_table_answer(df, question):
+    prompt = llm_chain.build_mysql_prompt(question, df)
+    return FakeGenerativeModel().generate_content(prompt).text
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated Gemini latency in seconds")
+    args = parser.parse_args()
+
+    llm_chain.genai.GenerativeModel = FakeGenerativeModel
+    FakeGenerativeModel.latency = args.latency
+
+    print(f"top-N = {MYSQL_CONTEXT_TOP_N}")
+    print(f"{'rows':>8} {'mode':>10} {'prompt chars':>14} {'latency ms':>12}")
+    for count in args.rows:
+        rows = synthetic_qa_rows(count)
+        app, df = build_app(rows)
+        question = rows[count // 2]['question']
+
+        FakeGenerativeModel.prompt_sizes.clear()
+        _, full_latency = timed(full_table_answer, df, question, repeat=3)
+        full_size = FakeGenerativeModel.prompt_sizes[-1]
+
+        FakeGenerativeModel.prompt_sizes.clear()
+        with app.app_context():
+            _, top_n_latency = timed(llm_chain.get_gemini_mysql, question, repeat=3)
+        top_n_size = FakeGenerativeModel.prompt_sizes[-1]
+
+        print(f"{count:>8} {'full':>10} {full_size:>14} {full_latency * 1000:>12.1f}")
+        print(f"{count:>8} {'top-N':>10} {top_n_size:>14} {top_n_latency * 1000:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Memory footprint and row access of the recommender's Q&A rows: the DataFrame prepare_data() used to keep for the
+life of the process (question, answer, ids, source plus the question_tokenized / answer_tokenized / content
+columns) against the QAStore that replaces it, both built in memory and memory-mapped from the saved artifacts.
+
+For each layout it reports the bytes it holds (pandas deep memory usage / QAStore.nbytes), what tracemalloc sees
+retained after building it, how many Python objects it keeps alive, and the time /recommend spends reading five
+result rows (df.iloc[idx][...] per field before, QAStore.row(idx) now).
+
+Usage: python benchmarks/bench_qa_store.py [--rows 20000]
+"""
+import argparse
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+
+def retained(build):
+    """
+    (result, bytes still allocated once build() returns, Python objects it added)
+    """
+    gc.collect()
+    objects_before = len(gc.get_objects())
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, len(gc.get_objects()) - objects_before
+
+def legacy_frame(rows, tokenize_batch):
+    import pandas as pd
+
+    df = pd.DataFrame(rows)
+    df['question_tokenized'] = tokenize_batch(df['question'].tolist())
+    df['answer_tokenized'] = tokenize_batch(df['answer'].tolist())
+    df['content'] = df['question_tokenized'] + ' ' + df['answer_tokenized']
+    return df
+
+def legacy_rows(df, indices):
+    results = []
+    for idx in indices:
+        row = df.iloc[idx]
+        result = {'question': df.iloc[idx]['question'], 'answer': df.iloc[idx]['answer']}
+        result['source'] = row['source']
+        result['question_id'] = int(row['question_id'])
+        result['answer_id'] = int(row['answer_id'])
+        results.append(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="chatbot-qa-store-bench-"))
+    (workdir / "data").mkdir()
+    os.environ["DATA_DIR"] = str(workdir / "data")
+    os.chdir(workdir)
+    sys.path.insert(0, str(BENCHMARK_DIR))
+
+    import common  # noqa: F401
+    import numpy as np
+    from corpus import qa_rows
+    from models.processors.vietnamese_tokenizer import tokenize_batch
+    from models.storages.qa_store import QAStore
+
+    rows = qa_rows(args.rows)
+    start = time.perf_counter()
+    tokenize_batch([row['question'] for row in rows] + [row['answer'] for row in rows])
+    print(f"tokenized {args.rows} rows in {time.perf_counter() - start:.1f}s (warms the token cache for both builds)")
+
+    df, df_traced, df_objects = retained(lambda: legacy_frame(rows, tokenize_batch))
+    columns = ['question', 'answer', 'question_id', 'answer_id', 'source']
+    store, store_traced, store_objects = retained(lambda: QAStore.from_frame(df[columns]))
+    directory = workdir / "store"
+    directory.mkdir()
+    store.save(directory)
+    mapped, mapped_traced, mapped_objects = retained(lambda: QAStore.load(directory, mmap=True))
+
+    rng = np.random.default_rng(0)
+    lookups = [rng.integers(args.rows, size=5).tolist() for _ in range(2000)]
+    for indices in lookups[:50]:
+        assert legacy_rows(df, indices) == [store.row(idx) for idx in indices] == [mapped.row(idx) for idx in indices]
+
+    def per_request(fn):
+        start = time.perf_counter()
+        for indices in lookups:
+            fn(indices)
+        return (time.perf_counter() - start) / len(lookups) * 1e6
+
+    results = [
+        ("DataFrame (before)", df.memory_usage(deep=True).sum(), df_traced, df_objects,
+         per_request(lambda indices: legacy_rows(df, indices))),
+        ("QAStore in memory", store.nbytes, store_traced, store_objects,
+         per_request(lambda indices: [store.row(idx) for idx in indices])),
+        ("QAStore memory-mapped", store.nbytes, mapped_traced, mapped_objects,
+         per_request(lambda indices: [mapped.row(idx) for idx in indices])),
+    ]
+    print(f"\n{args.rows} Q&A rows")
+    print(f"{'layout':<24}{'data MiB':>12}{'heap MiB':>12}{'objects':>12}{'5 rows (us)':>14}")
+    for name, data_bytes, traced, objects, micros in results:
+        print(f"{name:<24}{data_bytes / 2 ** 20:>12.2f}{traced / 2 ** 20:>12.2f}{objects:>12}{micros:>14.1f}")
+    print("heap MiB is what tracemalloc sees retained; memory-mapped buffers live in the shared page cache instead")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Recall@k and latency of the ANN recommender (TruncatedSVD + FAISS, re-ranked with exact scores) against the exact
+sparse top-k, for several efSearch / nprobe settings.
+
+Usage: python benchmarks/bench_recommend_ann.py [--rows 200000] [--type hnsw|ivf] [--queries 200]
+"""
+import argparse
+import time
+
+import common  # noqa: F401
+
+import numpy as np
+
+from bench_recommend_topk import synthetic_matrix
+from config import RECOMMEND_ANN_CANDIDATES
+from models.processors.similar_questions import score_top_k, score_ann_top_k
+from models.storages.recommend_index import RecommendAnnIndex
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--features", type=int, default=10000)
+    parser.add_argument("--terms", type=int, default=30)
+    parser.add_argument("--type", choices=["hnsw", "ivf"], default="hnsw")
+    parser.add_argument("--dimensions", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--settings", type=int, nargs="+", default=[16, 32, 64, 128, 256],
+                        help="efSearch values for hnsw, nprobe values for ivf")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    matrix = synthetic_matrix(args.rows, args.features, args.terms, rng)
+    # Queries are perturbed copies of existing rows, like a student rephrasing a stored question
+    queries = matrix[rng.choice(args.rows, args.queries, replace=False)].copy()
+    queries.data *= rng.uniform(0.5, 1.5, size=len(queries.data))
+
+    start = time.perf_counter()
+    ann_index = RecommendAnnIndex.build(matrix, kind=args.type, dimensions=args.dimensions)
+    print(f"{args.rows} rows, {args.type}, build {time.perf_counter() - start:.1f} s, "
+          f"{RECOMMEND_ANN_CANDIDATES} re-ranked candidates")
+
+    start = time.perf_counter()
+    exact = [score_top_k(queries[i], matrix, args.k, 0.0)[0] for i in range(args.queries)]
+    exact_latency = (time.perf_counter() - start) / args.queries
+    print(f"{'setting':>8} {'recall@' + str(args.k):>10} {'ms/query':>10}")
+    print(f"{'exact':>8} {1.0:>10.3f} {exact_latency * 1000:>10.2f}")
+
+    for setting in args.settings:
+        ann_index.configure(ef_search=setting, nprobe=setting)
+        start = time.perf_counter()
+        approximate = [score_ann_top_k(queries[i], matrix, ann_index, args.k, 0.0)[0] for i in range(args.queries)]
+        latency = (time.perf_counter() - start) / args.queries
+        recall = np.mean([len(set(a) & set(e)) / max(len(e), 1) for a, e in zip(approximate, exact)])
+        print(f"{setting:>8} {recall:>10.3f} {latency * 1000:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Recommender startup from the saved artifacts vs rebuilding from MySQL, and the watermark staleness check.
+Runs against the SQLite stand-in for MySQL with a synthetic Q&A corpus:
+
+1. prepare_data() from MySQL (what every worker did at boot) vs load_or_prepare_data() from the artifacts.
+2. Unchanged MySQL: no rows are fetched and the artifacts are used as they are.
+3. Rows added: only those are fetched and appended.
+4. A question deleted: the row count no longer adds up and the data is rebuilt.
+
+Usage: python benchmarks/bench_recommend_artifacts.py [--rows 20000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="chatbot-recommend-bench-"))
+    (workdir / "data").mkdir()
+    stopwords = BENCHMARK_DIR.parent / "data" / "vietnamese-stopwords.txt"
+    if stopwords.exists():
+        shutil.copy(stopwords, workdir / "data" / stopwords.name)
+    os.environ["DATA_DIR"] = str(workdir / "data")
+    os.chdir(workdir)
+    sys.path.insert(0, str(BENCHMARK_DIR))
+
+    import common  # noqa: F401
+    import numpy as np
+    from corpus import qa_rows
+    from mysql_standin import install_sqlite_mysql
+    from models.managers import mysql
+
+    rows = qa_rows(args.rows + 50)
+    database = install_sqlite_mysql(workdir / "mysql.sqlite3", rows[:args.rows])
+    fetches = {"full": 0, "new_rows": 0}
+    fetch_all, fetch_new = mysql.fetch_data_from_mysql, mysql.fetch_new_rows_from_mysql
+
+    def counting_fetch_all():
+        fetches["full"] += 1
+        return fetch_all()
+
+    def counting_fetch_new(watermark):
+        fetches["new_rows"] += 1
+        return fetch_new(watermark)
+
+    mysql.fetch_data_from_mysql = counting_fetch_all
+    mysql.fetch_new_rows_from_mysql = counting_fetch_new
+
+    def timed(fn):
+        start = time.perf_counter()
+        result = fn()
+        return result, time.perf_counter() - start
+
+    # 1. Cold build vs artifacts
+    (store, vectorizer, matrix), prepare_seconds = timed(mysql.prepare_data)
+    fetches.update(full=0, new_rows=0)
+    (loaded_store, loaded_vectorizer, loaded_matrix), load_seconds = timed(mysql.load_or_prepare_data)
+    assert fetches == {"full": 0, "new_rows": 0}, fetches
+    assert loaded_store.questions() == store.questions() and loaded_store.answers() == store.answers()
+    assert (loaded_matrix != matrix).nnz == 0
+    probe = ["cho em hỏi học phí học kỳ 1", "thủ tục bảo lưu kết quả"]
+    assert (loaded_vectorizer.transform(probe) != vectorizer.transform(probe)).nnz == 0
+    print(f"prepare_data from MySQL:   {prepare_seconds * 1000:9.1f} ms  ({len(store)} rows, {matrix.shape[1]} terms)")
+    print(f"load from artifacts:       {load_seconds * 1000:9.1f} ms  (watermark unchanged, nothing fetched)")
+
+    # 2-3. New rows are appended incrementally
+    database.add_rows(rows[args.rows:])
+    fetches.update(full=0, new_rows=0)
+    (appended_store, _, appended_matrix), append_seconds = timed(mysql.load_or_prepare_data)
+    assert fetches == {"full": 0, "new_rows": 1}, fetches
+    assert len(appended_store) == appended_matrix.shape[0] > len(store)
+    print(f"load + {len(rows) - args.rows} new rows:        {append_seconds * 1000:9.1f} ms  (fetches: {fetches})")
+
+    # 4. A deletion is caught by the row count
+    with database.connect() as conn:
+        conn.execute("UPDATE question SET status_delete = 1 WHERE id = 1")
+    fetches.update(full=0, new_rows=0)
+    (rebuilt_store, _, rebuilt_matrix), rebuild_seconds = timed(mysql.load_or_prepare_data)
+    assert fetches["full"] == 1, fetches
+    assert len(rebuilt_store) == len(appended_store) - 1 == rebuilt_matrix.shape[0]
+    print(f"load after a deletion:     {rebuild_seconds * 1000:9.1f} ms  (fetches: {fetches}, full rebuild)")
+
+    artifact_dirs = sorted(path.name for path in (workdir / "data" / "recommend_artifacts").iterdir())
+    print(f"artifact generations kept: {artifact_dirs}")
+    assert np.isfinite(rebuilt_matrix.data).all()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Latency of the /recommend relevance checks: sequential calls vs check_relevance_batch, with a fake model.
+
+Usage: python benchmarks/bench_recommend_checks.py [--candidates 5] [--latency 0.5]
+"""
+import argparse
+import time
+
+from common import FakeGenerativeModel, FakeResponse
+
+from models.processors import llm_chain
+
+class FakeRelevanceModel(FakeGenerativeModel):
+    def generate_content(self, prompt, generation_config=None, **kwargs):
+        time.sleep(FakeGenerativeModel.latency)
+        return FakeResponse("True")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.5, help="simulated Gemini latency in seconds")
+    args = parser.parse_args()
+
+    llm_chain.genai.GenerativeModel = FakeRelevanceModel
+    FakeGenerativeModel.latency = args.latency
+    candidates = [(f"câu hỏi {i}", f"câu trả lời {i}") for i in range(args.candidates)]
+
+    start = time.perf_counter()
+    sequential = [llm_chain.check_relevance("học phí bao nhiêu", q, a) for q, a in candidates]
+    sequential_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    concurrent = llm_chain.check_relevance_batch("học phí bao nhiêu", candidates)
+    concurrent_time = time.perf_counter() - start
+
+    assert sequential == concurrent
+    print(f"{args.candidates} candidates, {args.latency * 1000:.0f} ms per model call")
+    print(f"sequential: {sequential_time * 1000:8.1f} ms")
+    print(f"concurrent: {concurrent_time * 1000:8.1f} ms  ({sequential_time / concurrent_time:.1f}x)")
+
+if __name__ == "__main__":
+    main()
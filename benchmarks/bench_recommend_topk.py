@@ -0,0 +1,67 @@
+"""
+Top-k question recommendation over a synthetic L2-normalized TF-IDF matrix: cosine_similarity + Python sort
+(the previous implementation) vs score_top_k (sparse mat-vec + argpartition) and score_top_k_batch.
+
+Usage: python benchmarks/bench_recommend_topk.py [--rows 100000 1000000] [--features 10000] [--batch 64]
+"""
+import argparse
+import time
+
+import common  # noqa: F401
+
+import numpy as np
+from scipy import sparse
+from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+
+from models.processors.similar_questions import score_top_k, score_top_k_batch
+
+def previous_top_k(query_tfidf, tfidf_matrix, top_n=5, min_score=0.3):
+    sim_scores = cosine_similarity(query_tfidf, tfidf_matrix)[0]
+    sim_scores_with_indices = [(idx, score) for idx, score in enumerate(sim_scores) if score > min_score]
+    sim_scores_with_indices = sorted(sim_scores_with_indices, key=lambda x: x[1], reverse=True)
+    top_results = sim_scores_with_indices[:top_n]
+    return [i[0] for i in top_results], [i[1] for i in top_results]
+
+def synthetic_matrix(rows, features, terms_per_row, rng):
+    indices = rng.zipf(1.3, size=rows * terms_per_row) % features
+    indptr = np.arange(0, rows * terms_per_row + 1, terms_per_row)
+    data = rng.random(rows * terms_per_row).astype(np.float64)
+    matrix = sparse.csr_matrix((data, indices, indptr), shape=(rows, features))
+    matrix.sum_duplicates()
+    return normalize(matrix)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--features", type=int, default=10000)
+    parser.add_argument("--terms", type=int, default=30, help="non-zero terms per row")
+    parser.add_argument("--batch", type=int, default=64)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>9} {'previous ms':>12} {'top-k ms':>10} {'batch ms/query':>15}")
+    for rows in args.rows:
+        matrix = synthetic_matrix(rows, args.features, args.terms, rng)
+        queries = matrix[rng.choice(rows, args.batch, replace=False)]
+        # Low threshold so both implementations rank the same candidates
+        min_score = 0.05
+
+        start = time.perf_counter()
+        expected = [previous_top_k(queries[i], matrix, 5, min_score) for i in range(4)]
+        previous = (time.perf_counter() - start) / 4
+
+        start = time.perf_counter()
+        single = [score_top_k(queries[i], matrix, 5, min_score) for i in range(args.batch)]
+        current = (time.perf_counter() - start) / args.batch
+
+        start = time.perf_counter()
+        batch = score_top_k_batch(queries, matrix, 5, min_score)
+        batched = (time.perf_counter() - start) / args.batch
+
+        for i in range(4):
+            assert expected[i][0] == single[i][0] == batch[i][0]
+        print(f"{rows:>9} {previous * 1000:>12.2f} {current * 1000:>10.2f} {batched * 1000:>15.2f}")
+
+if __name__ == "__main__":
+    main()
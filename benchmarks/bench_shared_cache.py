@@ -0,0 +1,78 @@
+"""
+Hit rate and lookup latency of the per-worker memory cache vs the shared SQLite cache across several worker processes.
+
+Usage: python benchmarks/bench_shared_cache.py [--workers 4] [--requests 2000] [--questions 500] [--latency 0.005]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+import common  # noqa: F401  (sets config defaults before the cache module is imported)
+
+from models.managers.cache import QueryCache, cache_key
+from models.storages.sqlite_cache import SqliteQueryCache
+
+def worker(backend, path, seed, requests, questions, latency, results):
+    cache = SqliteQueryCache(path) if backend == "sqlite" else QueryCache()
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(questions)]
+    lookups = []
+    model_calls = 0
+    for _ in range(requests):
+        question = f"câu hỏi phổ biến số {rng.choices(range(questions), weights)[0]}"
+        key = cache_key(question)
+        start = time.perf_counter()
+        entry = cache.get(key)
+        lookups.append(time.perf_counter() - start)
+        if entry is None:
+            model_calls += 1
+            time.sleep(latency)
+            cache.set_if_absent(key, {"query": question, "result": "câu trả lời " * 50, "processing_time": latency})
+    results.put((cache.hits, cache.misses, model_calls, lookups))
+
+def run(backend, args):
+    path = os.path.join(tempfile.mkdtemp(), "answer_cache.sqlite3")
+    if backend == "sqlite":
+        SqliteQueryCache(path)
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=worker,
+            args=(backend, path, seed, args.requests, args.questions, args.latency, results)
+        )
+        for seed in range(args.workers)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    hits = sum(item[0] for item in collected)
+    misses = sum(item[1] for item in collected)
+    model_calls = sum(item[2] for item in collected)
+    lookups = sorted(value for item in collected for value in item[3])
+    p50 = lookups[len(lookups) // 2] * 1e6
+    p99 = lookups[int(len(lookups) * 0.99)] * 1e6
+    print(f"{backend:>8} {hits / (hits + misses):>9.1%} {model_calls:>12} {p50:>10.1f} {p99:>10.1f} {elapsed:>9.2f}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per worker")
+    parser.add_argument("--questions", type=int, default=500, help="distinct questions (Zipf distributed)")
+    parser.add_argument("--latency", type=float, default=0.005, help="simulated Gemini latency in seconds")
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers x {args.requests} requests, {args.questions} distinct questions")
+    print(f"{'backend':>8} {'hit rate':>9} {'model calls':>12} {'p50 us':>10} {'p99 us':>10} {'total s':>9}")
+    for backend in ("memory", "sqlite"):
+        run(backend, args)
+
+if __name__ == "__main__":
+    main()
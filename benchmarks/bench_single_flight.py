@@ -0,0 +1,91 @@
+"""
+Duplicate model calls for a burst of identical questions, with and without single-flight coalescing: threads in one
+worker (memory cache), then several worker processes sharing the SQLite cache. The model stages are stubbed with sleeps.
+
+Usage: python benchmarks/bench_single_flight.py [--clients 200] [--processes 4] [--latency 0.5]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import common  # noqa: F401
+
+MYSQL_MISS = "Không tìm thấy thông tin liên quan trong cơ sở dữ liệu."
+QUESTION = "hạn chót đăng ký học phần học kỳ hè năm nay là ngày nào"
+
+def burst(clients, latency, enabled, calls=None):
+    """
+    Fire `clients` identical questions at process_query from a thread pool; returns (model calls, seconds, stats)
+    """
+    from models.managers import cache
+    from models.managers.single_flight import get_single_flight_stats
+    from models.processors import query_processor
+
+    local_calls = [0]
+
+    def stub_mysql(prompt):
+        local_calls[0] += 1
+        if calls is not None:
+            with calls.get_lock():
+                calls.value += 1
+        time.sleep(latency)
+        return MYSQL_MISS
+
+    query_processor.get_gemini_mysql = stub_mysql
+    query_processor.get_rag_answer = lambda prompt: (f"Trả lời: {prompt}", True)
+    query_processor.SINGLE_FLIGHT_ENABLED = enabled
+    cache.cache.clear()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        answers = list(executor.map(query_processor.process_query, [QUESTION] * clients))
+    elapsed = time.perf_counter() - start
+    assert all(answer.startswith("Trả lời") for answer in answers), answers[:3]
+    return local_calls[0], elapsed, get_single_flight_stats()
+
+def worker(clients, latency, calls, barrier, results):
+    barrier.wait()
+    _, elapsed, stats = burst(clients, latency, True, calls)
+    results.put((elapsed, stats))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print(f"{args.clients} identical questions, {args.latency:.2f}s model latency")
+    print(f"{'mode':>28} {'model calls':>12} {'seconds':>8}")
+    for enabled in (False, True):
+        calls, elapsed, stats = burst(args.clients, args.latency, enabled)
+        label = "threads, single-flight" if enabled else "threads, no coalescing"
+        print(f"{label:>28} {calls:>12} {elapsed:>8.2f}")
+    print(f"single-flight stats: {stats}")
+
+    os.environ["CACHE_BACKEND"] = "sqlite"
+    os.environ["CACHE_SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "answer_cache.sqlite3")
+    context = multiprocessing.get_context("spawn")
+    calls = context.Value("i", 0)
+    barrier = context.Barrier(args.processes)
+    results = context.Queue()
+    per_process = args.clients // args.processes
+    processes = [
+        context.Process(target=worker, args=(per_process, args.latency, calls, barrier, results))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    label = f"{args.processes} processes, SQLite leases"
+    print(f"{label:>28} {calls.value:>12} {max(elapsed for elapsed, _ in outcomes):>8.2f}")
+    for _, stats in outcomes:
+        print(f"  {stats}")
+
+if __name__ == "__main__":
+    main()
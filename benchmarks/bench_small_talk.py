@@ -0,0 +1,81 @@
+"""
+Throughput of is_small_talk (compiled whole-word phrase index) vs the previous per-phrase substring scan, plus the
+regression cases the matcher must keep answering the same way.
+
+Usage: python benchmarks/bench_small_talk.py [--iterations 20000]
+"""
+import argparse
+import time
+
+import common  # noqa: F401
+
+from models.processors import small_talk
+from models.processors.small_talk import CATEGORIES, is_small_talk
+
+# question -> expected response (None: not small talk)
+REGRESSION_CASES = {
+    "xin chào": small_talk.GREETINGS_RESPONSE,
+    "chào tạm biệt": small_talk.GREETINGS_RESPONSE,
+    "Tạm biệt nhé": small_talk.GOODBYES_RESPONSE,
+    "bạn khỏe không": small_talk.HEALTH_QUESTIONS_RESPONSE,
+    "what's up bro": small_talk.HEALTH_QUESTIONS_RESPONSE,
+    "thời tiết hôm nay thế nào": small_talk.WEATHER_RESPONSE,
+    "viết code python giúp mình": small_talk.OUT_OF_SCOPE_RESPONSE,
+    "cảm ơn bạn": small_talk.THANKS_RESPONSE,
+    "xin lỗi nhé": small_talk.APOLOGIES_RESPONSE,
+    "Ok": small_talk.ECHO_STATEMENTS_RESPONSE,
+    "làm được gì": small_talk.CAPABILITY_QUESTIONS_RESPONSE,
+    "chính trị việt nam hiện nay ra sao vậy bạn": small_talk.POLITICAL_TOPICS_RESPONSE,
+    "cờ bạc có vui không": small_talk.SENSITIVE_TOPICS_RESPONSE,
+    "học bổng": small_talk.SHORT_QUESTION_RESPONSE,
+    # Substring false positives of the previous matcher
+    "lịch thi cuối kỳ học kỳ này khi nào vậy": None,
+    "mình muốn apply học bổng thì cần gì": None,
+    "học phí bao nhiêu": None,
+    "ai là hiệu trưởng": None,
+    "điểm rèn luyện được tính như thế nào": None,
+}
+
+QUESTIONS = list(REGRESSION_CASES) + [
+    "cho mình hỏi về chuẩn đầu ra tiếng anh của khóa 2024 cần đạt bao nhiêu điểm toeic",
+    "thủ tục bảo lưu kết quả học tập gồm những giấy tờ gì và nộp ở phòng nào",
+]
+
+def previous_is_small_talk(question):
+    question_lower = question.lower().strip()
+    words = question_lower.split()
+    for phrases, max_words, response in CATEGORIES:
+        if max_words == "exact":
+            if question_lower in phrases:
+                return response
+            continue
+        for word in phrases:
+            if word in question_lower and (max_words is None or len(words) < max_words):
+                return response
+    if len(words) < 3:
+        return small_talk.SHORT_QUESTION_RESPONSE
+    return None
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    failures = [q for q, expected in REGRESSION_CASES.items() if is_small_talk(q) != expected]
+    for question in failures:
+        print(f"REGRESSION: {question!r} -> {is_small_talk(question)!r}")
+    print(f"{len(REGRESSION_CASES) - len(failures)}/{len(REGRESSION_CASES)} regression cases pass")
+
+    questions = (QUESTIONS * (args.iterations // len(QUESTIONS) + 1))[:args.iterations]
+    for label, fn in (("substring scan", previous_is_small_talk), ("phrase index", is_small_talk)):
+        start = time.perf_counter()
+        for question in questions:
+            fn(question)
+        elapsed = time.perf_counter() - start
+        print(f"{label:>16}: {len(questions) / elapsed:>10.0f} questions/s ({elapsed / len(questions) * 1e6:.1f} us each)")
+
+    if failures:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Latency of process_query / process_query_async in sequential vs speculative mode, with stubbed MySQL and RAG stages
+that sleep instead of calling Gemini. Reports PDF-only questions (MySQL miss) and MySQL hits separately, plus how many
+RAG calls the speculative mode spends on questions MySQL already answered.
+
+Usage: python benchmarks/bench_speculative_query.py [--mysql-latency 1.0] [--rag-latency 1.5] [--questions 10]
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import threading
+import time
+
+from common import synthetic_sentence
+
+from models.processors import async_query_processor, query_processor
+
+MYSQL_MISS = "Không tìm thấy thông tin liên quan trong cơ sở dữ liệu."
+
+class StubStages:
+    def __init__(self, mysql_latency, rag_latency):
+        self.mysql_latency = mysql_latency
+        self.rag_latency = rag_latency
+        self.lock = threading.Lock()
+        self.rag_calls = 0
+        self.mysql_hits = set()
+
+    def get_gemini_mysql(self, prompt):
+        time.sleep(self.mysql_latency)
+        return f"Trả lời từ MySQL: {prompt}" if prompt in self.mysql_hits else MYSQL_MISS
+
+    def get_rag_answer(self, prompt, cancelled=None):
+        if cancelled is not None and cancelled.is_set():
+            return query_processor.ERROR_MESSAGE, False
+        with self.lock:
+            self.rag_calls += 1
+        time.sleep(self.rag_latency)
+        return f"Trả lời từ PDF: {prompt}", True
+
+def install(stages, speculative):
+    query_processor.get_gemini_mysql = stages.get_gemini_mysql
+    query_processor.get_rag_answer = stages.get_rag_answer
+    query_processor.store_answer = lambda prompt, result: None
+    query_processor.QUERY_SPECULATIVE = speculative
+    async_query_processor.get_gemini_mysql = stages.get_gemini_mysql
+    async_query_processor.get_rag_answer = stages.get_rag_answer
+    async_query_processor.store_answer = lambda prompt, result: None
+    async_query_processor.QUERY_SPECULATIVE = speculative
+
+def mean_latency(run, questions):
+    start = time.perf_counter()
+    for question in questions:
+        run(question)
+    return (time.perf_counter() - start) / len(questions)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mysql-latency", type=float, default=1.0)
+    parser.add_argument("--rag-latency", type=float, default=1.5)
+    parser.add_argument("--questions", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    counter = itertools.count()
+    # Unique, non-small-talk questions so every call reaches the MySQL stage
+    new_questions = lambda: [f"{synthetic_sentence(rng)} {next(counter)}" for _ in range(args.questions)]
+
+    print(f"MySQL stage {args.mysql_latency:.2f}s, RAG stage {args.rag_latency:.2f}s")
+    print(f"{'pipeline':>8} {'mode':>12} {'PDF-only s':>11} {'MySQL hit s':>12} {'wasted RAG calls':>17}")
+    for pipeline in ("sync", "async"):
+        for speculative in (False, True):
+            stages = StubStages(args.mysql_latency, args.rag_latency)
+            install(stages, speculative)
+            if pipeline == "sync":
+                run = query_processor.process_query
+            else:
+                run = lambda question: asyncio.run(async_query_processor.process_query_async(question))
+
+            pdf_only = mean_latency(run, new_questions())
+            hits = new_questions()
+            stages.mysql_hits.update(hits)
+            rag_calls_before = stages.rag_calls
+            mysql_hit = mean_latency(run, hits)
+            # Let cancelled or ignored RAG calls that already started finish before counting them
+            time.sleep(args.rag_latency)
+            wasted = stages.rag_calls - rag_calls_before
+            mode = "speculative" if speculative else "sequential"
+            print(f"{pipeline:>8} {mode:>12} {pdf_only:>11.2f} {mysql_hit:>12.2f} {wasted:>17}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Tokenization throughput on a synthetic corpus: row-by-row pyvi vs tokenize_batch (single process, process pool,
+warm persistent cache) and the query-time LRU.
+
+Usage: python benchmarks/bench_tokenizer.py [--rows 50000] [--processes N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ["TOKEN_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "token_cache.sqlite3")
+
+from common import synthetic_qa_rows
+
+from config import TOKENIZE_PROCESSES
+from models.processors import vietnamese_tokenizer as tokenizer
+
+def report(label, rows, seconds):
+    print(f"{label:>28} {seconds:>9.2f} s {rows / seconds:>12.0f} rows/s")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--processes", type=int, default=TOKENIZE_PROCESSES)
+    args = parser.parse_args()
+
+    texts = [row["answer"] for row in synthetic_qa_rows(args.rows)]
+    print(f"{args.rows} rows, {args.processes} processes")
+
+    start = time.perf_counter()
+    baseline = [tokenizer.tokenize_vietnamese(text) for text in texts]
+    report("row by row", args.rows, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    tokenizer.tokenize_batch(texts, processes=1, use_cache=False)
+    report("batch, 1 process", args.rows, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    cold = tokenizer.tokenize_batch(texts, processes=args.processes)
+    report(f"batch, {args.processes} processes (cold)", args.rows, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    warm = tokenizer.tokenize_batch(texts, processes=args.processes)
+    report("batch, warm cache", args.rows, time.perf_counter() - start)
+    assert baseline == cold == warm
+
+    queries = texts[:100] * 100
+    start = time.perf_counter()
+    for query in queries:
+        tokenizer.tokenize_query(query)
+    report("query LRU (100 distinct)", len(queries), time.perf_counter() - start)
+
+if __name__ == "__main__":
+    main()
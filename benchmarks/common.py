@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import random
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+# Benchmarks run offline, so config.py gets harmless defaults when no .env is present
+BENCHMARK_ENV = {
+    "GOOGLE_API_KEY": "benchmark",
+    "GEMINI_MODEL": "gemini-benchmark",
+    "TEMPERATURE": "0.3",
+    "MAX_OUTPUT_TOKENS": "2048",
+    "TOP_K": "40",
+    "TOP_P": "1",
+    "MAX_RETRIES": "3",
+    "BASE_DELAY": "0",
+    "MAX_DOCS": "5",
+    "VECTOR_SEARCH_K": "10",
+    "EMBEDDING_MODEL": "models/embedding-001",
+    "CHUNK_SIZE": "1000",
+    "CHUNK_OVERLAP": "200",
+    "PDF_FILE": "SoTaySinhVien2024.pdf",
+    "DATA_DIR": "data",
+    "STOPWORDS_FILE": "vietnamese-stopwords.txt",
+    "MYSQL_HOST": "127.0.0.1",
+    "MYSQL_PORT": "1",
+    "MYSQL_USER": "benchmark",
+    "MYSQL_PASSWORD": "benchmark",
+    "MYSQL_DATABASE": "benchmark",
+    "LOCAL_URL": "http://localhost",
+    "PRODUCTION_URL": "http://localhost",
+}
+for name, value in BENCHMARK_ENV.items():
+    os.environ.setdefault(name, value)
+
+VOCABULARY = [
+    "học phí", "học bổng", "tín chỉ", "học kỳ", "đăng ký", "môn học", "điểm rèn luyện",
+    "ký túc xá", "thẻ sinh viên", "bảo hiểm y tế", "tốt nghiệp", "thực tập", "khóa luận",
+    "chuẩn đầu ra", "tiếng anh", "lịch thi", "phúc khảo", "cảnh báo học vụ", "bảo lưu",
+    "chuyển ngành", "miễn giảm", "hạn nộp", "phòng đào tạo", "giảng viên", "cố vấn học tập",
+]
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeGenerativeModel:
+    """
+    Stand-in for genai.GenerativeModel that sleeps instead of calling the API and records prompt sizes
+    """
+    latency = 0.0
+    prompt_sizes = []
+
+    def __init__(self, model_name=None, *args, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, generation_config=None, **kwargs):
+        FakeGenerativeModel.prompt_sizes.append(len(prompt))
+        if FakeGenerativeModel.latency:
+            time.sleep(FakeGenerativeModel.latency)
+        return FakeResponse("Không tìm thấy thông tin liên quan trong cơ sở dữ liệu.")
+
+def synthetic_sentence(rng, min_words=6, max_words=14):
+    words = [rng.choice(VOCABULARY) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words) + f" {rng.randint(1, 100000)}"
+
+def synthetic_qa_rows(count, seed=42):
+    rng = random.Random(seed)
+    return [
+        {
+            "question": synthetic_sentence(rng),
+            "answer": synthetic_sentence(rng, 20, 40),
+            "question_id": i + 1,
+            "answer_id": i + 1,
+            "source": "mysql",
+        }
+        for i in range(count)
+    ]
+
+def timed(fn, *args, repeat=5, **kwargs):
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        durations.append(time.perf_counter() - start)
+    durations.sort()
+    return result, durations[len(durations) // 2]
+
+class FakeEmbeddings:
+    """
+    Deterministic offline stand-in for GoogleGenerativeAIEmbeddings: hashed bag-of-words vectors, L2-normalized
+    """
+    def __init__(self, dimension=768, latency=0.0):
+        self.dimension = dimension
+        self.latency = latency
+        self.calls = 0
+
+    def _embed(self, text):
+        import hashlib
+        import numpy as np
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in text.lower().split():
+            digest = hashlib.md5(word.encode()).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dimension] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+def synthetic_pdf_chunks(count, seed=7, source="SoTaySinhVien2024.pdf"):
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(count):
+        code = f"{rng.choice(['MATH', 'PHYS', 'INPR', 'ENGL', 'GELA'])}{rng.randint(100000, 999999)}"
+        fee = f"{rng.randint(100, 999)}.000"
+        text = " ".join([synthetic_sentence(rng, 30, 60), f"mã học phần {code}", f"mức phí {fee} đồng"])
+        chunks.append({
+            "page_content": text,
+            "metadata": {"source": source, "page": i // 4 + 1, "code": code, "fee": fee},
+        })
+    return chunks
@@ -0,0 +1,83 @@
+"""
+Synthetic Vietnamese student-handbook corpora: consultation Q&A rows and PDF-like handbook pages, seeded and
+reproducible so benchmark runs are comparable.
+"""
+import random
+
+TOPICS = [
+    "học phí", "học bổng khuyến khích học tập", "đăng ký học phần", "điểm rèn luyện", "ký túc xá",
+    "thẻ sinh viên", "bảo hiểm y tế", "xét tốt nghiệp", "thực tập doanh nghiệp", "khóa luận tốt nghiệp",
+    "chuẩn đầu ra tiếng anh", "lịch thi cuối kỳ", "phúc khảo bài thi", "cảnh báo học vụ", "bảo lưu kết quả",
+    "chuyển ngành", "miễn giảm học phí", "học lại", "học vượt", "vay vốn sinh viên",
+]
+QUESTION_TEMPLATES = [
+    "Cho em hỏi {topic} {detail} như thế nào ạ?",
+    "Thủ tục {topic} {detail} gồm những bước nào?",
+    "Em muốn biết {topic} {detail} thì liên hệ ở đâu?",
+    "Thời hạn {topic} {detail} là khi nào vậy ạ?",
+    "Điều kiện để {topic} {detail} là gì?",
+    "{topic} {detail} có áp dụng cho sinh viên năm nhất không ạ?",
+]
+DETAILS = [
+    "học kỳ 1", "học kỳ 2", "học kỳ hè", "năm học 2024-2025", "khóa 2023", "hệ chất lượng cao",
+    "hệ đại trà", "ngành công nghệ thông tin", "ngành cơ khí", "sinh viên quốc tế", "trực tuyến", "trễ hạn",
+]
+ANSWER_SENTENCES = [
+    "Bạn vui lòng nộp hồ sơ tại phòng công tác học sinh sinh viên trong giờ hành chính.",
+    "Thông tin chi tiết được công bố trên trang web của phòng đào tạo trước mỗi học kỳ.",
+    "Sinh viên cần hoàn thành nghĩa vụ học phí trước khi đăng ký học phần của học kỳ tiếp theo.",
+    "Hồ sơ gồm đơn đề nghị có xác nhận của cố vấn học tập và bản sao thẻ sinh viên.",
+    "Thời gian xử lý hồ sơ là 5 ngày làm việc kể từ ngày nhận đủ giấy tờ hợp lệ.",
+    "Bạn có thể theo dõi kết quả trên cổng thông tin sinh viên bằng tài khoản được cấp.",
+    "Trường hợp đặc biệt, sinh viên liên hệ trực tiếp với khoa quản ngành để được hướng dẫn.",
+    "Mức hỗ trợ được xét dựa trên điểm trung bình học kỳ và điểm rèn luyện.",
+]
+SMALL_TALK = ["xin chào", "cảm ơn bạn", "bạn là ai", "tạm biệt", "ok", "chào bạn"]
+
+def qa_rows(count, seed=42):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        topic = rng.choice(TOPICS)
+        question = rng.choice(QUESTION_TEMPLATES).format(topic=topic, detail=rng.choice(DETAILS))
+        answer = " ".join(rng.sample(ANSWER_SENTENCES, rng.randint(2, 4)))
+        rows.append({
+            "question": f"{question} (mã {i + 1})",
+            "answer": f"Về {topic}: {answer}",
+            "question_id": i + 1,
+            "answer_id": i + 1,
+            "source": "mysql",
+        })
+    return rows
+
+def user_questions(count, seed=7):
+    """
+    Fresh questions in the same style as the Q&A corpus, not present in it
+    """
+    rng = random.Random(seed)
+    return [
+        rng.choice(QUESTION_TEMPLATES).format(topic=rng.choice(TOPICS), detail=rng.choice(DETAILS)) + f" #{i}"
+        for i in range(count)
+    ]
+
+def small_talk(count, seed=11):
+    rng = random.Random(seed)
+    return [rng.choice(SMALL_TALK) for _ in range(count)]
+
+def handbook_pages(count, seed=3, source="SoTaySinhVien2024.pdf"):
+    """
+    Page texts shaped like the extracted handbook: a heading, regulation paragraphs and a bullet list
+    """
+    rng = random.Random(seed)
+    pages = []
+    for i in range(count):
+        topic = rng.choice(TOPICS)
+        paragraphs = [f"Điều {i + 1}. Quy định về {topic}"]
+        for _ in range(rng.randint(3, 6)):
+            paragraphs.append(" ".join(rng.sample(ANSWER_SENTENCES, rng.randint(3, 5))))
+        paragraphs.append("\n".join(f"• {rng.choice(DETAILS)}: {rng.choice(ANSWER_SENTENCES)}" for _ in range(4)))
+        pages.append({
+            "text": "\n\n".join(paragraphs),
+            "metadata": {"source": source, "page": i + 1, "total_pages": count},
+        })
+    return pages
@@ -0,0 +1,166 @@
+"""
+Local HTTP stand-in for the Gemini REST API (generateContent, streamGenerateContent, embedContent,
+batchEmbedContents) with configurable latency, for load tests that go through the real SDK clients.
+Point the app at it with GEMINI_TRANSPORT=rest and GEMINI_API_ENDPOINT=http://127.0.0.1:<port>.
+
+Usage: python benchmarks/fake_gemini_server.py [--port 8089] [--latency 0.5] [--mysql-miss 1.0]
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+_MODEL_PATH = re.compile(r"^/v1(?:beta)?/models/[^:]+:(\w+)")
+
+MYSQL_PROMPT_MARKER = "NỘI DUNG CƠ SỞ DỮ LIỆU"
+RELEVANCE_PROMPT_MARKER = "CÂU HỎI TRONG DB"
+MYSQL_MISS_ANSWER = "Không tìm thấy thông tin liên quan trong cơ sở dữ liệu."
+ANSWER_TEXT = "Theo sổ tay sinh viên, bạn cần hoàn thành thủ tục tại phòng đào tạo trong thời hạn quy định."
+
+class FakeGeminiStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def enter(self, method):
+        with self.lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def snapshot(self):
+        with self.lock:
+            return {"requests": dict(self.requests), "max_in_flight": self.max_in_flight}
+
+def fake_embedding(text, dimension=768):
+    vector = np.zeros(dimension, dtype=np.float32)
+    for word in text.lower().split():
+        digest = hashlib.md5(word.encode()).digest()
+        vector[int.from_bytes(digest[:4], "little") % dimension] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+def request_text(body):
+    return " ".join(
+        part.get("text", "")
+        for content in body.get("contents", [body.get("content", {})])
+        for part in content.get("parts", [])
+    )
+
+def candidate(text):
+    return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP", "index": 0}]}
+
+def make_handler(server_settings, stats):
+    class FakeGeminiHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, payload):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _latency(self):
+            latency = server_settings["latency"]
+            jitter = server_settings["jitter"]
+            return max(0.0, latency + random.uniform(-jitter, jitter))
+
+        def answer_for(self, prompt):
+            if RELEVANCE_PROMPT_MARKER in prompt:
+                return "True"
+            if MYSQL_PROMPT_MARKER in prompt and random.random() < server_settings["mysql_miss"]:
+                return MYSQL_MISS_ANSWER
+            return ANSWER_TEXT
+
+        def do_POST(self):
+            match = _MODEL_PATH.match(self.path)
+            if not match:
+                self.send_error(404)
+                return
+            method = match.group(1)
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            stats.enter(method)
+            try:
+                if method == "embedContent":
+                    time.sleep(server_settings["embed_latency"])
+                    self._send_json({"embedding": {"values": fake_embedding(request_text(body))}})
+                elif method == "batchEmbedContents":
+                    time.sleep(server_settings["embed_latency"])
+                    self._send_json({"embeddings": [
+                        {"values": fake_embedding(request_text(item))} for item in body.get("requests", [])
+                    ]})
+                elif method == "generateContent":
+                    time.sleep(self._latency())
+                    self._send_json(candidate(self.answer_for(request_text(body))))
+                elif method == "streamGenerateContent":
+                    words = self.answer_for(request_text(body)).split(" ")
+                    chunks = [candidate(" ".join(words[i:i + 4]) + " ") for i in range(0, len(words), 4)]
+                    delay = self._latency() / max(len(chunks), 1)
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json; charset=UTF-8")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for i, chunk in enumerate(chunks):
+                        time.sleep(delay)
+                        piece = ("[" if i == 0 else ",") + json.dumps(chunk, ensure_ascii=False)
+                        if i == len(chunks) - 1:
+                            piece += "]"
+                        data = piece.encode("utf-8")
+                        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+                else:
+                    self.send_error(404)
+            finally:
+                stats.leave()
+
+    return FakeGeminiHandler
+
+def start_fake_gemini(port=0, latency=0.5, jitter=0.0, embed_latency=0.02, mysql_miss=1.0):
+    """
+    Serve the fake API on a background thread; returns (server, base_url, stats)
+    """
+    settings = {"latency": latency, "jitter": jitter, "embed_latency": embed_latency, "mysql_miss": mysql_miss}
+    stats = FakeGeminiStats()
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(settings, stats))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", stats
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    parser.add_argument("--mysql-miss", type=float, default=1.0, help="share of MySQL prompts answered with 'not found'")
+    args = parser.parse_args()
+
+    server, url, stats = start_fake_gemini(args.port, args.latency, args.jitter, args.embed_latency, args.mysql_miss)
+    print(f"Fake Gemini API listening on {url}")
+    try:
+        while True:
+            time.sleep(10)
+            print(stats.snapshot())
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
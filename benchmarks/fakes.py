@@ -0,0 +1,123 @@
+"""
+Deterministic offline stand-ins for the Gemini clients (genai.GenerativeModel, ChatGoogleGenerativeAI,
+GoogleGenerativeAIEmbeddings). install_fake_backend() swaps them into models.processors.llm_clients.
+"""
+import hashlib
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from common import FakeEmbeddings, FakeResponse
+
+MYSQL_PROMPT_MARKER = "NỘI DUNG CƠ SỞ DỮ LIỆU"
+RELEVANCE_PROMPT_MARKER = "CÂU HỎI TRONG DB"
+ALTERNATIVES_PROMPT_MARKER = "CÂU TRẢ LỜI THAY THẾ"
+MYSQL_MISS_ANSWER = "Không tìm thấy thông tin liên quan trong cơ sở dữ liệu."
+
+class FakeBackendSettings:
+    latency = 0.0
+    embed_latency = 0.0
+    mysql_hit_ratio = 0.5
+    calls = {}
+
+def _record(kind):
+    FakeBackendSettings.calls[kind] = FakeBackendSettings.calls.get(kind, 0) + 1
+
+def _fraction(text):
+    return int.from_bytes(hashlib.md5(text.encode("utf-8")).digest()[:4], "little") / 2 ** 32
+
+def fake_answer(prompt):
+    """
+    Same prompt, same answer: MySQL prompts hit for a stable share of questions, relevance checks answer by hash
+    """
+    if RELEVANCE_PROMPT_MARKER in prompt:
+        return "True" if _fraction(prompt) < 0.7 else "False"
+    if ALTERNATIVES_PROMPT_MARKER in prompt:
+        return "\n\n".join(f"Cách diễn đạt {i + 1}: bạn vui lòng liên hệ phòng đào tạo để được hỗ trợ." for i in range(5))
+    if MYSQL_PROMPT_MARKER in prompt:
+        question = prompt.split("CÂU HỎI NGƯỜI DÙNG:")[-1].split("\n")[0]
+        if _fraction(question) >= FakeBackendSettings.mysql_hit_ratio:
+            return MYSQL_MISS_ANSWER
+        return "Theo dữ liệu tư vấn, bạn cần nộp đơn tại phòng công tác sinh viên trước hạn quy định."
+    return "Theo sổ tay sinh viên, bạn cần hoàn thành thủ tục tại phòng đào tạo trong thời hạn quy định."
+
+class FakeGeminiModel:
+    """
+    genai.GenerativeModel replacement
+    """
+    def __init__(self, model_name=None, *args, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, generation_config=None, **kwargs):
+        _record("generate_content")
+        if FakeBackendSettings.latency:
+            time.sleep(FakeBackendSettings.latency)
+        return FakeResponse(fake_answer(str(prompt)))
+
+class FakeChatModel(BaseChatModel):
+    """
+    ChatGoogleGenerativeAI replacement accepting the same constructor arguments
+    """
+    model: str = "fake-gemini"
+    temperature: float = 0.0
+    max_output_tokens: Optional[int] = None
+    top_k: Optional[int] = None
+    top_p: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-gemini-chat"
+
+    def _prompt(self, messages):
+        return "\n".join(str(message.content) for message in messages)
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        _record("chat")
+        if FakeBackendSettings.latency:
+            time.sleep(FakeBackendSettings.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=fake_answer(self._prompt(messages))))])
+
+    def _stream(self, messages, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        _record("chat_stream")
+        words = fake_answer(self._prompt(messages)).split(" ")
+        for i in range(0, len(words), 4):
+            if FakeBackendSettings.latency:
+                time.sleep(FakeBackendSettings.latency / max(len(words) // 4, 1))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=" ".join(words[i:i + 4]) + " "))
+
+class FakeGoogleEmbeddings(FakeEmbeddings, Embeddings):
+    """
+    GoogleGenerativeAIEmbeddings replacement (768-d hashed bag of words, like embedding-001's dimension)
+    """
+    def __init__(self, model=None, **kwargs):
+        super().__init__(dimension=768)
+        self.model = model
+
+    def embed_documents(self, texts):
+        _record("embed_documents")
+        if FakeBackendSettings.embed_latency:
+            time.sleep(FakeBackendSettings.embed_latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        _record("embed_query")
+        if FakeBackendSettings.embed_latency:
+            time.sleep(FakeBackendSettings.embed_latency)
+        return self._embed(text)
+
+def install_fake_backend(latency=0.0, embed_latency=0.0, mysql_hit_ratio=0.5):
+    import google.generativeai as genai
+    from models.processors import llm_clients
+
+    FakeBackendSettings.latency = latency
+    FakeBackendSettings.embed_latency = embed_latency
+    FakeBackendSettings.mysql_hit_ratio = mysql_hit_ratio
+    FakeBackendSettings.calls = {}
+    genai.GenerativeModel = FakeGeminiModel
+    llm_clients.ChatGoogleGenerativeAI = FakeChatModel
+    llm_clients.GoogleGenerativeAIEmbeddings = FakeGoogleEmbeddings
+    llm_clients.clear_clients()
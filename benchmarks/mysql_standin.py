@@ -0,0 +1,73 @@
+"""
+SQLite stand-in for the MySQL question/answer tables. install_sqlite_mysql() points
+models.managers.mysql.get_connection at it, so prepare_data() and update_data() run their real SQL offline.
+"""
+import contextlib
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS question (
+    id INTEGER PRIMARY KEY,
+    content TEXT NOT NULL,
+    created_at TEXT,
+    title TEXT,
+    status_approval INTEGER DEFAULT 1,
+    role_ask_id INTEGER DEFAULT 1,
+    user_id INTEGER DEFAULT 1,
+    status_delete INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS answer (
+    id INTEGER PRIMARY KEY,
+    content TEXT NOT NULL,
+    created_at TEXT,
+    question_id INTEGER NOT NULL,
+    status_answer INTEGER DEFAULT 1,
+    status_approval INTEGER DEFAULT 1,
+    title TEXT,
+    role_consultant_id INTEGER DEFAULT 1,
+    user_id INTEGER DEFAULT 1
+);
+"""
+
+class SqliteMySQL:
+    def __init__(self, path):
+        self.path = str(path)
+        with contextlib.closing(sqlite3.connect(self.path)) as conn:
+            conn.executescript(SCHEMA)
+
+    def connect(self):
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def add_rows(self, rows):
+        """
+        Insert {"question", "answer", "question_id", "answer_id"} rows as question/answer pairs
+        """
+        with contextlib.closing(self.connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO question (id, content, created_at, title) VALUES (?, ?, datetime('now'), ?)",
+                [(row["question_id"], row["question"], row["question"][:50]) for row in rows]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO answer (id, content, created_at, question_id, title) VALUES (?, ?, datetime('now'), ?, ?)",
+                [(row["answer_id"], row["answer"], row["question_id"], row["question"][:50]) for row in rows]
+            )
+
+def install_sqlite_mysql(path, rows=()):
+    from models.managers import mysql
+
+    database = SqliteMySQL(path)
+    if rows:
+        database.add_rows(rows)
+
+    @contextlib.contextmanager
+    def get_connection():
+        conn = database.connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    query_new_rows = mysql.get_query_new_rows().replace("%s", "?")
+    mysql.get_connection = get_connection
+    mysql.get_query_new_rows = lambda: query_new_rows
+    return database
@@ -0,0 +1,195 @@
+"""
+Offline end-to-end benchmark suite: fake Gemini chat/embedding models, a SQLite stand-in for MySQL and synthetic
+Vietnamese corpora. Measures index build times and throughput / p50 / p99 of /chat, /recommend and
+/recommend-answers, writes the results as JSON and optionally compares them with an earlier run.
+
+Usage: python benchmarks/run_suite.py [--qa-rows 5000] [--pages 80] [--requests 300] [--concurrency 8]
+                                      [--latency 0.05] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCHMARK_DIR.parent
+RESULTS_DIR = BENCHMARK_DIR / "results"
+
+def prepare_workdir():
+    """
+    Run in a scratch directory so the FAISS index, recommender artifacts and SQLite caches of the repo are left alone
+    """
+    workdir = Path(tempfile.mkdtemp(prefix="chatbot-bench-"))
+    data_dir = workdir / "data"
+    data_dir.mkdir()
+    stopwords = ROOT_DIR / "data" / "vietnamese-stopwords.txt"
+    if stopwords.exists():
+        shutil.copy(stopwords, data_dir / stopwords.name)
+    os.environ["DATA_DIR"] = str(data_dir)
+    os.chdir(workdir)
+    return workdir
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def timed_call(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def run_requests(flask_app, path, texts, concurrency):
+    local = threading.local()
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def send(text):
+        nonlocal errors
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = flask_app.test_client()
+        start = time.perf_counter()
+        response = client.get(path, query_string={"text": text})
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, texts))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(texts),
+        "errors": errors,
+        "throughput_rps": round(len(texts) / elapsed, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 0.90) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+def chat_workload(count, seed=5):
+    """
+    60% fresh questions, 25% repeats of earlier ones (exact cache hits), 15% small talk
+    """
+    from corpus import user_questions, small_talk
+    rng = random.Random(seed)
+    fresh = user_questions(int(count * 0.6), seed=seed)
+    repeats = [rng.choice(fresh) for _ in range(int(count * 0.25))]
+    chatter = small_talk(count - len(fresh) - len(repeats), seed=seed)
+    workload = fresh + repeats + chatter
+    rng.shuffle(workload)
+    return workload
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except Exception:
+        return None
+
+def flatten(results):
+    metrics = {f"index_build.{name}": value for name, value in results["index_build"].items()}
+    for endpoint, stats in results["endpoints"].items():
+        for name in ("throughput_rps", "p50_ms", "p99_ms"):
+            metrics[f"{endpoint}.{name}"] = stats[name]
+    return metrics
+
+def compare(baseline, current):
+    old_metrics, new_metrics = flatten(baseline), flatten(current)
+    print(f"\n{'metric':<40} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, new_value in new_metrics.items():
+        old_value = old_metrics.get(name)
+        if old_value is None:
+            print(f"{name:<40} {'-':>12} {new_value:>12} {'':>9}")
+            continue
+        change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+        print(f"{name:<40} {old_value:>12} {new_value:>12} {change:>+8.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--qa-rows", type=int, default=5000)
+    parser.add_argument("--pages", type=int, default=80)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model latency in seconds")
+    parser.add_argument("--embed-latency", type=float, default=0.0)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None, help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    output = (args.output or RESULTS_DIR / f"suite-{time.strftime('%Y%m%d-%H%M%S')}.json").resolve()
+    baseline = json.loads(args.compare.resolve().read_text()) if args.compare else None
+    workdir = prepare_workdir()
+    sys.path.insert(0, str(BENCHMARK_DIR))
+
+    import common  # noqa: F401
+    from corpus import qa_rows, handbook_pages, user_questions
+    from fakes import FakeBackendSettings, install_fake_backend
+    from mysql_standin import install_sqlite_mysql
+
+    install_fake_backend(latency=args.latency, embed_latency=args.embed_latency)
+    install_sqlite_mysql(workdir / "mysql.sqlite3", qa_rows(args.qa_rows))
+
+    import app as application
+    from models.managers.mysql import prepare_data
+    from models.processors.text_splitter import get_text_chunks
+    from models.storages.vector_database import get_vector_database, load_vector_database
+
+    index_build = {}
+    (df, _, tfidf_matrix), index_build["tfidf_seconds"] = timed_call(prepare_data)
+    chunks = get_text_chunks(handbook_pages(args.pages))
+    _, index_build["faiss_seconds"] = timed_call(get_vector_database, chunks)
+    _, index_build["faiss_load_seconds"] = timed_call(load_vector_database)
+    _, index_build["initialize_app_seconds"] = timed_call(application.initialize_app)
+    index_build = {name: round(value, 4) for name, value in index_build.items()}
+
+    flask_app = application.app
+    endpoints = {
+        "/chat": run_requests(flask_app, "/chat", chat_workload(args.requests), args.concurrency),
+        "/recommend": run_requests(flask_app, "/recommend", user_questions(args.requests, seed=13), args.concurrency),
+        "/recommend-answers": run_requests(
+            flask_app, "/recommend-answers", user_questions(max(args.requests // 4, 1), seed=17), args.concurrency
+        ),
+    }
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "args": {name: str(value) if isinstance(value, Path) else value for name, value in vars(args).items()},
+            "qa_rows": len(df),
+            "tfidf_shape": list(tfidf_matrix.shape) if tfidf_matrix is not None else None,
+            "pdf_chunks": len(chunks),
+            "model_calls": dict(FakeBackendSettings.calls),
+        },
+        "index_build": index_build,
+        "endpoints": endpoints,
+    }
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps({"index_build": index_build, "endpoints": endpoints}, indent=2))
+    print(f"\nResults written to {output}")
+    if baseline:
+        compare(baseline, results)
+
+if __name__ == "__main__":
+    main()
@@ -18,10 +18,10 @@ EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP"))
 PDF_FILE = os.getenv("PDF_FILE") 
+# Chunks record the file name only, so RAG filters on this rather than on PDF_FILE, which may be an absolute path
+PDF_SOURCE = os.path.basename(PDF_FILE) if PDF_FILE else None
 CURRENT_DIR = Path(__file__).parent.absolute()
 DATA_DIR = CURRENT_DIR / os.getenv("DATA_DIR")
-TFIDF_MATRIX_FILE = os.getenv("TFIDF_MATRIX_FILE")
-VECTORIZER_FILE = os.getenv("VECTORIZER_FILE")
 STOPWORDS_FILE = os.getenv("STOPWORDS_FILE")
 MYSQL_HOST = os.getenv("MYSQL_HOST")
 MYSQL_PORT = os.getenv("MYSQL_PORT")
@@ -29,4 +29,70 @@ MYSQL_USER = os.getenv("MYSQL_USER")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
 MYSQL_DATABASE = os.getenv("MYSQL_DATABASE")
 LOCAL_URL = os.getenv("LOCAL_URL")
-PRODUCTION_URL = os.getenv("PRODUCTION_URL")
\ No newline at end of file
+PRODUCTION_URL = os.getenv("PRODUCTION_URL")
+MYSQL_CONTEXT_TOP_N = int(os.getenv("MYSQL_CONTEXT_TOP_N", "20"))
+MYSQL_CONTEXT_MIN_SCORE = float(os.getenv("MYSQL_CONTEXT_MIN_SCORE", "0.1"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "86400"))
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", str(DATA_DIR / "answer_cache.sqlite3"))
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.75"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000"))
+RECOMMEND_CHECK_CONCURRENCY = int(os.getenv("RECOMMEND_CHECK_CONCURRENCY", "5"))
+RECOMMEND_CHECK_TIMEOUT = float(os.getenv("RECOMMEND_CHECK_TIMEOUT", "10"))
+HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+RRF_K = int(os.getenv("RRF_K", "60"))
+TFIDF_DRIFT_THRESHOLD = float(os.getenv("TFIDF_DRIFT_THRESHOLD", "0.35"))
+RECOMMEND_REFRESH_INTERVAL = float(os.getenv("RECOMMEND_REFRESH_INTERVAL", "300"))
+TOKEN_CACHE_PATH = os.getenv("TOKEN_CACHE_PATH", str(DATA_DIR / "token_cache.sqlite3"))
+TOKENIZE_PROCESSES = int(os.getenv("TOKENIZE_PROCESSES", "0")) or os.cpu_count() or 1
+TOKENIZE_PARALLEL_MIN_ROWS = int(os.getenv("TOKENIZE_PARALLEL_MIN_ROWS", "2000"))
+TOKENIZE_QUERY_CACHE_SIZE = int(os.getenv("TOKENIZE_QUERY_CACHE_SIZE", "4096"))
+RECOMMEND_ANN_ENABLED = os.getenv("RECOMMEND_ANN_ENABLED", "false").lower() == "true"
+RECOMMEND_ANN_MIN_ROWS = int(os.getenv("RECOMMEND_ANN_MIN_ROWS", "100000"))
+RECOMMEND_ANN_TYPE = os.getenv("RECOMMEND_ANN_TYPE", "hnsw")
+RECOMMEND_ANN_DIM = int(os.getenv("RECOMMEND_ANN_DIM", "128"))
+RECOMMEND_ANN_HNSW_M = int(os.getenv("RECOMMEND_ANN_HNSW_M", "32"))
+RECOMMEND_ANN_EF_SEARCH = int(os.getenv("RECOMMEND_ANN_EF_SEARCH", "128"))
+RECOMMEND_ANN_NLIST = int(os.getenv("RECOMMEND_ANN_NLIST", "1024"))
+RECOMMEND_ANN_NPROBE = int(os.getenv("RECOMMEND_ANN_NPROBE", "16"))
+RECOMMEND_ANN_CANDIDATES = int(os.getenv("RECOMMEND_ANN_CANDIDATES", "100"))
+# Base name of the ANN index files inside each recommender artifact generation directory
+RECOMMEND_ANN_FILE = os.getenv("RECOMMEND_ANN_FILE", "recommend_ann")
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT") or None
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT") or None
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+ASYNC_STAGE_THREADS = int(os.getenv("ASYNC_STAGE_THREADS", "32"))
+# Speculative RAG starts the PDF-RAG call alongside the MySQL one. A MySQL hit abandons it, but a RAG call already
+# talking to Gemini cannot be interrupted, so every MySQL-answered question can still cost one extra RAG request of
+# quota. Off by default; enable only when the latency matters more than the quota.
+QUERY_SPECULATIVE = os.getenv("QUERY_SPECULATIVE", "false").lower() == "true"
+QUERY_SPECULATIVE_THREADS = int(os.getenv("QUERY_SPECULATIVE_THREADS", "16"))
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "30"))
+SINGLE_FLIGHT_LEASE_TTL = float(os.getenv("SINGLE_FLIGHT_LEASE_TTL", "60"))
+SINGLE_FLIGHT_POLL_INTERVAL = float(os.getenv("SINGLE_FLIGHT_POLL_INTERVAL", "0.05"))
+METRICS_BUCKETS = [float(bound) for bound in os.getenv("METRICS_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30").split(",")]
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_REQUESTS_PER_MINUTE = float(os.getenv("EMBED_REQUESTS_PER_MINUTE", "1500"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+EMBED_RETRY_BASE_DELAY = float(os.getenv("EMBED_RETRY_BASE_DELAY", "1"))
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", str(DATA_DIR / "embedding_cache"))
+PDF_DIR = os.getenv("PDF_DIR", "data-chatbot")
+PDF_EXTRACT_PROCESSES = int(os.getenv("PDF_EXTRACT_PROCESSES", "0")) or os.cpu_count() or 1
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+VECTOR_INDEX_MMAP = os.getenv("VECTOR_INDEX_MMAP", "true").lower() == "true"
+VECTOR_INDEX_QUANTIZATION = os.getenv("VECTOR_INDEX_QUANTIZATION", "none").lower()
+VECTOR_INDEX_PQ_M = int(os.getenv("VECTOR_INDEX_PQ_M", "64"))
+WORKER_WARMUP = os.getenv("WORKER_WARMUP", "true").lower() == "true"
+RECOMMEND_ARTIFACT_DIR = os.getenv("RECOMMEND_ARTIFACT_DIR", "recommend_artifacts")
+RECOMMEND_ARTIFACT_KEEP = int(os.getenv("RECOMMEND_ARTIFACT_KEEP", "2"))
+INDEX_REFRESH_ENABLED = os.getenv("INDEX_REFRESH_ENABLED", "true").lower() == "true"
+INDEX_REFRESH_INTERVAL = float(os.getenv("INDEX_REFRESH_INTERVAL", str(RECOMMEND_REFRESH_INTERVAL)))
+# Build lock files live here; every worker sharing the index must see the same directory
+INDEX_REFRESH_LOCK_DIR = os.getenv("INDEX_REFRESH_LOCK_DIR", str(DATA_DIR))
+INDEX_REFRESH_PDFS = os.getenv("INDEX_REFRESH_PDFS", "true").lower() == "true"
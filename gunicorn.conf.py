@@ -0,0 +1,24 @@
+"""
+Gunicorn settings, picked up automatically from the working directory:
+
+    gunicorn --bind 0.0.0.0:$PORT --worker-class uvicorn.workers.UvicornWorker asgi:application
+
+This is how the Docker image runs: /chat and /chat/stream go through the async pipeline in asgi.py, everything
+else through the Flask app. Plain sync workers still work with `gunicorn --bind 0.0.0.0:$PORT app:app`.
+
+Each worker loads the vector index and recommender data as soon as it boots, so the first /chat request does not
+pay for it. The FAISS index is memory-mapped (VECTOR_INDEX_MMAP), so workers share its pages.
+"""
+
+def post_worker_init(worker):
+    from config import WORKER_WARMUP
+    if not WORKER_WARMUP:
+        return
+    if type(worker).__module__.startswith("uvicorn"):
+        # asgi.py warms the worker up in its lifespan startup
+        return
+    try:
+        from app import warm_up_worker
+        warm_up_worker()
+    except Exception as e:
+        worker.log.warning(f"Worker warm-up failed: {str(e)}")
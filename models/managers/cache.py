@@ -1,21 +1,122 @@
 import hashlib
+import threading
 import time
+from collections import OrderedDict
+from config import CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_TTL, CACHE_BACKEND
+from models.storages.sqlite_cache import SqliteQueryCache
 
-cache = []
+class QueryCache:
+    """
+    Bounded LRU cache with per-entry TTL, limited by entry count and by total size in bytes
+    """
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry["expires_at"] is not None and entry["expires_at"] <= time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, entry, ttl=None):
+        with self._lock:
+            self._insert(key, entry, ttl)
+
+    def set_if_absent(self, key, entry, ttl=None):
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None and (existing["expires_at"] is None or existing["expires_at"] > time.time()):
+                return False
+            return self._insert(key, entry, ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _insert(self, key, entry, ttl):
+        ttl = self.ttl if ttl is None else ttl
+        entry["expires_at"] = time.time() + ttl if ttl and ttl > 0 else None
+        entry["size"] = entry_size(entry)
+        if key in self._entries:
+            self._remove(key)
+        if entry["size"] > self.max_bytes:
+            return False
+        self._entries[key] = entry
+        self.size_bytes += entry["size"]
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+        return True
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.size_bytes -= entry["size"]
+
+def entry_size(entry):
+    return len(entry["query"].encode()) + len(str(entry["result"]).encode())
+
+def cache_key(query):
+    return hashlib.md5(query.lower().strip().encode()).hexdigest()
+
+def create_cache(backend=CACHE_BACKEND):
+    if backend == "sqlite":
+        return SqliteQueryCache()
+    return QueryCache()
+
+cache = create_cache()
 
 def get_cache(query):
-    key = hashlib.md5(query.lower().strip().encode()).hexdigest()
-    for entry in cache:
-        if entry["key"] == key:
-            return entry["result"], True, entry.get("processing_time", 0)
-    return None, False, 0
-
-def set_cache(query, result, processing_time):
-    key = hashlib.md5(query.lower().strip().encode()).hexdigest()
-    cache.insert(0, {
-        "key": key,
+    entry = cache.get(cache_key(query))
+    if entry is None:
+        return None, False, 0
+    return entry["result"], True, entry.get("processing_time", 0)
+
+def set_cache(query, result, processing_time, ttl=None):
+    cache.set(cache_key(query), {
         "query": query,
         "result": result,
         "timestamp": time.time(),
         "processing_time": processing_time
-    })
\ No newline at end of file
+    }, ttl)
+
+def add_cache(query, result, processing_time, ttl=None):
+    return cache.set_if_absent(cache_key(query), {
+        "query": query,
+        "result": result,
+        "timestamp": time.time(),
+        "processing_time": processing_time
+    }, ttl)
+
+def get_cache_stats():
+    return cache.stats()
@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+from config import INDEX_REFRESH_ENABLED, INDEX_REFRESH_INTERVAL, INDEX_REFRESH_LOCK_DIR, INDEX_REFRESH_PDFS
+from models.managers.metrics import stage_timer
+from models.managers.mysql import load_or_prepare_data, update_data
+from models.managers.pdf import pdfs_changed, process_directory_pdfs
+from models.processors import query_processor
+from models.processors.similar_questions import publish_recommend_data
+from models.storages.file_lock import file_lock
+from models.storages.recommend_store import current_generation, load_recommend_artifacts
+from models.storages.vector_database import load_vector_database, vector_index_version
+
+class IndexRefresher:
+    """
+    Background thread that rebuilds the recommender data and the FAISS index off the request path and swaps them in.
+    One worker at a time holds the build lock (a flock on a file in lock_dir, whatever the answer cache backend is)
+    and goes to MySQL or the PDFs; the other workers pick up the artifacts and index it saved instead of building
+    their own.
+    """
+    def __init__(self, interval=INDEX_REFRESH_INTERVAL, lock_dir=INDEX_REFRESH_LOCK_DIR, refresh_pdfs=INDEX_REFRESH_PDFS):
+        self.interval = interval
+        self.lock_dir = lock_dir
+        self.refresh_pdfs = refresh_pdfs
+        self.config = None
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.runs = 0
+        self.errors = 0
+        self.lease_skips = 0
+        self.recommend_swaps = 0
+        self.recommend_build_seconds = 0.0
+        self.recommend_swapped_at = 0.0
+        self.vector_swaps = 0
+        self.vector_build_seconds = 0.0
+        self.vector_swapped_at = 0.0
+
+    def start(self, config):
+        """
+        Start the thread in this process; after a fork the child starts its own
+        """
+        with self._lock:
+            self.config = config
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return False
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="index-refresher", daemon=True)
+            self._thread.start()
+            return True
+
+    def trigger(self):
+        """
+        Run a refresh now instead of at the next interval
+        """
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.refresh()
+
+    def refresh(self):
+        with self._refresh_lock:
+            for step in (self.refresh_recommender, self.refresh_vector_database):
+                try:
+                    step()
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Index refresh failed in {step.__name__}: {str(e)}")
+            self.runs += 1
+
+    def _leased(self, name, build):
+        """
+        build() under the cross-worker build lock of name; None without running it while another worker holds it.
+        The kernel drops the lock with the process, so a crashed build never leaves it held.
+        """
+        with file_lock(os.path.join(self.lock_dir, f"index_refresh_{name}.lock"), blocking=False) as acquired:
+            if not acquired:
+                self.lease_skips += 1
+                return None
+            return build()
+
+    def refresh_recommender(self):
+        snapshot = self.config.get('recommend_snapshot')
+        start_time = time.perf_counter()
+        with stage_timer("refresh_recommend"):
+            if snapshot is None or not snapshot.ready:
+                data = load_or_prepare_data()
+            else:
+                data = self._leased(
+                    "recommend",
+                    lambda: update_data(snapshot.qa_store, snapshot.vectorizer, snapshot.tfidf_matrix)
+                )
+                if data is None or data[2] is snapshot.tfidf_matrix:
+                    # Nothing built here; another worker may have saved a newer generation
+                    generation = current_generation()
+                    data = None
+                    if generation is not None and generation != snapshot.qa_store.attrs.get('artifact_generation'):
+                        data = load_recommend_artifacts()
+            if data is None or data[1] is None or data[2] is None:
+                return None
+            snapshot = publish_recommend_data(self.config, *data)
+        self.recommend_build_seconds = time.perf_counter() - start_time
+        self.recommend_swapped_at = time.time()
+        self.recommend_swaps += 1
+        print(
+            f"Recommender generation {snapshot.generation} swapped in: {len(snapshot.qa_store)} rows, "
+            f"artifacts {snapshot.qa_store.attrs.get('artifact_generation')}, "
+            f"built in {self.recommend_build_seconds:.2f}s"
+        )
+        return snapshot
+
+    def refresh_vector_database(self):
+        start_time = time.perf_counter()
+        with stage_timer("refresh_vector"):
+            if self.refresh_pdfs and pdfs_changed():
+                self._leased("vector", lambda: process_directory_pdfs(force_reprocess=True))
+            version = vector_index_version()
+            if version is None or version == query_processor.vector_database_version:
+                return None
+            new_vector_database = load_vector_database()[0]
+            if new_vector_database is None:
+                return None
+            generation = query_processor.swap_vector_database(new_vector_database, version)
+        self.vector_build_seconds = time.perf_counter() - start_time
+        self.vector_swapped_at = time.time()
+        self.vector_swaps += 1
+        print(
+            f"Vector index generation {generation} swapped in: {new_vector_database.index.ntotal} vectors, "
+            f"built in {self.vector_build_seconds:.2f}s"
+        )
+        return new_vector_database
+
+    def stats(self):
+        snapshot = self.config.get('recommend_snapshot') if self.config is not None else None
+        return {
+            "running": int(self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()),
+            "runs": self.runs,
+            "errors": self.errors,
+            "lease_skips": self.lease_skips,
+            "recommend_generation": snapshot.generation if snapshot is not None else 0,
+            "recommend_rows": len(snapshot.qa_store) if snapshot is not None else 0,
+            "recommend_swaps": self.recommend_swaps,
+            "recommend_build_seconds": round(self.recommend_build_seconds, 3),
+            "recommend_swapped_at": self.recommend_swapped_at,
+            "vector_generation": query_processor.vector_database_generation,
+            "vector_swaps": self.vector_swaps,
+            "vector_build_seconds": round(self.vector_build_seconds, 3),
+            "vector_swapped_at": self.vector_swapped_at,
+        }
+
+index_refresher = IndexRefresher()
+
+def start_index_refresher(config):
+    if not INDEX_REFRESH_ENABLED:
+        return False
+    return index_refresher.start(config)
+
+def trigger_index_refresh():
+    index_refresher.trigger()
+
+def get_index_refresher_stats():
+    return index_refresher.stats()
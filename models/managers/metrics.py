@@ -0,0 +1,124 @@
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+from config import METRICS_BUCKETS
+
+METRIC_PREFIX = "chatbot"
+
+class StageMetrics:
+    """
+    Per-stage latency histograms and error counters of this worker, rendered in the Prometheus text format
+    """
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, error=False):
+        with self._lock:
+            data = self._stages.get(stage)
+            if data is None:
+                data = self._stages[stage] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0, "errors": 0}
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    data["buckets"][i] += 1
+            data["sum"] += seconds
+            data["count"] += 1
+            if error:
+                data["errors"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {stage: {**data, "buckets": list(data["buckets"])} for stage, data in self._stages.items()}
+
+    def clear(self):
+        with self._lock:
+            self._stages.clear()
+
+stage_metrics = StageMetrics()
+
+# Per-request breakdown, only collected while a request asked for it (see request_timing)
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+@contextlib.contextmanager
+def stage_timer(stage):
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_metrics.observe(stage, elapsed, error)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+def timed_stage(stage):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextlib.contextmanager
+def request_timing(enabled=True):
+    """
+    Collect a stage -> seconds breakdown for the current request; stages run on worker threads through a copied
+    context share the same dict
+    """
+    if not enabled:
+        yield None
+        return
+    timings = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+def timing_breakdown(timings):
+    return {stage: round(seconds, 4) for stage, seconds in timings.items()}
+
+def _format_labels(labels):
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render_prometheus(gauges=None):
+    """
+    Text exposition of the stage histograms plus gauges given as {name: (help, {label_tuple: value})}
+    """
+    histogram = f"{METRIC_PREFIX}_stage_duration_seconds"
+    errors = f"{METRIC_PREFIX}_stage_errors_total"
+    lines = [
+        f"# HELP {histogram} Time spent in each request-processing stage.",
+        f"# TYPE {histogram} histogram",
+    ]
+    snapshot = stage_metrics.snapshot()
+    for stage, data in sorted(snapshot.items()):
+        for bound, count in zip(stage_metrics.buckets, data["buckets"]):
+            lines.append(f'{histogram}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+        lines.append(f'{histogram}_bucket{{stage="{stage}",le="+Inf"}} {data["count"]}')
+        lines.append(f'{histogram}_sum{{stage="{stage}"}} {data["sum"]!r}')
+        lines.append(f'{histogram}_count{{stage="{stage}"}} {data["count"]}')
+    lines.append(f"# HELP {errors} Stage executions that raised an exception.")
+    lines.append(f"# TYPE {errors} counter")
+    for stage, data in sorted(snapshot.items()):
+        lines.append(f'{errors}{{stage="{stage}"}} {data["errors"]}')
+
+    for name, (help_text, samples) in (gauges or {}).items():
+        metric = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        for labels, value in samples.items():
+            label_text = _format_labels(dict(labels))
+            lines.append(f"{metric}{{{label_text}}} {_format_value(value)}" if label_text else f"{metric} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
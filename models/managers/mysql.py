@@ -10,12 +10,17 @@ import os
 import pickle
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from config import TFIDF_MATRIX_FILE, VECTORIZER_FILE, DATA_DIR
+from config import DATA_DIR, TFIDF_DRIFT_THRESHOLD
 import re
-from pyvi import ViTokenizer
-import joblib
+import numpy as np
+from scipy import sparse
 from pathlib import Path
 from config import CURRENT_DIR, STOPWORDS_FILE
+from models.processors.llm_clients import get_generative_model, get_generation_config
+from models.processors.vietnamese_tokenizer import tokenize_vietnamese, tokenize_batch
+from models.managers.metrics import timed_stage
+from models.storages.recommend_store import save_recommend_artifacts, load_recommend_artifacts
+from models.storages.qa_store import QAStore
 try:
     connection_pool = pooling.MySQLConnectionPool(
         pool_name="mypool",
@@ -64,6 +69,47 @@ def get_query_answers():
     FROM answer a
     """
 
+def get_query_new_rows():
+    return """
+    SELECT q.id AS question_id, q.content AS question, a.id AS answer_id, a.content AS answer
+    FROM question q
+    JOIN answer a ON a.question_id = q.id
+    WHERE q.status_delete = 0 AND (a.id > %s OR q.id > %s)
+    ORDER BY q.id, a.id
+    """
+
+def get_query_watermark():
+    return """
+    SELECT MAX(q.id) AS question_id, MAX(a.id) AS answer_id, COUNT(*) AS row_count
+    FROM question q
+    JOIN answer a ON a.question_id = q.id
+    WHERE q.status_delete = 0
+    """
+
+def fetch_mysql_watermark():
+    """
+    Max question/answer ids and row count of the Q&A join, read in one statement; None when MySQL is unreachable
+    """
+    with get_connection() as connection:
+        if not connection:
+            return None
+
+        try:
+            cursor = connection.cursor()
+            cursor.execute(get_query_watermark())
+            question_id, answer_id, row_count = cursor.fetchone()
+            cursor.close()
+            return {
+                'question_id': int(question_id or 0),
+                'answer_id': int(answer_id or 0),
+                'row_count': int(row_count or 0)
+            }
+        except Error:
+            return None
+        except Exception:
+            return None
+
+@timed_stage("fetch_data_from_mysql")
 def fetch_data_from_mysql():
     with get_connection() as connection:
         if not connection:
@@ -114,14 +160,57 @@ def fetch_data_from_mysql():
         except Exception:
             return pd.DataFrame()
 
+def fetch_new_rows_from_mysql(watermark):
+    """
+    Question/answer rows added after the given id watermark
+    """
+    with get_connection() as connection:
+        if not connection:
+            return pd.DataFrame()
+
+        try:
+            new_df = pd.read_sql(
+                get_query_new_rows(),
+                connection,
+                params=(watermark['answer_id'], watermark['question_id'])
+            )
+            new_df['source'] = 'mysql'
+            return new_df
+        except Error:
+            return pd.DataFrame()
+        except Exception:
+            return pd.DataFrame()
+
+def get_watermark(df):
+    if df.empty or 'question_id' not in df.columns or 'answer_id' not in df.columns:
+        return None
+    return {
+        'question_id': int(df['question_id'].max()),
+        'answer_id': int(df['answer_id'].max())
+    }
+
+def tokenized_contents(questions, answers):
+    """
+    TF-IDF input for each row: the tokenized question and answer. Only needed while fitting or transforming,
+    so it is returned as a list and never kept next to the rows.
+    """
+    return [
+        f"{question} {answer}"
+        for question, answer in zip(tokenize_batch(list(questions)), tokenize_batch(list(answers)))
+    ]
+
+@timed_stage("prepare_data")
 def prepare_data():
     try:
+        # Read before the rows, so rows added in between are fetched again rather than missed
+        mysql_watermark = fetch_mysql_watermark()
         mysql_df = fetch_data_from_mysql()
         
         if mysql_df.empty:
-            return mysql_df, None, None
+            return QAStore(), None, None
         
         df = mysql_df
+        watermark = mysql_watermark or get_watermark(df)
         
         if df.empty:
             df = pd.DataFrame(columns=['question', 'answer', 'source'])
@@ -129,31 +218,108 @@ def prepare_data():
         df['question'] = df['question'].astype(str).fillna('')
         df['answer'] = df['answer'].astype(str).fillna('')
         df = df.drop_duplicates(subset=['question'], keep='last').reset_index(drop=True)
-        
-        df['question_tokenized'] = df['question'].apply(tokenize_vietnamese)
-        df['answer_tokenized'] = df['answer'].apply(tokenize_vietnamese)
-        df['content'] = df['question_tokenized'] + ' ' + df['answer_tokenized']
+        contents = tokenized_contents(df['question'], df['answer'])
         
         vietnamese_stopwords = load_stopwords()
-        vectorizer, tfidf_matrix = create_tfidf_model(df, vietnamese_stopwords)
+        vectorizer, tfidf_matrix = create_tfidf_model(contents, vietnamese_stopwords)
+        qa_store = QAStore.from_frame(df)
+        qa_store.attrs['watermark'] = watermark
+        save_recommend_data(qa_store, vectorizer, tfidf_matrix)
         
-        return df, vectorizer, tfidf_matrix
+        return qa_store, vectorizer, tfidf_matrix
     except Exception as e:
-        return pd.DataFrame(columns=['question', 'answer', 'source']), None, None
+        return QAStore(), None, None
+
+def load_or_prepare_data():
+    """
+    Start from the saved recommender artifacts and only go to MySQL for what changed since their watermark;
+    a full prepare_data() when there are none
+    """
+    artifacts = load_recommend_artifacts()
+    if artifacts is None:
+        return prepare_data()
+    return update_data(*artifacts)
+
+def is_append_only(watermark, mysql_watermark, new_rows):
+    """
+    True when the only change since watermark is new_rows being added: anything deleted or hidden in between
+    shows up as a row count that does not add up
+    """
+    if 'row_count' not in watermark or 'row_count' not in mysql_watermark:
+        return True
+    return mysql_watermark['row_count'] - watermark['row_count'] == new_rows
 
+@timed_stage("update_data")
+def update_data(qa_store, vectorizer, tfidf_matrix):
+    """
+    Bring qa_store up to date with MySQL. Nothing is fetched when the MySQL watermark has not moved; when rows were only
+    added, just those are tokenized and transformed with the fitted vocabulary. Falls back to a full prepare_data()
+    when there is no watermark, rows were deleted or hidden, or the vocabulary has drifted.
+    """
+    watermark = qa_store.attrs.get('watermark')
+    if watermark is None or vectorizer is None or tfidf_matrix is None:
+        return prepare_data()
 
-def tokenize_vietnamese(text):
-    if not isinstance(text, str) or not text.strip():
-        return ""
-    text = text.lower()
-    text = re.sub(r'[^\w\s]', '', text)
     try:
-        tokenized = " ".join(ViTokenizer.tokenize(text).split())
-        return tokenized
-    except Exception:
-        return text
+        mysql_watermark = fetch_mysql_watermark()
+        if mysql_watermark is not None and all(mysql_watermark[key] == value for key, value in watermark.items()):
+            return qa_store, vectorizer, tfidf_matrix
+
+        new_df = fetch_new_rows_from_mysql(watermark)
+        if mysql_watermark is not None and not is_append_only(watermark, mysql_watermark, len(new_df)):
+            return prepare_data()
+        if new_df.empty:
+            return qa_store, vectorizer, tfidf_matrix
+
+        new_watermark = mysql_watermark or {
+            'question_id': max(watermark['question_id'], int(new_df['question_id'].max())),
+            'answer_id': max(watermark['answer_id'], int(new_df['answer_id'].max()))
+        }
+
+        new_df['question'] = new_df['question'].astype(str).fillna('')
+        new_df['answer'] = new_df['answer'].astype(str).fillna('')
+        new_df = new_df.drop_duplicates(subset=['question'], keep='last').reset_index(drop=True)
+        new_contents = tokenized_contents(new_df['question'], new_df['answer'])
+
+        new_questions = set(new_df['question'])
+        kept_rows = np.array(
+            [row for row, question in enumerate(qa_store.questions()) if question not in new_questions],
+            dtype=np.int64
+        )
+        merged_store = QAStore.concat([qa_store.take(kept_rows), QAStore.from_frame(new_df)])
+
+        if vocabulary_drift(vectorizer, new_contents) > TFIDF_DRIFT_THRESHOLD:
+            # Tokenized text is not kept for the existing rows; the token cache makes redoing it cheap
+            contents = tokenized_contents(merged_store.questions(), merged_store.answers())
+            vectorizer, merged_matrix = create_tfidf_model(contents, load_stopwords())
+        else:
+            merged_matrix = sparse.vstack([
+                tfidf_matrix[kept_rows],
+                vectorizer.transform(new_contents)
+            ]).tocsr()
+
+        merged_store.attrs['watermark'] = new_watermark
+        save_recommend_data(merged_store, vectorizer, merged_matrix)
+        return merged_store, vectorizer, merged_matrix
+    except Exception as e:
+        return qa_store, vectorizer, tfidf_matrix
+
+def vocabulary_drift(vectorizer, contents):
+    """
+    Share of the n-grams in contents that the fitted vocabulary does not know
+    """
+    analyzer = vectorizer.build_analyzer()
+    total = 0
+    unknown = 0
+    for content in contents:
+        for feature in analyzer(content):
+            total += 1
+            if feature not in vectorizer.vocabulary_:
+                unknown += 1
+    return unknown / total if total else 0.0
 
-def create_tfidf_model(df, stopwords):
+
+def create_tfidf_model(contents, stopwords):
     try:
         vectorizer = TfidfVectorizer(
             min_df=2,
@@ -164,20 +330,22 @@ def create_tfidf_model(df, stopwords):
             ngram_range=(1, 2),
             stop_words=stopwords
         )
-        content = df['content'] if len(df) > 0 else ["fallback content"]
+        content = contents if len(contents) > 0 else ["fallback content"]
         tfidf_matrix = vectorizer.fit_transform(content)
-        
-        try:
-            tfidf_path = get_data_path(TFIDF_MATRIX_FILE)
-            vectorizer_path = get_data_path(VECTORIZER_FILE)
-            joblib.dump(tfidf_matrix, tfidf_path)
-            joblib.dump(vectorizer, vectorizer_path)
-        except Exception as e:
-            print(f"Error saving TF-IDF model: {str(e)}")
         return vectorizer, tfidf_matrix
     except Exception as e:
         return None, None
 
+def save_recommend_data(qa_store, vectorizer, tfidf_matrix):
+    if vectorizer is None or tfidf_matrix is None or qa_store.empty:
+        return
+    try:
+        qa_store.attrs['artifact_generation'] = save_recommend_artifacts(
+            qa_store, vectorizer, tfidf_matrix, qa_store.attrs.get('watermark')
+        )
+    except Exception as e:
+        print(f"Error saving recommender artifacts: {str(e)}")
+
 def load_stopwords():
     try:
         stopwords_path = get_data_path(STOPWORDS_FILE)
@@ -216,15 +384,9 @@ def personalize_answer(question, original_answer):
     """
     
     try:
-        model = genai.GenerativeModel(GEMINI_MODEL)
-        response = model.generate_content(
+        response = get_generative_model().generate_content(
             prompt,
-            generation_config=genai.GenerationConfig(
-                temperature=0.1,
-                top_p=TOP_P,
-                top_k=TOP_K,
-                max_output_tokens=MAX_OUTPUT_TOKENS,
-            )
+            generation_config=get_generation_config(temperature=0.1)
         )
         return response.text.strip() if hasattr(response, 'text') else original_answer
     except Exception:
@@ -1,64 +1,204 @@
 import os
+import json
 import time
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from PyPDF2 import PdfReader
-from config import PDF_FILE
+from config import PDF_FILE, PDF_DIR, PDF_EXTRACT_PROCESSES, PDF_PAGES_PER_TASK, PDF_PARALLEL_MIN_PAGES
 
-def process_directory_pdfs(force_reprocess=False, get_text_chunks_fn=None, get_vector_database_fn=None):
+MANIFEST_PATH = os.path.join("faiss_index", "ingest_manifest.json")
+FINGERPRINT_PATH = os.path.join("faiss_index", "pdf_fingerprint.json")
+
+def get_pdf_directory():
+    if os.path.isabs(PDF_FILE):
+        return os.path.dirname(PDF_FILE)
+    return PDF_DIR
+
+def list_pdf_files(directory):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(".pdf")
+    )
+
+def extract_page_range(pdf_path, start, end):
+    """
+    Text of pages [start, end) of one PDF; runs in the extraction worker processes
+    """
+    reader = PdfReader(pdf_path)
+    pages = []
+    for i in range(start, end):
+        try:
+            text = reader.pages[i].extract_text() or ""
+        except Exception:
+            text = ""
+        pages.append((i + 1, text))
+    return pages
+
+def iter_pdf_pages(pdf_paths, processes=PDF_EXTRACT_PROCESSES, pages_per_task=PDF_PAGES_PER_TASK):
+    """
+    Yield {"text", "metadata"} for every non-empty page of the given PDFs, in order. Page ranges are extracted in a
+    process pool when there are enough pages, and pages are handed on as soon as their range is done.
+    """
+    tasks = []
+    for pdf_path in pdf_paths:
+        try:
+            total_pages = len(PdfReader(pdf_path).pages)
+        except Exception:
+            continue
+        for start in range(0, total_pages, pages_per_task):
+            tasks.append((pdf_path, total_pages, start, min(start + pages_per_task, total_pages)))
+
+    def to_pages(task, extracted):
+        pdf_path, total_pages, _, _ = task
+        for page, text in extracted:
+            if text.strip():
+                yield {
+                    "text": text,
+                    "metadata": {
+                        "source": os.path.basename(pdf_path),
+                        "page": page,
+                        "total_pages": total_pages
+                    }
+                }
+
+    total = sum(end - start for _, _, start, end in tasks)
+    if processes > 1 and len(tasks) > 1 and total >= PDF_PARALLEL_MIN_PAGES:
+        with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = pool.map(
+                extract_page_range,
+                [task[0] for task in tasks], [task[2] for task in tasks], [task[3] for task in tasks]
+            )
+            for task, extracted in zip(tasks, results):
+                yield from to_pages(task, extracted)
+    else:
+        for task in tasks:
+            yield from to_pages(task, extract_page_range(task[0], task[2], task[3]))
+
+def page_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+def load_manifest(path=MANIFEST_PATH):
     try:
-        if os.path.isabs(PDF_FILE):
-            pdf_path = PDF_FILE
-        else:
-            pdf_path = os.path.join("data-chatbot", PDF_FILE)
-        
-        if not os.path.exists(pdf_path):
-            return f"Không tìm thấy file {pdf_path}.", False
-            
-        if not force_reprocess and os.path.exists("faiss_index") and os.path.exists("faiss_index/index.faiss"):
-            return f"Đã tải {PDF_FILE} từ bộ nhớ cache.", True
-        
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def pdf_fingerprint(pdf_paths):
+    """
+    [name, size, mtime] of each PDF; a file that vanished since it was listed is left out
+    """
+    fingerprint = []
+    for pdf_path in pdf_paths:
+        try:
+            stat = os.stat(pdf_path)
+        except OSError:
+            continue
+        fingerprint.append([os.path.basename(pdf_path), stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+def pdfs_changed():
+    """
+    Whether the PDF directory differs from what was last ingested. Without a record the current files become the
+    baseline, so an index shipped with the app is not rebuilt just because nothing was recorded yet.
+    """
+    fingerprint = pdf_fingerprint(list_pdf_files(get_pdf_directory()))
+    saved = load_manifest(FINGERPRINT_PATH)
+    if not saved:
+        save_manifest(fingerprint, FINGERPRINT_PATH)
+        return False
+    return saved != fingerprint
+
+def page_key(metadata):
+    return f"{metadata['source']}#{metadata['page']}"
+
+def changed_page_chunks(pages, manifest, new_manifest, get_text_chunks_fn):
+    """
+    Yield (doc_id, chunk) for pages whose content hash differs from the manifest, recording every page seen
+    in new_manifest; unchanged pages keep their ids
+    """
+    for page in pages:
+        key = page_key(page["metadata"])
+        digest = page_hash(page["text"])
+        previous = manifest.get(key)
+        if previous and previous["hash"] == digest:
+            new_manifest[key] = previous
+            continue
+        chunks = get_text_chunks_fn([page]) or []
+        ids = [f"{key}#{digest[:8]}#{i}" for i in range(len(chunks))]
+        new_manifest[key] = {"hash": digest, "ids": ids}
+        yield from zip(ids, chunks)
+
+def process_directory_pdfs(force_reprocess=False, get_text_chunks_fn=None, full_rebuild=False):
+    """
+    Ingest every PDF of the PDF directory into the FAISS index. Pages stream from a process pool into batched
+    embedding; with an existing index and manifest only pages whose content changed are re-embedded and the
+    index is updated in place.
+    """
+    from models.storages.vector_database import load_vector_database, build_vector_database, update_vector_database
+    if get_text_chunks_fn is None:
+        from models.processors.text_splitter import get_text_chunks as get_text_chunks_fn
+
+    try:
+        pdf_directory = get_pdf_directory()
+        pdf_paths = list_pdf_files(pdf_directory)
+        if not pdf_paths:
+            return f"Không tìm thấy file PDF nào trong {pdf_directory}.", False
+
+        index_exists = os.path.exists("faiss_index") and os.path.exists("faiss_index/index.faiss")
+        if not force_reprocess and not full_rebuild and index_exists:
+            return f"Đã tải {len(pdf_paths)} file PDF từ bộ nhớ cache.", True
+
         start_time = time.time()
-        text_with_metadata = []
-        
+        manifest = {} if full_rebuild else load_manifest()
+        vector_database = load_vector_database(mmap=False, quantization="none")[0] if manifest and index_exists else None
+        if vector_database is None:
+            manifest = {}
+
+        new_manifest = {}
+        chunk_stream = changed_page_chunks(iter_pdf_pages(pdf_paths), manifest, new_manifest, get_text_chunks_fn)
         try:
-            with open(pdf_path, "rb") as pdf_file:
-                pdf_reader = PdfReader(pdf_file)
-                total_pages = len(pdf_reader.pages)
-                
-                if total_pages == 0:
-                    return "File PDF không có trang nào.", False
-                
-                for i, page in enumerate(pdf_reader.pages):
-                    try:
-                        text = page.extract_text()
-                        if text.strip():
-                            text_with_metadata.append({
-                                "text": text,
-                                "metadata": {
-                                    "source": PDF_FILE,
-                                    "page": i + 1,
-                                    "total_pages": total_pages
-                                }
-                            })
-                    except Exception:
-                        continue
-                        
+            if vector_database is None:
+                vector_database = build_vector_database(chunk_stream)
+            else:
+                # Changed and deleted pages are only known once the page stream is consumed
+                vector_database = update_vector_database(
+                    vector_database,
+                    chunk_stream,
+                    lambda: [
+                        doc_id
+                        for key, entry in manifest.items()
+                        if new_manifest.get(key) is not entry
+                        for doc_id in entry["ids"]
+                    ]
+                )
         except Exception as e:
-            return f"Lỗi khi đọc file PDF: {str(e)}", False
-        
-        if not text_with_metadata:
+            return f"Lỗi khi tạo vector database: {str(e)}", False
+
+        if vector_database is None:
             return "Không thể trích xuất văn bản từ file PDF.", False
-            
-        chunks = get_text_chunks_fn(text_with_metadata)
-        if not chunks:
-            return "Không thể tạo chunks từ văn bản.", False
-            
-        vectorstore = get_vector_database_fn(chunks)
-        
-        if not os.path.exists("faiss_index"):
-            os.makedirs("faiss_index")
-        
+
+        save_manifest(new_manifest)
+        save_manifest(pdf_fingerprint(pdf_paths), FINGERPRINT_PATH)
+        changed = sum(1 for key, entry in new_manifest.items() if manifest.get(key) is not entry)
+        removed = sum(1 for key in manifest if key not in new_manifest)
         process_time = time.time() - start_time
-        return f"Đã xử lý {PDF_FILE} thành công! ({process_time:.2f}s)", True
-        
+        return (
+            f"Đã xử lý {len(pdf_paths)} file PDF thành công! "
+            f"({changed} trang cập nhật, {removed} trang bị xóa, {process_time:.2f}s)"
+        ), True
+
     except Exception as e:
         return f"Lỗi khi xử lý PDF: {str(e)}", False
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from models.processors.vietnamese_tokenizer import tokenize_query
+from config import SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES, CACHE_TTL
+
+class SemanticCache:
+    """
+    Answer cache matched by cosine similarity of TF-IDF query vectors, backed by an inverted index over the vocabulary.
+    Entries expire after the same CACHE_TTL as the exact answer cache and are dropped whenever a new recommender
+    snapshot generation (new vectorizer or Q&A data) is published.
+    """
+    def __init__(self, threshold=SEMANTIC_CACHE_THRESHOLD, max_entries=SEMANTIC_CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._postings = {}
+        self._next_slot = 0
+        self._generation = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, vector, generation):
+        with self._lock:
+            self._check_generation(generation)
+            scores = {}
+            for term, weight in vector:
+                for slot, entry_weight in self._postings.get(term, {}).items():
+                    scores[slot] = scores.get(slot, 0.0) + weight * entry_weight
+            now = time.time()
+            for slot, score in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+                if score < self.threshold:
+                    break
+                entry = self._entries[slot]
+                if entry["expires_at"] is not None and entry["expires_at"] <= now:
+                    self._remove(slot)
+                    self.expirations += 1
+                    continue
+                self._entries.move_to_end(slot)
+                self.hits += 1
+                return entry["result"], score
+            self.misses += 1
+            return None, 0.0
+
+    def set(self, vector, generation, query, result):
+        if not vector:
+            return
+        with self._lock:
+            self._check_generation(generation)
+            slot = self._next_slot
+            self._next_slot += 1
+            self._entries[slot] = {
+                "query": query,
+                "result": result,
+                "vector": vector,
+                "expires_at": time.time() + self.ttl if self.ttl and self.ttl > 0 else None
+            }
+            for term, weight in vector:
+                self._postings.setdefault(term, {})[slot] = weight
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _check_generation(self, generation):
+        # Vectors from another snapshot may live in a different space and answer from older data, so they are dropped
+        if generation != self._generation:
+            self._entries.clear()
+            self._postings.clear()
+            self._generation = generation
+
+    def _remove(self, slot):
+        entry = self._entries.pop(slot)
+        for term, _ in entry["vector"]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(slot, None)
+                if not postings:
+                    del self._postings[term]
+
+semantic_cache = SemanticCache()
+
+def query_vector(query):
+    if not SEMANTIC_CACHE_ENABLED or not has_app_context():
+        return None, None
+    snapshot = current_app.config.get('recommend_snapshot')
+    if snapshot is None or snapshot.vectorizer is None:
+        return None, None
+    try:
+        row = snapshot.vectorizer.transform([tokenize_query(query)])
+        return list(zip(row.indices.tolist(), row.data.tolist())), snapshot.generation
+    except Exception:
+        return None, None
+
+def get_semantic_cache(query):
+    vector, generation = query_vector(query)
+    if not vector:
+        return None, False, 0.0
+    result, score = semantic_cache.get(vector, generation)
+    return result, result is not None, score
+
+def set_semantic_cache(query, result):
+    vector, generation = query_vector(query)
+    if vector:
+        semantic_cache.set(vector, generation, query, result)
+
+def get_semantic_cache_stats():
+    return semantic_cache.stats()
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+import uuid
+import weakref
+from config import SINGLE_FLIGHT_TIMEOUT, SINGLE_FLIGHT_LEASE_TTL, SINGLE_FLIGHT_POLL_INTERVAL
+from models.managers import cache as answer_cache
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent computations of the same key: the first caller computes and duplicates wait for its result.
+    With a shared store (the SQLite answer cache) the first caller also holds a lease, so callers in other worker
+    processes wait for it and then pick the stored answer up through lookup() instead of computing it again.
+    """
+    def __init__(self, shared=None, timeout=SINGLE_FLIGHT_TIMEOUT, lease_ttl=SINGLE_FLIGHT_LEASE_TTL,
+                 poll_interval=SINGLE_FLIGHT_POLL_INTERVAL):
+        self.shared = shared
+        self.timeout = timeout
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self._calls = {}
+        self._async_calls = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.remote_coalesced = 0
+        self.timeouts = 0
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def do(self, key, fn, lookup=None, timeout=None):
+        """
+        Run fn() once for all concurrent callers of key. A caller that waits longer than timeout computes on its own.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(timeout):
+                self._count("timeouts")
+                return fn()
+            self._count("coalesced")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._lead(key, fn, lookup, timeout)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _lead(self, key, fn, lookup, timeout):
+        self._count("leaders")
+        if self.shared is None:
+            return fn()
+
+        owner = uuid.uuid4().hex
+        deadline = time.time() + timeout
+        waited = False
+        while not self.shared.acquire_lease(key, owner, self.lease_ttl):
+            waited = True
+            if time.time() >= deadline:
+                self._count("timeouts")
+                return fn()
+            time.sleep(self.poll_interval)
+
+        try:
+            if waited and lookup is not None:
+                found = lookup()
+                if found is not None:
+                    self._count("remote_coalesced")
+                    return found
+            return fn()
+        finally:
+            self.shared.release_lease(key, owner)
+
+    async def do_async(self, key, coro_fn, lookup=None, timeout=None):
+        """
+        Same as do() for coroutines: duplicates on the running event loop await the first caller's task
+        """
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        calls = self._async_calls.setdefault(loop, {})
+        task = calls.get(key)
+        if task is not None:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(task), timeout)
+            except asyncio.TimeoutError:
+                self._count("timeouts")
+                return await coro_fn()
+            self._count("coalesced")
+            return result
+
+        task = asyncio.ensure_future(self._lead_async(key, coro_fn, lookup, timeout))
+        calls[key] = task
+        task.add_done_callback(lambda _: calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _lead_async(self, key, coro_fn, lookup, timeout):
+        self._count("leaders")
+        if self.shared is None:
+            return await coro_fn()
+
+        loop = asyncio.get_running_loop()
+        owner = uuid.uuid4().hex
+        deadline = time.time() + timeout
+        waited = False
+        while not await loop.run_in_executor(None, self.shared.acquire_lease, key, owner, self.lease_ttl):
+            waited = True
+            if time.time() >= deadline:
+                self._count("timeouts")
+                return await coro_fn()
+            await asyncio.sleep(self.poll_interval)
+
+        try:
+            if waited and lookup is not None:
+                found = await loop.run_in_executor(None, lookup)
+                if found is not None:
+                    self._count("remote_coalesced")
+                    return found
+            return await coro_fn()
+        finally:
+            await loop.run_in_executor(None, self.shared.release_lease, key, owner)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._calls) + sum(len(calls) for calls in self._async_calls.values()),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "remote_coalesced": self.remote_coalesced,
+                "timeouts": self.timeouts,
+            }
+
+single_flight = SingleFlight(shared=answer_cache.cache if hasattr(answer_cache.cache, "acquire_lease") else None)
+
+def stored_answer(query):
+    result, hit, _ = answer_cache.get_cache(query)
+    return result if hit else None
+
+def coalesce(query, fn):
+    return single_flight.do(answer_cache.cache_key(query), fn, lookup=lambda: stored_answer(query))
+
+async def coalesce_async(query, coro_fn):
+    return await single_flight.do_async(answer_cache.cache_key(query), coro_fn, lookup=lambda: stored_answer(query))
+
+def get_single_flight_stats():
+    return single_flight.stats()
@@ -0,0 +1,127 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from config import PDF_SOURCE, LLM_MAX_CONCURRENCY, ASYNC_STAGE_THREADS, QUERY_SPECULATIVE, SINGLE_FLIGHT_ENABLED
+from models.managers.single_flight import coalesce_async
+from models.managers.metrics import stage_timer
+from models.processors.llm_chain import get_gemini_mysql, stream_gemini_rag
+from models.processors.query_processor import (
+    ERROR_MESSAGE, EMPTY_ANSWER_MESSAGE, find_cached_answer, format_cached_answer, is_mysql_answer,
+    rag_context_prompt, store_answer, get_rag_answer, finalize_rag_answer, load_vector_db_once,
+)
+
+# The Gemini SDK and the retrieval code are blocking, so each stage runs on this pool while the event loop keeps
+# serving other requests. Model calls additionally take one of LLM_MAX_CONCURRENCY slots of the running loop.
+_stage_executor = ThreadPoolExecutor(max_workers=ASYNC_STAGE_THREADS, thread_name_prefix="query-stage")
+_llm_slots = weakref.WeakKeyDictionary()
+_STREAM_END = object()
+
+def llm_slots():
+    loop = asyncio.get_running_loop()
+    slots = _llm_slots.get(loop)
+    if slots is None:
+        slots = _llm_slots[loop] = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return slots
+
+async def run_stage(fn, *args, **kwargs):
+    """
+    Await a blocking stage on the stage pool; the caller's context (e.g. the Flask app context) is carried over
+    """
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_stage_executor, call)
+
+async def run_llm_stage(fn, *args, **kwargs):
+    async with llm_slots():
+        return await run_stage(fn, *args, **kwargs)
+
+async def process_query_async(prompt):
+    """
+    Same pipeline as process_query with every stage awaited, so one worker can serve many chats at once
+    """
+    with stage_timer("process_query"):
+        found = await run_stage(find_cached_answer, prompt)
+        if found:
+            return format_cached_answer(found)
+
+        if SINGLE_FLIGHT_ENABLED:
+            return await coalesce_async(prompt, lambda: answer_query_async(prompt))
+        return await answer_query_async(prompt)
+
+async def answer_query_async(prompt):
+    rag_task = None
+    rag_cancelled = threading.Event()
+    try:
+        if QUERY_SPECULATIVE:
+            rag_task = asyncio.ensure_future(run_llm_stage(get_rag_answer, prompt, rag_cancelled))
+
+        mysql_result = await run_llm_stage(get_gemini_mysql, prompt)
+        if is_mysql_answer(mysql_result):
+            await run_stage(store_answer, prompt, mysql_result)
+            return mysql_result
+
+        result, answered = await (rag_task if rag_task else run_llm_stage(get_rag_answer, prompt))
+        rag_task = None
+        if answered:
+            await run_stage(store_answer, prompt, result)
+        return result
+
+    except Exception as e:
+        return ERROR_MESSAGE
+    finally:
+        if rag_task:
+            # Cancelling the task does not stop a stage already running on the pool; the event does
+            rag_cancelled.set()
+            rag_task.cancel()
+
+async def process_query_stream_async(prompt):
+    """
+    Async generator counterpart of process_query_stream yielding the same (event, data) pairs
+    """
+    found = await run_stage(find_cached_answer, prompt)
+    if found:
+        answer, cached, note = found
+        yield "answer", {"answer": answer, "cached": cached}
+        return
+
+    streamed = False
+    try:
+        mysql_result = await run_llm_stage(get_gemini_mysql, prompt)
+        if is_mysql_answer(mysql_result):
+            await run_stage(store_answer, prompt, mysql_result)
+            yield "answer", {"answer": mysql_result, "cached": False}
+            return
+
+        vector_database = await run_stage(load_vector_db_once)
+        if not vector_database:
+            yield "answer", {"answer": ERROR_MESSAGE, "cached": False}
+            return
+
+        chunks = []
+        async with llm_slots():
+            stream = stream_gemini_rag(vector_database, rag_context_prompt(prompt), filter_pdf=PDF_SOURCE)
+            while True:
+                chunk = await run_stage(next, stream, _STREAM_END)
+                if chunk is _STREAM_END:
+                    break
+                chunks.append(chunk)
+                streamed = True
+                yield "token", {"text": chunk}
+
+        answer = "".join(chunks)
+        if not answer:
+            yield "answer", {"answer": EMPTY_ANSWER_MESSAGE, "cached": False}
+            return
+
+        result = finalize_rag_answer(answer)
+        await run_stage(store_answer, prompt, result)
+        yield "answer", {"answer": result, "cached": False}
+
+    except Exception as e:
+        if streamed:
+            # Tokens are already out: the route turns this into an SSE "error" event and nothing is cached
+            raise
+        yield "answer", {"answer": ERROR_MESSAGE, "cached": False}
@@ -1,28 +1,30 @@
 import google.generativeai as genai
 import time
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.chains.question_answering import load_qa_chain
-from langchain.prompts import PromptTemplate
+from concurrent.futures import ThreadPoolExecutor, wait
 import re
 from config import (
     GEMINI_MODEL, TEMPERATURE, MAX_OUTPUT_TOKENS,
     TOP_K, TOP_P, MAX_RETRIES, BASE_DELAY, MAX_DOCS,
-    VECTOR_SEARCH_K,
+    VECTOR_SEARCH_K, RECOMMEND_CHECK_CONCURRENCY, RECOMMEND_CHECK_TIMEOUT,
 )
-from models.managers.mysql import fetch_data_from_mysql
+from models.processors.similar_questions import retrieve_qa_context
+from models.processors.llm_clients import get_generative_model, get_generation_config, get_chat_model, get_qa_chain
+from models.storages.vector_database import hybrid_search
+from models.managers.metrics import stage_timer, timed_stage
 _CLEAN_PATTERN = re.compile(
     r"Dựa trên thông tin trong SoTaySinhVien2024\.pdf[:,]?\s*",
     flags=re.I
 )
 
+_relevance_executor = ThreadPoolExecutor(
+    max_workers=RECOMMEND_CHECK_CONCURRENCY,
+    thread_name_prefix="relevance-check"
+)
+
 def clean_question(question: str) -> str:
     return _CLEAN_PATTERN.sub("", question or "").strip()
 
-def get_gemini_rag(vector_database, user_question, filter_pdf=None):
-    """
-    Combined RAG (Retrieval Augmented Generation) function using Gemini model
-    """
-    prompt_template = """
+RAG_PROMPT_TEMPLATE = """
     Bạn là trợ lý AI thân thiện, chuyên phân tích tài liệu PDF. Trả lời câu hỏi dựa CHỈ vào nội dung tài liệu được cung cấp.
 
     **Quy tắc**:
@@ -78,41 +80,41 @@ def get_gemini_rag(vector_database, user_question, filter_pdf=None):
     **Trả lời** (dùng Markdown, thân thiện và chi tiết):
     """
 
+@timed_stage("rag_retrieval")
+def retrieve_rag_documents(vector_database, user_question, filter_pdf=None):
+    if filter_pdf:
+        docs = hybrid_search(vector_database, clean_question(user_question), filter_pdf, k=VECTOR_SEARCH_K)
+    else:
+        docs = hybrid_search(vector_database, user_question, k=VECTOR_SEARCH_K)
+    relevant_docs = docs[:MAX_DOCS]
+
+    for doc in relevant_docs:
+        if not hasattr(doc, 'metadata'):
+            doc.metadata = {}
+        doc.metadata.setdefault('source', 'không xác định')
+        doc.metadata.setdefault('page', 'không xác định')
+    return relevant_docs
+
+@timed_stage("get_gemini_rag")
+def get_gemini_rag(vector_database, user_question, filter_pdf=None, cancelled=None):
+    """
+    Combined RAG (Retrieval Augmented Generation) function using Gemini model. Returns None without calling
+    the model once the optional threading.Event `cancelled` is set.
+    """
     try:
-        llm = ChatGoogleGenerativeAI(
-            model=GEMINI_MODEL,
-            temperature=TEMPERATURE,
-            max_output_tokens=MAX_OUTPUT_TOKENS,
-            top_k=TOP_K,
-            top_p=TOP_P
-        )
-
-        prompt = PromptTemplate(
-            template=prompt_template,
-            input_variables=["context", "question"]
-        )
-
-        chain = load_qa_chain(llm, chain_type="stuff", prompt=prompt)
-
-        if filter_pdf:
-            docs = [doc for doc_id, doc in vector_database.docstore._dict.items() if doc.metadata.get("source") == filter_pdf]
-            if not docs:
-                return {"output_text": "Không tìm thấy thông tin. Vui lòng hỏi lại.", "source_documents": [], "structured_tables": []}
-            relevant_docs = docs[:MAX_DOCS]
-        else:
-            vector_docs = vector_database.similarity_search(user_question, k=VECTOR_SEARCH_K)
-            relevant_docs = vector_docs[:MAX_DOCS]
+        chain = get_qa_chain(RAG_PROMPT_TEMPLATE)
 
-        for doc in relevant_docs:
-            if not hasattr(doc, 'metadata'):
-                doc.metadata = {}
-            doc.metadata.setdefault('source', 'không xác định')
-            doc.metadata.setdefault('page', 'không xác định')
+        relevant_docs = retrieve_rag_documents(vector_database, user_question, filter_pdf)
+        if filter_pdf and not relevant_docs:
+            return {"output_text": "Không tìm thấy thông tin. Vui lòng hỏi lại.", "source_documents": [], "structured_tables": []}
 
         retries = 0
         while retries < MAX_RETRIES:
+            if cancelled is not None and cancelled.is_set():
+                return None
             try:
-                result = chain.invoke({"input_documents": relevant_docs, "question": user_question}, return_only_outputs=True)
+                with stage_timer("llm_rag"):
+                    result = chain.invoke({"input_documents": relevant_docs, "question": user_question}, return_only_outputs=True)
                 processed_result = post_process_tables(result["output_text"])
                 return {
                     "output_text": processed_result["original_response"],
@@ -135,6 +137,39 @@ def get_gemini_rag(vector_database, user_question, filter_pdf=None):
             "structured_tables": []
         }
 
+def stream_gemini_rag(vector_database, user_question, filter_pdf=None):
+    """
+    Same as get_gemini_rag but yields the answer text chunk by chunk as Gemini produces it. A failure after the first
+    chunk, or on the last retry, is raised rather than ending the stream, so callers never take a cut-off answer
+    for a complete one.
+    """
+    try:
+        relevant_docs = retrieve_rag_documents(vector_database, user_question, filter_pdf)
+    except Exception:
+        relevant_docs = []
+    if filter_pdf and not relevant_docs:
+        yield "Không tìm thấy thông tin. Vui lòng hỏi lại."
+        return
+
+    prompt = RAG_PROMPT_TEMPLATE.format(
+        context="\n\n".join(doc.page_content for doc in relevant_docs),
+        question=user_question
+    )
+    retries = 0
+    while retries < MAX_RETRIES:
+        produced = False
+        try:
+            for chunk in get_chat_model().stream(prompt):
+                if chunk.content:
+                    produced = True
+                    yield chunk.content
+            return
+        except Exception:
+            retries += 1
+            if produced or retries == MAX_RETRIES:
+                raise
+            time.sleep(BASE_DELAY)
+
 def post_process_tables(response):
     import re
     table_pattern = r'\|[^\n]+\|\n\|[-|\s]+\|\n(\|[^\n]+\|\n)+'
@@ -179,15 +214,9 @@ def get_gemini_answer(question, answer):
 
             CHỈ TRẢ VỀ 5 CÂU TRẢ LỜI THAY THẾ, MỖI CÂU TRÊN 1 ĐOẠN VĂN, KHÔNG ĐÁNH SỐ, KHÔNG THÊM BẤT KỲ GIẢI THÍCH NÀO KHÁC.
         """
-        model = genai.GenerativeModel(GEMINI_MODEL)
-        response = model.generate_content(
+        response = get_generative_model().generate_content(
             prompt,
-            generation_config=genai.GenerationConfig(
-                temperature=TEMPERATURE,
-                top_p=TOP_P,
-                top_k=TOP_K,
-                max_output_tokens=MAX_OUTPUT_TOKENS,
-            )
+            generation_config=get_generation_config()
         )
         if hasattr(response, 'text'):
             raw_answers = []
@@ -210,23 +239,15 @@ def get_gemini_answer(question, answer):
     except Exception:
         return []
 
-def get_gemini_mysql(user_question):
-    """
-    Get answer from MySQL database using Gemini model
-    """
-    try:
-        qa_data = fetch_data_from_mysql()
+def build_mysql_prompt(user_question, qa_data):
+    qa_pairs = [
+        f"Câu hỏi: {question}\nTrả lời: {answer}"
+        for question, answer in zip(qa_data['question'], qa_data['answer'])
+    ]
 
-        if qa_data.empty:
-            return None
-
-        qa_pairs = []
-        for _, row in qa_data.iterrows():
-            qa_pairs.append(f"Câu hỏi: {row['question']}\nTrả lời: {row['answer']}")
-
-        context = "\n\n".join(qa_pairs)
+    context = "\n\n".join(qa_pairs)
 
-        prompt = f"""
+    return f"""
         Bạn là trợ lý AI hữu ích trả lời câu hỏi dựa trên nội dung cơ sở dữ liệu.
 
         NỘI DUNG CƠ SỞ DỮ LIỆU (Cặp Câu hỏi-Trả lời):
@@ -238,16 +259,24 @@ def get_gemini_mysql(user_question):
         Nếu không có thông tin liên quan trong cơ sở dữ liệu để trả lời câu hỏi, hãy trả lời "Không tìm thấy thông tin liên quan trong cơ sở dữ liệu."
         """
 
-        model = genai.GenerativeModel(GEMINI_MODEL)
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.GenerationConfig(
-                temperature=TEMPERATURE,
-                top_p=TOP_P,
-                top_k=TOP_K,
-                max_output_tokens=MAX_OUTPUT_TOKENS,
+@timed_stage("get_gemini_mysql")
+def get_gemini_mysql(user_question):
+    """
+    Get answer from MySQL database using Gemini model, prompting only with the top-N retrieved Q&A pairs
+    """
+    try:
+        qa_data = retrieve_qa_context(user_question)
+
+        if qa_data.empty:
+            return None
+
+        prompt = build_mysql_prompt(user_question, qa_data)
+
+        with stage_timer("llm_mysql"):
+            response = get_generative_model().generate_content(
+                prompt,
+                generation_config=get_generation_config()
             )
-        )
 
         if hasattr(response, 'text'):
             return response.text.strip()
@@ -256,3 +285,47 @@ def get_gemini_mysql(user_question):
 
     except Exception:
         return None
+
+@timed_stage("llm_relevance")
+def check_relevance(user_question, db_question, db_answer):
+    """
+    Ask Gemini whether a stored question/answer pair really answers the user's question
+    """
+    prompt = f"""
+        Bạn là trợ lý AI chuyên phân tích độ phù hợp của câu hỏi và câu trả lời.
+        CÂU HỎI CỦA NGƯỜI DÙNG: {user_question}
+        CÂU HỎI TRONG DB: {db_question}
+        CÂU TRẢ LỜI: {db_answer}
+        Nhiệm vụ của bạn:
+        Phân tích xem câu hỏi của người dùng và câu hỏi trong DB có thực sự liên quan không
+        Kiểm tra xem câu trả lời có phù hợp và hữu ích cho câu hỏi của người dùng không
+        Chỉ trả về True nếu cả hai điều kiện trên đều đúng, ngược lại trả về False
+        KHÔNG giải thích gì thêm, chỉ trả về True hoặc False
+    """
+    response = get_generative_model().generate_content(
+        prompt,
+        generation_config=get_generation_config(temperature=0.0, max_output_tokens=10)
+    )
+    return response.text.strip().lower().startswith("true")
+
+def check_relevance_batch(user_question, candidates, timeout=RECOMMEND_CHECK_TIMEOUT):
+    """
+    Run check_relevance for every (question, answer) candidate concurrently.
+    Candidates whose check fails or does not finish within the timeout are kept, as before.
+    """
+    futures = [
+        _relevance_executor.submit(check_relevance, user_question, question, answer)
+        for question, answer in candidates
+    ]
+    wait(futures, timeout=timeout)
+    results = []
+    for future in futures:
+        if not future.done():
+            future.cancel()
+            results.append(True)
+            continue
+        try:
+            results.append(future.result())
+        except Exception:
+            results.append(True)
+    return results
@@ -0,0 +1,87 @@
+import threading
+import google.generativeai as genai
+from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+from langchain.chains.question_answering import load_qa_chain
+from langchain.prompts import PromptTemplate
+from config import GEMINI_MODEL, TEMPERATURE, MAX_OUTPUT_TOKENS, TOP_K, TOP_P, EMBEDDING_MODEL
+from config import GOOGLE_API_KEY, GEMINI_TRANSPORT, GEMINI_API_ENDPOINT
+
+_registry = {}
+_registry_lock = threading.RLock()
+
+def _get_or_create(key, factory):
+    client = _registry.get(key)
+    if client is None:
+        with _registry_lock:
+            client = _registry.get(key)
+            if client is None:
+                client = factory()
+                _registry[key] = client
+    return client
+
+def configure_genai():
+    """
+    Point the genai SDK at the configured transport and endpoint. The langchain wrappers call
+    genai.configure(api_key=...) when they are built, so this is re-applied after creating them.
+    """
+    client_options = {"api_endpoint": GEMINI_API_ENDPOINT} if GEMINI_API_ENDPOINT else None
+    genai.configure(api_key=GOOGLE_API_KEY, transport=GEMINI_TRANSPORT, client_options=client_options)
+
+def _with_genai_config(factory):
+    def create():
+        client = factory()
+        configure_genai()
+        return client
+    return create
+
+def get_generative_model(model_name=GEMINI_MODEL):
+    """
+    genai.GenerativeModel shared by every request of this worker
+    """
+    return _get_or_create(("model", model_name), lambda: genai.GenerativeModel(model_name))
+
+def get_generation_config(temperature=TEMPERATURE, max_output_tokens=MAX_OUTPUT_TOKENS, top_p=TOP_P, top_k=TOP_K):
+    return _get_or_create(
+        ("generation_config", temperature, max_output_tokens, top_p, top_k),
+        lambda: genai.GenerationConfig(
+            temperature=temperature,
+            top_p=top_p,
+            top_k=top_k,
+            max_output_tokens=max_output_tokens,
+        )
+    )
+
+def get_chat_model(model_name=GEMINI_MODEL, temperature=TEMPERATURE, max_output_tokens=MAX_OUTPUT_TOKENS, top_p=TOP_P, top_k=TOP_K):
+    return _get_or_create(
+        ("chat_model", model_name, temperature, max_output_tokens, top_p, top_k),
+        _with_genai_config(lambda: ChatGoogleGenerativeAI(
+            model=model_name,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            top_k=top_k,
+            top_p=top_p
+        ))
+    )
+
+def get_embeddings(model_name=EMBEDDING_MODEL):
+    return _get_or_create(
+        ("embeddings", model_name),
+        _with_genai_config(lambda: GoogleGenerativeAIEmbeddings(model=model_name))
+    )
+
+def get_qa_chain(prompt_template, model_name=GEMINI_MODEL, temperature=TEMPERATURE, max_output_tokens=MAX_OUTPUT_TOKENS, top_p=TOP_P, top_k=TOP_K):
+    """
+    "stuff" question-answering chain for a prompt template, built once per template and generation config
+    """
+    return _get_or_create(
+        ("qa_chain", prompt_template, model_name, temperature, max_output_tokens, top_p, top_k),
+        lambda: load_qa_chain(
+            get_chat_model(model_name, temperature, max_output_tokens, top_p, top_k),
+            chain_type="stuff",
+            prompt=PromptTemplate(template=prompt_template, input_variables=["context", "question"])
+        )
+    )
+
+def clear_clients():
+    with _registry_lock:
+        _registry.clear()
@@ -1,54 +1,213 @@
-from models.processors.llm_chain import get_gemini_rag
+from models.processors.llm_chain import get_gemini_rag, stream_gemini_rag
 from models.processors.small_talk import is_small_talk
-from models.storages.vector_database import load_vector_database
+from models.storages.vector_database import (
+    load_vector_database, load_sparse_index, vector_index_version, invalidate_search_caches
+)
 from models.managers.cache import get_cache, set_cache
+from models.managers.semantic_cache import get_semantic_cache, set_semantic_cache
 from models.processors.llm_chain import get_gemini_mysql
-from config import PDF_FILE
+from models.managers.single_flight import coalesce
+from models.managers.metrics import stage_timer, timed_stage
+from config import PDF_FILE, PDF_SOURCE, QUERY_SPECULATIVE, QUERY_SPECULATIVE_THREADS, SINGLE_FLIGHT_ENABLED, HYBRID_SEARCH_ENABLED
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+OUT_OF_SCOPE_MESSAGE = "Chào bạn, cảm ơn bạn đã gửi câu hỏi đến chúng tôi. Tuy nhiên, hiện tại nội dung câu hỏi nằm ngoài phạm vi hỗ trợ của hệ thống. Để được giải đáp chi tiết hơn, bạn có thể <a href='https://hcmute-consultant.vercel.app/create-question' class='text-primary hover:underline'>đặt câu hỏi tại đây</a> để được tư vấn viên trả lời. Chúng tôi sẽ ghi nhận câu hỏi này và cập nhật thêm dữ liệu để có thể trả lời tốt hơn trong tương lai. Rất mong bạn thông cảm."
+ERROR_MESSAGE = "Xin lỗi, tôi không thể xử lý yêu cầu của bạn. Vui lòng thử lại sau."
+EMPTY_ANSWER_MESSAGE = "Xin lỗi, không nhận được câu trả lời. Vui lòng thử lại sau."
+
+# Replaced as a whole by swap_vector_database(); requests read it once and keep that index for the whole request
 vector_database = None
+vector_database_version = None
+vector_database_generation = 0
+
+# Speculative mode starts the PDF-RAG stage next to the MySQL stage instead of after it
+_speculative_executor = ThreadPoolExecutor(max_workers=QUERY_SPECULATIVE_THREADS, thread_name_prefix="speculative-rag")
 
 def load_vector_db_once():
-    global vector_database
+    global vector_database, vector_database_version, vector_database_generation
     if vector_database is None:
-        vector_database = load_vector_database()[0]
+        with stage_timer("faiss_load"):
+            version = vector_index_version()
+            loaded = load_vector_database()[0]
+        if loaded is not None and vector_database is None:
+            vector_database_version = version
+            vector_database_generation += 1
+            vector_database = loaded
     return vector_database
 
-def process_query(prompt):
-    cached_result, cache_hit, time_saved = get_cache(prompt)
+def swap_vector_database(new_vector_database, version):
+    """
+    Point new requests at a freshly loaded index; requests already running keep the one they started with
+    """
+    global vector_database, vector_database_version, vector_database_generation
+    # Selectors built for the previous index are dropped, the previous index keeps its BM25 index for the requests
+    # still using it
+    invalidate_search_caches(new_vector_database)
+    if HYBRID_SEARCH_ENABLED:
+        load_sparse_index(new_vector_database)
+    vector_database_version = version
+    vector_database_generation += 1
+    vector_database = new_vector_database
+    return vector_database_generation
+
+def warm_up_vector_db():
+    """
+    Load the FAISS index, and the BM25 index hybrid search uses, before the first request falls through to RAG
+    """
+    vector_database = load_vector_db_once()
+    if vector_database is not None and HYBRID_SEARCH_ENABLED:
+        load_sparse_index(vector_database)
+    return vector_database is not None
+
+def finalize_rag_answer(answer):
+    if any(phrase in answer.lower() for phrase in ["không tìm thấy thông tin", "không có thông tin"]):
+        return OUT_OF_SCOPE_MESSAGE
+    return answer
+
+def find_cached_answer(prompt):
+    """
+    Answers that need no model call: exact cache, small talk, then semantic cache.
+    Returns (answer, cached, note) or None, note being the cache remark shown after the answer.
+    """
+    with stage_timer("cache_lookup"):
+        cached_result, cache_hit, time_saved = get_cache(prompt)
     if cache_hit:
-        return f"{cached_result}\n\n*(Kết quả từ cache, tiết kiệm {time_saved:.2f}s)*"
+        return cached_result, True, f"*(Kết quả từ cache, tiết kiệm {time_saved:.2f}s)*"
 
-    small_talk_response = is_small_talk(prompt)
+    with stage_timer("small_talk"):
+        small_talk_response = is_small_talk(prompt)
     if small_talk_response:
-        return small_talk_response
+        return small_talk_response, False, None
+
+    with stage_timer("semantic_cache_lookup"):
+        similar_result, similar_hit, similarity = get_semantic_cache(prompt)
+    if similar_hit:
+        return similar_result, True, f"*(Kết quả từ cache, câu hỏi tương tự {similarity:.0%})*"
+
+    return None
+
+def format_cached_answer(found):
+    answer, cached, note = found
+    return f"{answer}\n\n{note}" if note else answer
+
+def is_mysql_answer(mysql_result):
+    return bool(mysql_result) and "Không tìm thấy thông tin liên quan trong cơ sở dữ liệu" not in mysql_result
+
+def rag_context_prompt(prompt):
+    return f"Dựa trên thông tin trong {PDF_FILE}, {prompt}"
+
+@timed_stage("cache_store")
+def store_answer(prompt, result):
+    set_cache(prompt, result, 0)
+    set_semantic_cache(prompt, result)
+
+def rag_response_answer(response):
+    if not response:
+        return ERROR_MESSAGE, False
+    answer = response["output_text"]
+    if not answer:
+        return EMPTY_ANSWER_MESSAGE, False
+    return finalize_rag_answer(answer), True
+
+def get_rag_answer(prompt, cancelled=None):
+    """
+    PDF-RAG stage of process_query, returns (answer, answered). Once `cancelled` is set no further model
+    call is made and (ERROR_MESSAGE, False) is returned.
+    """
+    if cancelled is not None and cancelled.is_set():
+        return ERROR_MESSAGE, False
+    vector_database = load_vector_db_once()
+    if not vector_database:
+        return ERROR_MESSAGE, False
+
+    response = get_gemini_rag(vector_database, rag_context_prompt(prompt), filter_pdf=PDF_SOURCE, cancelled=cancelled)
+    return rag_response_answer(response)
+
+def start_speculative_rag(prompt):
+    """
+    (future, cancelled): setting cancelled stops the RAG stage before its next model call, which
+    future.cancel() alone cannot do once the stage is running
+    """
+    cancelled = threading.Event()
+    context = contextvars.copy_context()
+    return _speculative_executor.submit(context.run, get_rag_answer, prompt, cancelled), cancelled
 
+@timed_stage("process_query")
+def process_query(prompt):
+    found = find_cached_answer(prompt)
+    if found:
+        return format_cached_answer(found)
+
+    if SINGLE_FLIGHT_ENABLED:
+        return coalesce(prompt, lambda: answer_query(prompt))
+    return answer_query(prompt)
+
+def answer_query(prompt):
+    """
+    Model stages of process_query: MySQL answer first, PDF-RAG otherwise
+    """
     try:
+        rag_future, rag_cancelled = start_speculative_rag(prompt) if QUERY_SPECULATIVE else (None, None)
+
         mysql_result = get_gemini_mysql(prompt)
-        if mysql_result and "Không tìm thấy thông tin liên quan trong cơ sở dữ liệu" not in mysql_result:
-            set_cache(prompt, mysql_result, 0)
+        if is_mysql_answer(mysql_result):
+            if rag_future:
+                rag_cancelled.set()
+                rag_future.cancel()
+            store_answer(prompt, mysql_result)
             return mysql_result
 
+        result, answered = rag_future.result() if rag_future else get_rag_answer(prompt)
+        if answered:
+            store_answer(prompt, result)
+        return result
+
+    except Exception as e:
+        return ERROR_MESSAGE
+
+def process_query_stream(prompt):
+    """
+    Streaming variant of process_query yielding (event, data) pairs: "token" events while the RAG answer
+    is generated, then a single "answer" event with the final text. Cache hits only yield the "answer" event.
+    """
+    found = find_cached_answer(prompt)
+    if found:
+        answer, cached, note = found
+        yield "answer", {"answer": answer, "cached": cached}
+        return
+
+    streamed = False
+    try:
+        mysql_result = get_gemini_mysql(prompt)
+        if is_mysql_answer(mysql_result):
+            store_answer(prompt, mysql_result)
+            yield "answer", {"answer": mysql_result, "cached": False}
+            return
+
         vector_database = load_vector_db_once()
         if not vector_database:
-            return "Xin lỗi, tôi không thể xử lý yêu cầu của bạn. Vui lòng thử lại sau."
+            yield "answer", {"answer": ERROR_MESSAGE, "cached": False}
+            return
 
-        context_prompt = f"Dựa trên thông tin trong {PDF_FILE}, {prompt}"
+        chunks = []
+        for chunk in stream_gemini_rag(vector_database, rag_context_prompt(prompt), filter_pdf=PDF_SOURCE):
+            chunks.append(chunk)
+            streamed = True
+            yield "token", {"text": chunk}
 
-        response = get_gemini_rag(vector_database, context_prompt, filter_pdf=PDF_FILE)
-        if not response:
-            return "Xin lỗi, tôi không thể xử lý yêu cầu của bạn. Vui lòng thử lại sau."
-
-        answer = response["output_text"]
+        answer = "".join(chunks)
         if not answer:
-            return "Xin lỗi, không nhận được câu trả lời. Vui lòng thử lại sau."
-
-        if any(phrase in answer.lower() for phrase in ["không tìm thấy thông tin", "không có thông tin"]):
-            result = "Chào bạn, cảm ơn bạn đã gửi câu hỏi đến chúng tôi. Tuy nhiên, hiện tại nội dung câu hỏi nằm ngoài phạm vi hỗ trợ của hệ thống. Để được giải đáp chi tiết hơn, bạn có thể <a href='https://hcmute-consultant.vercel.app/create-question' class='text-primary hover:underline'>đặt câu hỏi tại đây</a> để được tư vấn viên trả lời. Chúng tôi sẽ ghi nhận câu hỏi này và cập nhật thêm dữ liệu để có thể trả lời tốt hơn trong tương lai. Rất mong bạn thông cảm."
-        else:
-            result = answer
+            yield "answer", {"answer": EMPTY_ANSWER_MESSAGE, "cached": False}
+            return
 
-        set_cache(prompt, result, 0)
-        return result
+        result = finalize_rag_answer(answer)
+        store_answer(prompt, result)
+        yield "answer", {"answer": result, "cached": False}
 
     except Exception as e:
-        return "Xin lỗi, tôi không thể xử lý yêu cầu của bạn. Vui lòng thử lại sau."
+        if streamed:
+            # Tokens are already out: the route turns this into an SSE "error" event and nothing is cached
+            raise
+        yield "answer", {"answer": ERROR_MESSAGE, "cached": False}
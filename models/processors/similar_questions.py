@@ -1,19 +1,165 @@
+import time
+import numpy as np
+import pandas as pd
 from flask import current_app
-from sklearn.metrics.pairwise import cosine_similarity
-from models.managers.mysql import tokenize_vietnamese
+from models.managers.mysql import load_or_prepare_data, update_data
+from models.processors.vietnamese_tokenizer import tokenize_query
+from models.storages.recommend_index import ann_index_wanted, load_or_build_ann_index
+from models.storages.recommend_store import artifact_root
+from models.storages.qa_store import QAStore
+from models.managers.metrics import timed_stage
+from config import (
+    MYSQL_CONTEXT_TOP_N, MYSQL_CONTEXT_MIN_SCORE, RECOMMEND_REFRESH_INTERVAL, INDEX_REFRESH_ENABLED,
+    RECOMMEND_ANN_CANDIDATES,
+)
 
-def recommend_similar_questions(query, top_n=5):
+class RecommendSnapshot:
+    """
+    One consistent recommender state. It is replaced as a whole, never updated in place, so a request holding a
+    snapshot never mixes a new vectorizer with an old matrix or Q&A rows.
+    """
+    def __init__(self, qa_store, vectorizer, tfidf_matrix, ann_index=None, generation=0):
+        self.qa_store = qa_store
+        self.vectorizer = vectorizer
+        self.tfidf_matrix = tfidf_matrix
+        self.ann_index = ann_index
+        self.generation = generation
+        self.created_at = time.time()
+
+    @property
+    def ready(self):
+        return self.vectorizer is not None and self.tfidf_matrix is not None
+
+def publish_recommend_data(config, qa_store, vectorizer, tfidf_matrix):
+    """
+    Build the ANN index for the new data, then swap the snapshot in with a single assignment. The separate
+    qa_store/vectorizer/tfidf_matrix keys are kept for readers that only need one of them.
+    """
+    previous = config.get('recommend_snapshot')
+    if previous is not None and previous.tfidf_matrix is tfidf_matrix:
+        ann_index = previous.ann_index
+    else:
+        ann_index = build_ann_index(tfidf_matrix, qa_store.attrs.get('artifact_generation'))
+    snapshot = RecommendSnapshot(
+        qa_store, vectorizer, tfidf_matrix, ann_index,
+        previous.generation + 1 if previous is not None else 1
+    )
+    config['recommend_snapshot'] = snapshot
+    config['qa_store'] = qa_store
+    config['vectorizer'] = vectorizer
+    config['tfidf_matrix'] = tfidf_matrix
+    config['recommend_ann'] = ann_index
+    return snapshot
+
+def ensure_recommend_data_loaded():
+    """
+    The current snapshot, loaded on first use. Refreshing is left to the background index refresher; without it
+    the data is brought up to date inline every RECOMMEND_REFRESH_INTERVAL.
+    """
+    from models.managers.index_refresher import start_index_refresher
+
+    config = current_app.config
+    snapshot = config.get('recommend_snapshot')
+    if snapshot is None or not snapshot.ready:
+        try:
+            qa_store, vectorizer, tfidf_matrix = load_or_prepare_data()
+        except Exception as e:
+            qa_store, vectorizer, tfidf_matrix = QAStore(), None, None
+        snapshot = publish_recommend_data(config, qa_store, vectorizer, tfidf_matrix)
+        config['recommend_refreshed_at'] = time.time()
+        start_index_refresher(config)
+    elif not INDEX_REFRESH_ENABLED and time.time() - config.get('recommend_refreshed_at', 0) > RECOMMEND_REFRESH_INTERVAL:
+        config['recommend_refreshed_at'] = time.time()
+        qa_store, vectorizer, tfidf_matrix = update_data(snapshot.qa_store, snapshot.vectorizer, snapshot.tfidf_matrix)
+        if tfidf_matrix is not snapshot.tfidf_matrix:
+            snapshot = publish_recommend_data(config, qa_store, vectorizer, tfidf_matrix)
+    return snapshot
+
+def build_ann_index(tfidf_matrix, generation=None):
+    """
+    ANN index saved with the artifact generation the data came from, or one built in memory
+    """
+    if not ann_index_wanted(tfidf_matrix):
+        return None
+    try:
+        return load_or_build_ann_index(tfidf_matrix, artifact_root() / generation if generation else None)
+    except Exception as e:
+        return None
+
+def top_k(indices, scores, top_n, min_score):
+    mask = scores > min_score
+    indices, scores = indices[mask], scores[mask]
+    if len(scores) > top_n:
+        selected = np.argpartition(-scores, top_n - 1)[:top_n]
+        indices, scores = indices[selected], scores[selected]
+    order = np.lexsort((indices, -scores))
+    return indices[order].tolist(), scores[order].tolist()
+
+def score_top_k(query_tfidf, tfidf_matrix, top_n=5, min_score=0.3):
+    # TF-IDF rows are L2-normalized, so a sparse mat-vec gives the cosine similarities directly
+    scores = tfidf_matrix @ query_tfidf.toarray()[0]
+    return top_k(np.arange(len(scores)), scores, top_n, min_score)
+
+def score_ann_top_k(query_tfidf, tfidf_matrix, ann_index, top_n=5, min_score=0.3):
+    """
+    Re-rank the approximate candidates with their exact TF-IDF similarities
+    """
+    candidates = ann_index.search(query_tfidf, max(RECOMMEND_ANN_CANDIDATES, top_n))[0]
+    scores = tfidf_matrix[candidates] @ query_tfidf.toarray()[0]
+    return top_k(candidates, scores, top_n, min_score)
+
+def score_top_k_batch(query_matrix, tfidf_matrix, top_n=5, min_score=0.3):
+    """
+    Score many queries with one sparse matmul; only the non-zero similarities of each query are materialized
+    """
+    scores = (query_matrix @ tfidf_matrix.T).tocsr()
+    results = []
+    for row in range(scores.shape[0]):
+        start, end = scores.indptr[row], scores.indptr[row + 1]
+        results.append(top_k(scores.indices[start:end], scores.data[start:end], top_n, min_score))
+    return results
+
+@timed_stage("recommend_similar_questions")
+def recommend_similar_questions(query, top_n=5, min_score=0.3, snapshot=None):
+    """
+    Indices are rows of snapshot.qa_store; pass the snapshot the caller reads rows from so both come from the same swap
+    """
     try:
-        vectorizer = current_app.config['vectorizer']
-        tfidf_matrix = current_app.config['tfidf_matrix']
-        query_tokenized = tokenize_vietnamese(query)
-        query_tfidf = vectorizer.transform([query_tokenized])
-        sim_scores = cosine_similarity(query_tfidf, tfidf_matrix)[0]
-        sim_scores_with_indices = [(idx, score) for idx, score in enumerate(sim_scores) if score > 0.3]  # Tăng ngưỡng lên 0.3
-        sim_scores_with_indices = sorted(sim_scores_with_indices, key=lambda x: x[1], reverse=True)
-        top_results = sim_scores_with_indices[:top_n]
-        question_indices = [i[0] for i in top_results]
-        question_scores = [i[1] for i in top_results]
-        return question_indices, question_scores
+        snapshot = snapshot or current_app.config['recommend_snapshot']
+        query_tokenized = tokenize_query(query)
+        query_tfidf = snapshot.vectorizer.transform([query_tokenized])
+        if snapshot.ann_index is not None:
+            return score_ann_top_k(query_tfidf, snapshot.tfidf_matrix, snapshot.ann_index, top_n, min_score)
+        return score_top_k(query_tfidf, snapshot.tfidf_matrix, top_n, min_score)
     except Exception as e:
         return [], []
+
+def recommend_similar_questions_batch(queries, top_n=5, min_score=0.3, snapshot=None):
+    try:
+        snapshot = snapshot or current_app.config['recommend_snapshot']
+        query_matrix = snapshot.vectorizer.transform([tokenize_query(query) for query in queries])
+        if snapshot.ann_index is not None:
+            return [
+                score_ann_top_k(query_matrix[row], snapshot.tfidf_matrix, snapshot.ann_index, top_n, min_score)
+                for row in range(query_matrix.shape[0])
+            ]
+        return score_top_k_batch(query_matrix, snapshot.tfidf_matrix, top_n, min_score)
+    except Exception as e:
+        return [([], []) for _ in queries]
+
+@timed_stage("mysql_retrieval")
+def retrieve_qa_context(query, top_n=MYSQL_CONTEXT_TOP_N, min_score=MYSQL_CONTEXT_MIN_SCORE):
+    """
+    Return only the top-N question/answer pairs relevant to the query, ranked on the TF-IDF index
+    """
+    try:
+        snapshot = ensure_recommend_data_loaded()
+        qa_store = snapshot.qa_store
+        indices, _ = recommend_similar_questions(query, top_n, min_score, snapshot)
+        indices = [idx for idx in indices if idx < len(qa_store)]
+        return pd.DataFrame({
+            'question': [qa_store.question[idx] for idx in indices],
+            'answer': [qa_store.answer[idx] for idx in indices]
+        })
+    except Exception as e:
+        return pd.DataFrame(columns=['question', 'answer'])
@@ -0,0 +1,129 @@
+import hashlib
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pyvi import ViTokenizer
+from config import TOKEN_CACHE_PATH, TOKENIZE_PROCESSES, TOKENIZE_PARALLEL_MIN_ROWS, TOKENIZE_QUERY_CACHE_SIZE
+
+# Bump when tokenize_vietnamese changes so persisted results are not reused
+TOKENIZER_VERSION = "pyvi-1"
+
+def tokenize_vietnamese(text):
+    if not isinstance(text, str) or not text.strip():
+        return ""
+    text = text.lower()
+    text = re.sub(r'[^\w\s]', '', text)
+    try:
+        tokenized = " ".join(ViTokenizer.tokenize(text).split())
+        return tokenized
+    except Exception:
+        return text
+
+@lru_cache(maxsize=TOKENIZE_QUERY_CACHE_SIZE)
+def tokenize_query(text):
+    """
+    Query-time tokenization with an in-process LRU in front of pyvi
+    """
+    return tokenize_vietnamese(text)
+
+def content_hash(text):
+    return hashlib.blake2b(f"{TOKENIZER_VERSION}\0{text}".encode(), digest_size=16).digest()
+
+class TokenCache:
+    """
+    Persistent content-hash -> tokenized text store shared by rebuilds and workers
+    """
+    def __init__(self, path=TOKEN_CACHE_PATH):
+        self.path = str(path)
+        self._local = threading.local()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS tokens (hash BLOB PRIMARY KEY, tokenized TEXT NOT NULL)"
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_many(self, hashes, batch_size=500):
+        found = {}
+        conn = self._connection()
+        for start in range(0, len(hashes), batch_size):
+            batch = hashes[start:start + batch_size]
+            placeholders = ",".join("?" * len(batch))
+            for key, tokenized in conn.execute(
+                f"SELECT hash, tokenized FROM tokens WHERE hash IN ({placeholders})", batch
+            ):
+                found[key] = tokenized
+        return found
+
+    def put_many(self, items):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR REPLACE INTO tokens (hash, tokenized) VALUES (?, ?)", items)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+def get_token_cache():
+    global _token_cache
+    with _token_cache_lock:
+        if _token_cache is None:
+            try:
+                _token_cache = TokenCache()
+            except Exception:
+                _token_cache = False
+    return _token_cache or None
+
+def tokenize_batch(texts, processes=TOKENIZE_PROCESSES, use_cache=True):
+    """
+    Tokenize many texts at once: duplicates are tokenized once, results come from the persistent cache when
+    available, and large cold batches are spread over a process pool.
+    """
+    texts = ["" if not isinstance(text, str) else text for text in texts]
+    hashes = [content_hash(text) for text in texts]
+    unique = dict(zip(hashes, texts))
+
+    token_cache = get_token_cache() if use_cache else None
+    results = {}
+    if token_cache is not None:
+        try:
+            results = token_cache.get_many(list(unique))
+        except Exception:
+            results = {}
+
+    missing = [key for key in unique if key not in results]
+    if missing:
+        missing_texts = [unique[key] for key in missing]
+        if processes > 1 and len(missing_texts) >= TOKENIZE_PARALLEL_MIN_ROWS:
+            chunksize = max(1, len(missing_texts) // (processes * 8))
+            with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+                tokenized = list(pool.map(tokenize_vietnamese, missing_texts, chunksize=chunksize))
+        else:
+            tokenized = [tokenize_vietnamese(text) for text in missing_texts]
+        new_items = list(zip(missing, tokenized))
+        results.update(new_items)
+        if token_cache is not None:
+            try:
+                token_cache.put_many(new_items)
+            except Exception:
+                pass
+
+    return [results[key] for key in hashes]
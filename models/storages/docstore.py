@@ -0,0 +1,78 @@
+import json
+import os
+from langchain_core.documents import Document
+from langchain_community.docstore.base import AddableMixin, Docstore
+
+DOCSTORE_VERSION = 1
+
+class ColumnarDocstore(Docstore, AddableMixin):
+    """
+    Docstore kept as plain text/metadata columns instead of pickled Document objects. It is saved as one JSON file
+    that loads with the C json parser, and Documents are only built for the ids a search returns.
+    """
+    def __init__(self, texts=None, metadatas=None):
+        self.texts = texts if texts is not None else {}
+        self.metadatas = metadatas if metadatas is not None else {}
+
+    @classmethod
+    def from_docstore(cls, docstore, ids):
+        texts, metadatas = {}, {}
+        for doc_id in ids:
+            doc = docstore.search(doc_id)
+            texts[doc_id] = doc.page_content
+            metadatas[doc_id] = doc.metadata
+        return cls(texts, metadatas)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, texts):
+        overlapping = set(texts).intersection(self.texts)
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        for doc_id, doc in texts.items():
+            self.texts[doc_id] = doc.page_content
+            self.metadatas[doc_id] = doc.metadata
+
+    def delete(self, ids):
+        overlapping = set(ids).intersection(self.texts)
+        if not overlapping:
+            raise ValueError(f"Tried to delete ids that does not  exist: {ids}")
+        for doc_id in overlapping:
+            del self.texts[doc_id]
+            del self.metadatas[doc_id]
+
+    def search(self, search):
+        text = self.texts.get(search)
+        if text is None:
+            return f"ID {search} not found."
+        return Document(page_content=text, metadata=self.metadatas[search])
+
+    def save(self, path, ids, **extra):
+        """
+        Write the columns in FAISS position order; extra keys are stored alongside (index files, distance strategy)
+        """
+        payload = {
+            "version": DOCSTORE_VERSION,
+            **extra,
+            "ids": ids,
+            "texts": [self.texts[doc_id] for doc_id in ids],
+            "metadatas": [self.metadatas[doc_id] for doc_id in ids],
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Returns (docstore, index_to_docstore_id, payload without the columns)
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != DOCSTORE_VERSION:
+            raise ValueError(f"Unsupported docstore version: {payload.get('version')}")
+        ids = payload.pop("ids")
+        docstore = cls(dict(zip(ids, payload.pop("texts"))), dict(zip(ids, payload.pop("metadatas"))))
+        return docstore, dict(enumerate(ids)), payload
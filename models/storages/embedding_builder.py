@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from models.storages.file_lock import file_lock
+from config import (
+    EMBEDDING_MODEL, EMBED_BATCH_SIZE, EMBED_CONCURRENCY, EMBED_REQUESTS_PER_MINUTE,
+    EMBED_MAX_RETRIES, EMBED_RETRY_BASE_DELAY, EMBED_CACHE_PATH,
+)
+
+class TokenBucket:
+    """
+    Blocking token bucket: refills `rate` tokens per second up to `capacity`
+    """
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+class EmbeddingCache:
+    """
+    Persistent content-addressed embedding store: blake2b(model, text) keys in `<path>.keys`, float32 rows in a
+    memory-mapped `<path>.f32`, row i belonging to key i. Rows are appended after every batch, so an interrupted build
+    resumes and a re-ingest only embeds text it has never seen. Workers share the files: reads and appends hold an
+    flock on `<path>.lock`, and each append first picks up the rows other processes added.
+    """
+    KEY_SIZE = 16
+
+    def __init__(self, path=EMBED_CACHE_PATH, model_name=EMBEDDING_MODEL):
+        self.path = str(path)
+        self.model_name = model_name or ""
+        self.keys_path = f"{self.path}.keys"
+        self.vectors_path = f"{self.path}.f32"
+        self.meta_path = f"{self.path}.json"
+        self.lock_path = f"{self.path}.lock"
+        self._lock = threading.Lock()
+        self.rows = {}
+        # Rows in the files this process has read; the same key can occupy several rows when two workers
+        # appended it at once, so this is not len(self.rows)
+        self.count = 0
+        self.dimension = None
+        self._mapped = None
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def key(self, text):
+        return hashlib.blake2b(f"{self.model_name}\0{text}".encode(), digest_size=self.KEY_SIZE).digest()
+
+    def _file_rows(self):
+        """
+        Complete rows in the files; vectors are written before their keys
+        """
+        if self.dimension is None:
+            try:
+                with open(self.meta_path, "r", encoding="utf-8") as f:
+                    self.dimension = json.load(f)["dimension"]
+            except (OSError, ValueError, KeyError):
+                return 0
+        try:
+            return min(
+                os.path.getsize(self.keys_path) // self.KEY_SIZE,
+                os.path.getsize(self.vectors_path) // (4 * self.dimension)
+            )
+        except OSError:
+            return 0
+
+    def _sync(self):
+        """
+        Index the rows appended since the last sync, by this or another process. Caller holds the file lock.
+        """
+        count = self._file_rows()
+        if count <= self.count:
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(self.count * self.KEY_SIZE)
+            keys = f.read((count - self.count) * self.KEY_SIZE)
+        for offset in range(0, len(keys), self.KEY_SIZE):
+            self.rows.setdefault(keys[offset:offset + self.KEY_SIZE], self.count + offset // self.KEY_SIZE)
+        self.count = count
+
+    def _load(self):
+        with self._lock, file_lock(self.lock_path):
+            self._sync()
+            if self.dimension is None:
+                return
+            # A torn tail left by a crashed writer is cut off; appends hold the same lock, so none is in progress
+            with open(self.keys_path, "r+b") as f:
+                f.truncate(self.count * self.KEY_SIZE)
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(self.count * 4 * self.dimension)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _vectors(self):
+        if self._mapped is None or len(self._mapped) < self.count:
+            self._mapped = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.count, self.dimension))
+        return self._mapped
+
+    def get_many(self, keys):
+        """
+        Cached vectors for keys, None where missing
+        """
+        with self._lock:
+            if any(key not in self.rows for key in keys):
+                with file_lock(self.lock_path, shared=True):
+                    self._sync()
+            rows = [self.rows.get(key) for key in keys]
+            found = [row for row in rows if row is not None]
+            self.hits += len(found)
+            self.misses += len(rows) - len(found)
+            if not found:
+                return [None] * len(keys)
+            vectors = self._vectors()
+            return [None if row is None else np.array(vectors[row]) for row in rows]
+
+    def put_many(self, items):
+        """
+        Append (key, vector) pairs not cached yet
+        """
+        with self._lock, file_lock(self.lock_path):
+            self._sync()
+            fresh = {}
+            for key, vector in items:
+                if key not in self.rows and key not in fresh:
+                    fresh[key] = np.asarray(vector, dtype=np.float32)
+            if not fresh:
+                return
+            if self.dimension is None:
+                self.dimension = len(next(iter(fresh.values())))
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"dimension": self.dimension, "model": self.model_name}, f)
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.stack(list(fresh.values())).astype(np.float32).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.keys_path, "ab") as f:
+                f.write(b"".join(fresh))
+                f.flush()
+                os.fsync(f.fileno())
+            for key in fresh:
+                self.rows[key] = self.count
+                self.count += 1
+
+    def stats(self):
+        return {
+            "entries": len(self.rows), "rows": self.count, "dimension": self.dimension,
+            "hits": self.hits, "misses": self.misses
+        }
+
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+def get_embedding_cache():
+    global _embedding_cache
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            try:
+                _embedding_cache = EmbeddingCache()
+            except Exception:
+                _embedding_cache = False
+    return _embedding_cache if _embedding_cache is not False else None
+
+class EmbeddingBuilder:
+    """
+    Embeds a stream of texts in batches: EMBED_CONCURRENCY batch requests in flight, a token bucket of
+    EMBED_REQUESTS_PER_MINUTE, exponential backoff on failures. With a cache, texts embedded before are served
+    from it and every finished batch is added to it.
+    """
+    def __init__(self, embeddings, batch_size=EMBED_BATCH_SIZE, concurrency=EMBED_CONCURRENCY,
+                 requests_per_minute=EMBED_REQUESTS_PER_MINUTE, max_retries=EMBED_MAX_RETRIES,
+                 base_delay=EMBED_RETRY_BASE_DELAY, cache=None):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.bucket = TokenBucket(requests_per_minute / 60.0, max(1, self.concurrency))
+        self.cache = cache
+        self.requests = 0
+        self.retries = 0
+        self.reused = 0
+
+    def _embed_batch(self, texts):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                self.requests += 1
+                vectors = self.embeddings.embed_documents(texts)
+                if len(vectors) != len(texts):
+                    raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+                return [np.asarray(vector, dtype=np.float32) for vector in vectors]
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                time.sleep(self.base_delay * (2 ** attempt) * (1 + random.random()))
+
+    def _embed_items(self, items):
+        """
+        items: [(payload, text)] -> [(payload, text, vector)]; cached texts are not sent again
+        """
+        keys = [self.cache.key(text) for _, text in items] if self.cache is not None else None
+        vectors = self.cache.get_many(keys) if self.cache is not None else [None] * len(items)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        self.reused += len(items) - len(missing)
+        if missing:
+            computed = self._embed_batch([items[i][1] for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+            if self.cache is not None:
+                self.cache.put_many([(keys[i], vectors[i]) for i in missing])
+        return [(payload, text, vector) for (payload, text), vector in zip(items, vectors)]
+
+    def embed_stream(self, items):
+        """
+        Consume an iterable of (payload, text) lazily and yield lists of (payload, text, vector) per batch, in order.
+        At most `concurrency` batches are read ahead of the consumer.
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="embedding-batch") as executor:
+            pending = deque()
+            batch = []
+            for item in items:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    pending.append(executor.submit(self._embed_items, batch))
+                    batch = []
+                    if len(pending) >= self.concurrency:
+                        yield pending.popleft().result()
+            if batch:
+                pending.append(executor.submit(self._embed_items, batch))
+            while pending:
+                yield pending.popleft().result()
+
+    def embed_texts(self, texts):
+        return [vector for batch in self.embed_stream((None, text) for text in texts) for _, _, vector in batch]
@@ -0,0 +1,32 @@
+import contextlib
+import os
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, single-process use only
+    fcntl = None
+
+@contextlib.contextmanager
+def file_lock(path, shared=False, blocking=True):
+    """
+    Cross-process flock on a sidecar lock file. Yields True once held, or False when blocking=False and another
+    process holds it.
+    """
+    directory = os.path.dirname(str(path))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a+b") as f:
+        if fcntl is None:
+            yield True
+            return
+        flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            flags |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(f.fileno(), flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
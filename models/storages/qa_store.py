@@ -0,0 +1,162 @@
+import numpy as np
+
+TEXT_COLUMNS = ("question", "answer")
+ID_COLUMNS = ("question_id", "answer_id")
+
+class TextColumn:
+    """
+    Strings kept as one UTF-8 buffer plus int64 offsets: row i is buffer[offsets[i]:offsets[i + 1]], decoded on access
+    """
+    def __init__(self, buffer=None, offsets=None):
+        self.buffer = buffer if buffer is not None else np.zeros(0, dtype=np.uint8)
+        self.offsets = offsets if offsets is not None else np.zeros(1, dtype=np.int64)
+
+    @classmethod
+    def from_strings(cls, values):
+        encoded = [str(value).encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        return self.buffer[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8")
+
+    def tolist(self):
+        data = self.buffer.tobytes()
+        offsets = self.offsets.tolist()
+        return [data[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])]
+
+    @property
+    def nbytes(self):
+        return self.buffer.nbytes + self.offsets.nbytes
+
+    def take(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        starts, ends = self.offsets[rows], self.offsets[rows + 1]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(ends - starts, out=offsets[1:])
+        data = memoryview(self.buffer)
+        buffer = b"".join(data[start:end] for start, end in zip(starts.tolist(), ends.tolist()))
+        return TextColumn(np.frombuffer(buffer, dtype=np.uint8), offsets)
+
+    @classmethod
+    def concat(cls, columns):
+        buffers = [column.buffer for column in columns]
+        offsets = [np.zeros(1, dtype=np.int64)]
+        base = 0
+        for column in columns:
+            offsets.append(column.offsets[1:] + base)
+            base += column.offsets[-1]
+        return cls(np.concatenate(buffers) if buffers else None, np.concatenate(offsets))
+
+    def save(self, directory, name):
+        with open(directory / f"{name}.utf8", "wb") as f:
+            f.write(self.buffer.tobytes())
+        np.save(directory / f"{name}_offsets.npy", self.offsets)
+
+    @classmethod
+    def load(cls, directory, name, mmap=True):
+        path = directory / f"{name}.utf8"
+        if mmap and path.stat().st_size:
+            buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        else:
+            buffer = np.fromfile(path, dtype=np.uint8)
+        return cls(buffer, np.load(directory / f"{name}_offsets.npy", mmap_mode="r" if mmap else None))
+
+class QAStore:
+    """
+    Read-only question/answer rows the recommender serves, in contiguous arrays instead of a DataFrame of Python
+    strings: ids as int64 arrays, texts as TextColumn buffers. Row access is O(1) and only decodes the row asked for.
+    attrs carries the same metadata a DataFrame's attrs did (MySQL watermark, artifact generation).
+    """
+    def __init__(self, question=None, answer=None, question_id=None, answer_id=None, source="mysql"):
+        self.question = question if question is not None else TextColumn()
+        self.answer = answer if answer is not None else TextColumn()
+        rows = len(self.question)
+        self.question_id = question_id if question_id is not None else np.full(rows, -1, dtype=np.int64)
+        self.answer_id = answer_id if answer_id is not None else np.full(rows, -1, dtype=np.int64)
+        self.source = source
+        self.attrs = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Copy the question/answer/id columns of df; everything else (tokenized text and the like) is left behind
+        """
+        ids = {
+            name: df[name].fillna(-1).to_numpy(dtype=np.int64) if name in df.columns else None
+            for name in ID_COLUMNS
+        }
+        store = cls(
+            TextColumn.from_strings(df['question'].tolist()),
+            TextColumn.from_strings(df['answer'].tolist()),
+            source=str(df['source'].iloc[0]) if 'source' in df.columns and len(df) else "mysql",
+            **ids
+        )
+        store.attrs = dict(df.attrs)
+        return store
+
+    def __len__(self):
+        return len(self.question)
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    @property
+    def nbytes(self):
+        return self.question.nbytes + self.answer.nbytes + self.question_id.nbytes + self.answer_id.nbytes
+
+    def row(self, index):
+        """
+        One row as a dict; ids that were not known are left out
+        """
+        row = {'question': self.question[index], 'answer': self.answer[index], 'source': self.source}
+        for name in ID_COLUMNS:
+            value = int(getattr(self, name)[index])
+            if value >= 0:
+                row[name] = value
+        return row
+
+    def questions(self):
+        return self.question.tolist()
+
+    def answers(self):
+        return self.answer.tolist()
+
+    def take(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        return QAStore(
+            self.question.take(rows), self.answer.take(rows),
+            self.question_id[rows], self.answer_id[rows], self.source
+        )
+
+    @classmethod
+    def concat(cls, stores):
+        return cls(
+            TextColumn.concat([store.question for store in stores]),
+            TextColumn.concat([store.answer for store in stores]),
+            np.concatenate([store.question_id for store in stores]),
+            np.concatenate([store.answer_id for store in stores]),
+            stores[0].source if stores else "mysql"
+        )
+
+    def save(self, directory):
+        for name in TEXT_COLUMNS:
+            getattr(self, name).save(directory, name)
+        for name in ID_COLUMNS:
+            np.save(directory / f"{name}.npy", getattr(self, name))
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        With mmap the text buffers and ids are mapped from the artifact files, so workers share their pages
+        """
+        mmap_mode = "r" if mmap else None
+        return cls(
+            *(TextColumn.load(directory, name, mmap) for name in TEXT_COLUMNS),
+            *(np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in ID_COLUMNS)
+        )
@@ -0,0 +1,99 @@
+import json
+import os
+from pathlib import Path
+import faiss
+import joblib
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+from config import (
+    RECOMMEND_ANN_ENABLED, RECOMMEND_ANN_MIN_ROWS, RECOMMEND_ANN_TYPE, RECOMMEND_ANN_DIM, RECOMMEND_ANN_HNSW_M,
+    RECOMMEND_ANN_EF_SEARCH, RECOMMEND_ANN_NLIST, RECOMMEND_ANN_NPROBE, RECOMMEND_ANN_FILE,
+)
+
+class RecommendAnnIndex:
+    """
+    Approximate candidate search for the question recommender: TF-IDF rows reduced with TruncatedSVD and indexed in
+    FAISS (HNSW or IVF) by inner product. Candidates are meant to be re-ranked with exact TF-IDF scores.
+    """
+    def __init__(self, svd, index, signature):
+        self.svd = svd
+        self.index = index
+        self.signature = signature
+        self.configure()
+
+    @classmethod
+    def build(cls, tfidf_matrix, kind=RECOMMEND_ANN_TYPE, dimensions=RECOMMEND_ANN_DIM):
+        svd = TruncatedSVD(n_components=min(dimensions, tfidf_matrix.shape[1] - 1), random_state=0)
+        vectors = normalize(svd.fit_transform(tfidf_matrix)).astype(np.float32)
+        dimension = vectors.shape[1]
+        if kind == "ivf":
+            quantizer = faiss.IndexFlatIP(dimension)
+            nlist = max(1, min(RECOMMEND_ANN_NLIST, len(vectors) // 39))
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+        else:
+            index = faiss.IndexHNSWFlat(dimension, RECOMMEND_ANN_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = max(40, 2 * RECOMMEND_ANN_HNSW_M)
+        index.add(vectors)
+        return cls(svd, index, matrix_signature(tfidf_matrix))
+
+    def configure(self, ef_search=RECOMMEND_ANN_EF_SEARCH, nprobe=RECOMMEND_ANN_NPROBE):
+        """
+        Recall/latency knobs: larger efSearch (HNSW) or nprobe (IVF) gives better recall at higher latency
+        """
+        if isinstance(self.index, faiss.IndexHNSW):
+            self.index.hnsw.efSearch = ef_search
+        elif isinstance(self.index, faiss.IndexIVF):
+            self.index.nprobe = nprobe
+
+    def search(self, query_matrix, k):
+        vectors = normalize(self.svd.transform(query_matrix)).astype(np.float32)
+        _, positions = self.index.search(vectors, min(k, self.index.ntotal))
+        return [row[row != -1] for row in positions]
+
+    def save(self, path):
+        """
+        Each file is written under a temporary name and renamed into place; the .json goes last, so its presence
+        marks a complete save
+        """
+        faiss.write_index(self.index, f"{path}.faiss.tmp")
+        os.replace(f"{path}.faiss.tmp", f"{path}.faiss")
+        joblib.dump(self.svd, f"{path}_svd.pkl.tmp")
+        os.replace(f"{path}_svd.pkl.tmp", f"{path}_svd.pkl")
+        with open(f"{path}.json.tmp", "w", encoding="utf-8") as f:
+            json.dump({"signature": self.signature}, f)
+        os.replace(f"{path}.json.tmp", f"{path}.json")
+
+    @classmethod
+    def load(cls, path):
+        with open(f"{path}.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(joblib.load(f"{path}_svd.pkl"), faiss.read_index(f"{path}.faiss"), meta["signature"])
+
+def matrix_signature(tfidf_matrix):
+    return [int(tfidf_matrix.shape[0]), int(tfidf_matrix.shape[1]), int(tfidf_matrix.nnz), float(tfidf_matrix.sum())]
+
+def ann_index_wanted(tfidf_matrix):
+    return RECOMMEND_ANN_ENABLED and tfidf_matrix is not None and tfidf_matrix.shape[0] >= RECOMMEND_ANN_MIN_ROWS
+
+def save_ann_index(tfidf_matrix, directory):
+    """
+    Build the ANN index of tfidf_matrix into an artifact generation directory; only the artifact builder calls this
+    """
+    RecommendAnnIndex.build(tfidf_matrix).save(Path(directory) / RECOMMEND_ANN_FILE)
+
+def load_or_build_ann_index(tfidf_matrix, directory=None):
+    """
+    ANN index for tfidf_matrix, read from the artifact generation directory it was saved in along with the matrix,
+    otherwise built in memory. Nothing is written here: the files belong to their generation.
+    """
+    if directory is not None:
+        signature = matrix_signature(tfidf_matrix)
+        try:
+            ann_index = RecommendAnnIndex.load(Path(directory) / RECOMMEND_ANN_FILE)
+            if ann_index.signature[:3] == signature[:3] and np.isclose(ann_index.signature[3], signature[3]):
+                return ann_index
+        except Exception:
+            pass
+    return RecommendAnnIndex.build(tfidf_matrix)
@@ -0,0 +1,133 @@
+import json
+import os
+import shutil
+import time
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from models.storages.qa_store import QAStore
+from models.storages.recommend_index import ann_index_wanted, save_ann_index
+from config import DATA_DIR, RECOMMEND_ARTIFACT_DIR, RECOMMEND_ARTIFACT_KEEP
+
+# Bump when the layout below changes; older artifacts are then ignored and rebuilt
+ARTIFACT_FORMAT_VERSION = 1
+VECTORIZER_PARAMS = ("min_df", "max_features", "strip_accents", "analyzer", "token_pattern", "ngram_range", "norm",
+                     "use_idf", "smooth_idf", "sublinear_tf", "lowercase")
+
+def artifact_root():
+    return DATA_DIR / RECOMMEND_ARTIFACT_DIR
+
+def save_recommend_artifacts(qa_store, vectorizer, tfidf_matrix, watermark):
+    """
+    Write a new artifact generation and point CURRENT at it: CSR arrays as .npy, the vocabulary as a term list in
+    column order with the idf weights, and the QAStore columns. Readers never see a half-written one.
+    """
+    root = artifact_root()
+    # Fixed-width nanosecond stamp, so sorting the names (prune_generations) sorts them by age
+    generation = f"gen-{time.time_ns():020d}-{os.getpid()}"
+    directory = root / generation
+    directory.mkdir(parents=True)
+
+    tfidf_matrix = tfidf_matrix.tocsr()
+    np.save(directory / "tfidf_data.npy", tfidf_matrix.data)
+    np.save(directory / "tfidf_indices.npy", tfidf_matrix.indices)
+    np.save(directory / "tfidf_indptr.npy", tfidf_matrix.indptr)
+    np.save(directory / "idf.npy", vectorizer.idf_.astype(np.float64, copy=False))
+
+    terms = [None] * len(vectorizer.vocabulary_)
+    for term, column in vectorizer.vocabulary_.items():
+        terms[column] = term
+    params = {name: getattr(vectorizer, name) for name in VECTORIZER_PARAMS}
+    with open(directory / "vocabulary.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "terms": terms,
+            "stop_words": sorted(vectorizer.stop_words) if vectorizer.stop_words else None,
+            "params": params
+        }, f, ensure_ascii=False)
+
+    qa_store.save(directory)
+    if ann_index_wanted(tfidf_matrix):
+        try:
+            save_ann_index(tfidf_matrix, directory)
+        except Exception as e:
+            # Workers then build the ANN index in memory from the matrix
+            print(f"Error saving recommender ANN index: {str(e)}")
+
+    with open(directory / "meta.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "format_version": ARTIFACT_FORMAT_VERSION,
+            "created_at": time.time(),
+            "rows": len(qa_store),
+            "shape": list(tfidf_matrix.shape),
+            "watermark": watermark
+        }, f)
+
+    tmp_path = root / f"CURRENT.{generation}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"generation": generation}, f)
+    os.replace(tmp_path, root / "CURRENT")
+    prune_generations(root, generation)
+    return generation
+
+def prune_generations(root, current, keep=RECOMMEND_ARTIFACT_KEEP):
+    """
+    Drop all but the newest `keep` generations; workers that mapped an older one keep reading the unlinked files
+    """
+    generations = sorted(path for path in root.iterdir() if path.is_dir() and path.name.startswith("gen-"))
+    for path in generations[:-keep] if keep > 0 else generations:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+def current_generation():
+    try:
+        with open(artifact_root() / "CURRENT", "r", encoding="utf-8") as f:
+            return json.load(f)["generation"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def load_vectorizer(directory):
+    with open(directory / "vocabulary.json", "r", encoding="utf-8") as f:
+        vocabulary = json.load(f)
+    params = vocabulary["params"]
+    params["ngram_range"] = tuple(params["ngram_range"])
+    vectorizer = TfidfVectorizer(
+        vocabulary={term: column for column, term in enumerate(vocabulary["terms"])},
+        stop_words=vocabulary["stop_words"],
+        **params
+    )
+    vectorizer.idf_ = np.load(directory / "idf.npy")
+    return vectorizer
+
+def load_recommend_artifacts(mmap=True):
+    """
+    (qa_store, vectorizer, tfidf_matrix) from the CURRENT generation, or None when there is none or it is unreadable.
+    qa_store.attrs['watermark'] holds the MySQL watermark the artifacts were built from,
+    qa_store.attrs['artifact_generation'] the generation they were read from.
+    """
+    generation = current_generation()
+    if generation is None:
+        return None
+    directory = artifact_root() / generation
+    try:
+        with open(directory / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != ARTIFACT_FORMAT_VERSION:
+            return None
+
+        mmap_mode = "r" if mmap else None
+        tfidf_matrix = sparse.csr_matrix(
+            (
+                np.load(directory / "tfidf_data.npy", mmap_mode=mmap_mode),
+                np.load(directory / "tfidf_indices.npy", mmap_mode=mmap_mode),
+                np.load(directory / "tfidf_indptr.npy", mmap_mode=mmap_mode)
+            ),
+            shape=tuple(meta["shape"]),
+            copy=False
+        )
+        qa_store = QAStore.load(directory, mmap)
+        qa_store.attrs["watermark"] = meta["watermark"]
+        qa_store.attrs["artifact_generation"] = generation
+        return qa_store, load_vectorizer(directory), tfidf_matrix
+    except Exception as e:
+        print(f"Error loading recommender artifacts {generation}: {str(e)}")
+        return None
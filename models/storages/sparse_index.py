@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import numpy as np
+from scipy import sparse
+from models.managers.mysql import load_stopwords
+from models.processors.vietnamese_tokenizer import tokenize_batch, tokenize_query
+
+class BM25Index:
+    """
+    Okapi BM25 index over the PDF chunks, stored as a term-major sparse matrix whose rows follow the FAISS positions
+    """
+    def __init__(self, matrix, vocabulary, doc_ids, stopwords=None):
+        self.matrix = matrix.tocsc()
+        self.vocabulary = vocabulary
+        self.doc_ids = doc_ids
+        self.stopwords = stopwords if stopwords is not None else vietnamese_stopwords()
+
+    @classmethod
+    def build(cls, texts, doc_ids, k1=1.5, b=0.75):
+        stopwords = vietnamese_stopwords()
+        vocabulary = {}
+        rows, cols, counts = [], [], []
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for row, tokenized in enumerate(tokenize_batch(texts)):
+            term_counts = {}
+            for term in analyze(tokenized, stopwords):
+                term_id = vocabulary.setdefault(term, len(vocabulary))
+                term_counts[term_id] = term_counts.get(term_id, 0) + 1
+            lengths[row] = sum(term_counts.values())
+            rows.extend([row] * len(term_counts))
+            cols.extend(term_counts.keys())
+            counts.extend(term_counts.values())
+
+        n_docs = len(texts)
+        tf = np.array(counts, dtype=np.float32)
+        rows = np.array(rows, dtype=np.int64)
+        cols = np.array(cols, dtype=np.int64)
+        document_frequency = np.bincount(cols, minlength=len(vocabulary)).astype(np.float32)
+        idf = np.log(1 + (n_docs - document_frequency + 0.5) / (document_frequency + 0.5))
+        average_length = lengths.mean() if n_docs else 0.0
+        norm = k1 * (1 - b + b * lengths[rows] / max(average_length, 1e-9))
+        weights = idf[cols] * tf * (k1 + 1) / (tf + norm)
+        matrix = sparse.csc_matrix((weights, (rows, cols)), shape=(n_docs, len(vocabulary)), dtype=np.float32)
+        return cls(matrix, vocabulary, list(doc_ids), stopwords)
+
+    def search(self, query, k, positions=None):
+        term_ids = sorted({
+            self.vocabulary[term] for term in analyze(tokenize_query(query), self.stopwords) if term in self.vocabulary
+        })
+        if not term_ids:
+            return []
+        scores = np.asarray(self.matrix[:, term_ids].sum(axis=1)).ravel()
+        if positions is not None:
+            mask = np.zeros(len(scores), dtype=bool)
+            mask[positions] = True
+            scores[~mask] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(position), float(scores[position])) for position in candidates]
+
+    def save(self, path):
+        """
+        Both files are written to temporary names and renamed into place, and both carry the signature of doc_ids,
+        so a reader never mixes the matrix of one save with the vocabulary of another
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        signature = doc_ids_signature(self.doc_ids)
+        terms = [None] * len(self.vocabulary)
+        for term, term_id in self.vocabulary.items():
+            terms[term_id] = term
+        with open(f"{path}.npz.tmp", "wb") as f:
+            np.savez(
+                f,
+                data=self.matrix.data,
+                indices=self.matrix.indices,
+                indptr=self.matrix.indptr,
+                shape=np.array(self.matrix.shape),
+                signature=np.array(signature)
+            )
+        with open(f"{path}.json.tmp", "w", encoding="utf-8") as f:
+            json.dump({"signature": signature, "terms": terms, "doc_ids": self.doc_ids}, f, ensure_ascii=False)
+        os.replace(f"{path}.npz.tmp", f"{path}.npz")
+        os.replace(f"{path}.json.tmp", f"{path}.json")
+
+    @classmethod
+    def load(cls, path):
+        with open(f"{path}.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with np.load(f"{path}.npz") as arrays:
+            if "signature" not in arrays or str(arrays["signature"]) != meta.get("signature"):
+                raise ValueError("BM25 matrix and vocabulary come from different saves")
+            matrix = sparse.csc_matrix(
+                (arrays["data"], arrays["indices"], arrays["indptr"]),
+                shape=tuple(arrays["shape"])
+            )
+        vocabulary = {term: term_id for term_id, term in enumerate(meta["terms"])}
+        return cls(matrix, vocabulary, meta["doc_ids"])
+
+def doc_ids_signature(doc_ids):
+    """
+    Digest of the FAISS docstore ids, in position order, that an index was built for
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for doc_id in doc_ids:
+        digest.update(str(doc_id).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+_stopwords = None
+
+def vietnamese_stopwords():
+    global _stopwords
+    if _stopwords is None:
+        _stopwords = frozenset(word.replace(" ", "_") for word in load_stopwords())
+    return _stopwords
+
+def analyze(tokenized, stopwords):
+    return [term for term in tokenized.split() if term not in stopwords]
@@ -0,0 +1,164 @@
+import os
+import sqlite3
+import threading
+import time
+from config import CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_TTL, CACHE_SQLITE_PATH
+
+class SqliteQueryCache:
+    """
+    Answer cache stored in an SQLite WAL file so every gunicorn worker on the host shares the same entries
+    """
+    def __init__(self, path=CACHE_SQLITE_PATH, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    processing_time REAL NOT NULL,
+                    expires_at REAL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def get(self, key):
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT query, result, timestamp, processing_time, expires_at, size FROM entries WHERE key = ?",
+            (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        if row[4] is not None and row[4] <= now:
+            conn.execute("DELETE FROM entries WHERE key = ? AND expires_at <= ?", (key, now))
+            self.expirations += 1
+            self.misses += 1
+            return None
+        conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return {
+            "query": row[0],
+            "result": row[1],
+            "timestamp": row[2],
+            "processing_time": row[3],
+            "expires_at": row[4],
+            "size": row[5],
+        }
+
+    def set(self, key, entry, ttl=None):
+        self._write(key, entry, ttl, "INSERT OR REPLACE")
+
+    def set_if_absent(self, key, entry, ttl=None):
+        return self._write(key, entry, ttl, "INSERT OR IGNORE")
+
+    def _write(self, key, entry, ttl, statement):
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl and ttl > 0 else None
+        size = len(entry["query"].encode()) + len(str(entry["result"]).encode())
+        if size > self.max_bytes:
+            return False
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?", (key, now))
+            inserted = conn.execute(
+                f"{statement} INTO entries (key, query, result, timestamp, processing_time, expires_at, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, entry["query"], str(entry["result"]), entry.get("timestamp", now),
+                 entry.get("processing_time", 0), expires_at, size, now)
+            ).rowcount == 1
+            if inserted:
+                self._evict(conn)
+        return inserted
+
+    def _evict(self, conn):
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        while count > self.max_entries or total > self.max_bytes:
+            row = conn.execute("SELECT key, size FROM entries ORDER BY last_access LIMIT 1").fetchone()
+            if row is None:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+            count -= 1
+            total -= row[1]
+            self.evictions += 1
+
+    def acquire_lease(self, key, owner, ttl):
+        """
+        Take the computation lease of key for owner; expired leases of crashed holders are taken over
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM leases WHERE key = ? AND expires_at <= ?", (key, now))
+            conn.execute(
+                "INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                (key, owner, now + ttl)
+            )
+            row = conn.execute("SELECT owner FROM leases WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] == owner
+
+    def release_lease(self, key, owner):
+        self._connection().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def clear(self):
+        self._connection().execute("DELETE FROM entries")
+
+    def stats(self):
+        count, total = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        return {
+            "entries": count,
+            "size_bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
@@ -1,51 +1,178 @@
 import os
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+import threading
+import uuid
+import faiss
+import numpy as np
 from langchain_community.vectorstores import FAISS
-from langchain.docstore.document import Document
-from config import EMBEDDING_MODEL
+from langchain_community.vectorstores.utils import DistanceStrategy
+from models.storages.docstore import ColumnarDocstore
+from models.storages.sparse_index import BM25Index
+from models.processors.llm_clients import get_embeddings
+from models.storages.embedding_builder import EmbeddingBuilder, get_embedding_cache
+from config import (
+    EMBEDDING_MODEL, VECTOR_SEARCH_K, HYBRID_SEARCH_ENABLED, RRF_K,
+    VECTOR_INDEX_MMAP, VECTOR_INDEX_QUANTIZATION, VECTOR_INDEX_PQ_M,
+)
 
-def get_vector_database(text_chunks):
-    normalized_chunks = []
-    for chunk in text_chunks:
-        text = chunk["page_content"]
-        normalized_chunk = chunk.copy()
-        normalized_chunk["page_content"] = text
-        normalized_chunks.append(normalized_chunk)
-
-    embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
-
-    documents = []
-    for chunk in normalized_chunks:
-        doc = Document(
-            page_content=chunk["page_content"],
-            metadata=chunk["metadata"]
-        )
-        documents.append(doc)
+SPARSE_INDEX_PATH = os.path.join("faiss_index", "sparse_index")
+DOCSTORE_PATH = os.path.join("faiss_index", "docstore.json")
+
+# The served index and the one it was just swapped for, which in-flight requests may still be using
+_source_search_params = {}
+SOURCE_SEARCH_CACHE_SIZE = 2
+_source_search_lock = threading.Lock()
+_sparse_indexes = {}
+SPARSE_INDEX_CACHE_SIZE = 2
+_sparse_index_lock = threading.Lock()
+
+def get_embedding_builder(use_cache=True):
+    return EmbeddingBuilder(
+        get_embeddings(EMBEDDING_MODEL),
+        cache=get_embedding_cache() if use_cache else None
+    )
+
+def add_embedded_batches(vector_database, batches):
+    """
+    Add batches of ((doc_id, chunk), text, vector) to vector_database, creating the index from the first batch when None
+    """
+    for batch in batches:
+        text_embeddings = [(text, vector) for _, text, vector in batch]
+        metadatas = [chunk["metadata"] for (_, chunk), _, _ in batch]
+        ids = [doc_id or str(uuid.uuid4()) for (doc_id, _), _, _ in batch]
+        if vector_database is None:
+            vector_database = FAISS.from_embeddings(
+                text_embeddings, get_embeddings(EMBEDDING_MODEL), metadatas=metadatas, ids=ids
+            )
+        else:
+            vector_database.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+    return vector_database
+
+def embed_chunk_stream(chunk_stream, builder):
+    return builder.embed_stream(((doc_id, chunk), chunk["page_content"]) for doc_id, chunk in chunk_stream)
 
+def quantize_index(index, quantization):
+    """
+    Compressed copy of a flat index: 8-bit scalar quantization ("int8", 4x smaller) or product quantization
+    ("pq", VECTOR_INDEX_PQ_M bytes per vector). PQ needs 256 training vectors and falls back to int8 below that.
+    """
+    vectors = index.reconstruct_n(0, index.ntotal)
+    if quantization == "pq" and index.ntotal >= 256 and index.d % VECTOR_INDEX_PQ_M == 0:
+        quantized = faiss.IndexPQ(index.d, VECTOR_INDEX_PQ_M, 8, index.metric_type)
+    else:
+        quantization = "int8"
+        quantized = faiss.IndexScalarQuantizer(index.d, faiss.ScalarQuantizer.QT_8bit, index.metric_type)
+    quantized.train(vectors)
+    quantized.add(vectors)
+    return quantization, quantized
+
+def write_index(index, path):
+    # Replace the file instead of rewriting it so workers that mmap the old one keep a valid mapping
+    tmp_path = f"{path}.tmp"
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, path)
+
+def save_vector_database(vector_database, quantization=VECTOR_INDEX_QUANTIZATION):
+    """
+    Save the flat index, an optional quantized copy and the columnar docstore. The docstore file is written last
+    and names the index files, so it is what loaders go by.
+    """
     if not os.path.exists("faiss_index"):
         os.makedirs("faiss_index")
+    index = vector_database.index
+    ids = [vector_database.index_to_docstore_id[position] for position in range(index.ntotal)]
+    docstore = vector_database.docstore
+    if not isinstance(docstore, ColumnarDocstore):
+        docstore = ColumnarDocstore.from_docstore(docstore, ids)
+
+    index_files = {"none": "index.faiss"}
+    write_index(index, os.path.join("faiss_index", "index.faiss"))
+    if quantization != "none" and index.ntotal:
+        kind, quantized = quantize_index(index, quantization)
+        index_files[quantization] = f"index.{kind}.faiss"
+        write_index(quantized, os.path.join("faiss_index", index_files[quantization]))
 
-    vector_database = FAISS.from_documents(
-        documents=documents,
-        embedding=embeddings,
+    docstore.save(
+        DOCSTORE_PATH,
+        ids,
+        index_files=index_files,
+        distance_strategy=vector_database.distance_strategy.value,
+        normalize_L2=vector_database._normalize_L2
     )
+    save_sparse_index(vector_database)
+    invalidate_search_caches(vector_database)
 
-    vector_database.save_local("faiss_index")
+def build_vector_database(chunk_stream, builder=None):
+    """
+    Build and save the FAISS index from a stream of (doc_id, chunk) pairs, embedding it batch by batch.
+    Chunks already in the embedding cache are read from it instead of being embedded again.
+    """
+    builder = builder or get_embedding_builder()
+    vector_database = add_embedded_batches(None, embed_chunk_stream(chunk_stream, builder))
+    if vector_database is None:
+        return None
+    save_vector_database(vector_database)
+    return vector_database
 
+def update_vector_database(vector_database, chunk_stream, removed_ids, builder=None):
+    """
+    Add the new (doc_id, chunk) pairs to the loaded index in place, delete removed_ids and save it once.
+    removed_ids may be a callable, evaluated after the stream is consumed.
+    """
+    builder = builder or get_embedding_builder()
+    vector_database = add_embedded_batches(vector_database, embed_chunk_stream(chunk_stream, builder))
+    if callable(removed_ids):
+        removed_ids = removed_ids()
+    existing_ids = set(vector_database.index_to_docstore_id.values())
+    removed = [doc_id for doc_id in removed_ids if doc_id in existing_ids]
+    if removed:
+        vector_database.delete(removed)
+    save_vector_database(vector_database)
     return vector_database
 
-def load_vector_database():
+def get_vector_database(text_chunks):
+    return build_vector_database((None, chunk) for chunk in text_chunks)
+
+def read_columnar_vector_database(embeddings, mmap=VECTOR_INDEX_MMAP, quantization=VECTOR_INDEX_QUANTIZATION):
+    """
+    Load the index saved by save_vector_database. With mmap the vectors are mapped read-only instead of read, so
+    workers share their pages through the page cache; a mapped index cannot be added to or deleted from.
+    Faiss releases without IO_FLAG_MMAP_IFC read flat and quantized indexes into RAM regardless.
+    """
+    docstore, index_to_docstore_id, meta = ColumnarDocstore.load(DOCSTORE_PATH)
+    index_file = meta.get("index_files", {}).get(quantization, "index.faiss")
+    flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) if mmap else 0
+    index = faiss.read_index(os.path.join("faiss_index", index_file), flags)
+    if index.ntotal != len(index_to_docstore_id):
+        raise ValueError(f"{index_file} has {index.ntotal} vectors, docstore has {len(index_to_docstore_id)}")
+    return FAISS(
+        embeddings,
+        index,
+        docstore,
+        index_to_docstore_id,
+        normalize_L2=meta.get("normalize_L2", False),
+        distance_strategy=DistanceStrategy(meta.get("distance_strategy", DistanceStrategy.EUCLIDEAN_DISTANCE.value))
+    )
+
+def load_vector_database(mmap=VECTOR_INDEX_MMAP, quantization=VECTOR_INDEX_QUANTIZATION):
+    """
+    Serving load. In-place updates must start from load_vector_database(mmap=False, quantization="none"),
+    the writable exact flat index.
+    """
     try:
         if not os.path.exists("faiss_index") or not os.path.exists("faiss_index/index.faiss"):
             return None, "Chào bạn, cảm ơn bạn đã gửi câu hỏi đến chúng tôi. Tuy nhiên, hiện tại nội dung câu hỏi nằm ngoài phạm vi hỗ trợ của hệ thống. Để được giải đáp chi tiết hơn, bạn có thể <a href='https://hcmute-consultant.vercel.app/create-question' class='text-primary hover:underline'>đặt câu hỏi tại đây</a> để được tư vấn viên trả lời. Chúng tôi sẽ ghi nhận câu hỏi này và cập nhật thêm dữ liệu để có thể trả lời tốt hơn trong tương lai. Rất mong bạn thông cảm."
 
-        embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+        embeddings = get_embeddings(EMBEDDING_MODEL)
 
         try:
-            vector_database = FAISS.load_local(
-                "faiss_index",
-                embeddings
-            )
+            if os.path.exists(DOCSTORE_PATH):
+                vector_database = read_columnar_vector_database(embeddings, mmap, quantization)
+            else:
+                # Index saved before the columnar docstore: pickled docstore next to index.faiss
+                vector_database = FAISS.load_local(
+                    "faiss_index",
+                    embeddings
+                )
             return vector_database, None
         except Exception as e:
             error_msg = f"ERROR LOADING FAISS INDEX: {str(e)}"
@@ -55,4 +182,151 @@ def load_vector_database():
             return None, "Đã xảy ra lỗi khi tải dữ liệu vector. Vui lòng tải lại tài liệu PDF."
 
     except Exception as e:
-        return None, f"Lỗi: {str(e)}"
\ No newline at end of file
+        return None, f"Lỗi: {str(e)}"
+
+def invalidate_search_caches(vector_database=None):
+    """
+    With vector_database only its BM25 index is dropped, so an index swapped out but still serving requests is not
+    reloaded from the newer file
+    """
+    with _source_search_lock:
+        _source_search_params.clear()
+    with _sparse_index_lock:
+        if vector_database is None:
+            _sparse_indexes.clear()
+        else:
+            _sparse_indexes.pop(id(vector_database), None)
+
+def vector_index_version():
+    """
+    Changes whenever a new index is saved: the docstore is written last, so its mtime marks a complete save
+    """
+    for path in (DOCSTORE_PATH, os.path.join("faiss_index", "index.faiss")):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+    return None
+
+def get_source_search_params(vector_database, source):
+    """
+    FAISS search parameters restricting k-NN to the vectors of one source, built once per index and source.
+    Entries keep their index object and are only reused for that same object, so a new index that happens to get
+    a freed index's id() never inherits its selectors.
+    """
+    index = vector_database.index
+    with _source_search_lock:
+        entry = _source_search_params.get(id(index))
+        if entry is None or entry[0] is not index or entry[1] != index.ntotal:
+            _source_search_params.pop(id(index), None)
+            while len(_source_search_params) >= SOURCE_SEARCH_CACHE_SIZE:
+                del _source_search_params[next(iter(_source_search_params))]
+            entry = _source_search_params[id(index)] = (index, index.ntotal, {})
+        cached = entry[2].get(source)
+        if cached is None:
+            ids = np.array([
+                position for position, doc_id in vector_database.index_to_docstore_id.items()
+                if vector_database.docstore.search(doc_id).metadata.get("source") == source
+            ], dtype=np.int64)
+            if len(ids) == vector_database.index.ntotal:
+                cached = (ids, None, None)
+            else:
+                selector = faiss.IDSelectorBatch(ids)
+                cached = (ids, selector, faiss.SearchParameters(sel=selector))
+            entry[2][source] = cached
+    return cached
+
+def similarity_search_positions(vector_database, query, source=None, k=VECTOR_SEARCH_K):
+    if source is None:
+        ids, params = None, None
+        limit = vector_database.index.ntotal
+    else:
+        ids, _, params = get_source_search_params(vector_database, source)
+        limit = len(ids)
+    if limit == 0:
+        return []
+    vector = np.array([vector_database._embed_query(query)], dtype=np.float32)
+    if vector_database._normalize_L2:
+        faiss.normalize_L2(vector)
+    if params is None:
+        _, positions = vector_database.index.search(vector, min(k, limit))
+    else:
+        _, positions = vector_database.index.search(vector, min(k, limit), params=params)
+    return [int(position) for position in positions[0] if position != -1]
+
+def positions_to_documents(vector_database, positions):
+    return [
+        vector_database.docstore.search(vector_database.index_to_docstore_id[position])
+        for position in positions
+    ]
+
+def similarity_search_by_source(vector_database, query, source, k=VECTOR_SEARCH_K):
+    try:
+        return positions_to_documents(
+            vector_database,
+            similarity_search_positions(vector_database, query, source, k)
+        )
+    except Exception:
+        return vector_database.similarity_search(query, k=k, filter={"source": source}, fetch_k=k * 10)
+
+def build_sparse_index(vector_database):
+    positions = range(vector_database.index.ntotal)
+    return BM25Index.build(
+        [doc.page_content for doc in positions_to_documents(vector_database, positions)],
+        [vector_database.index_to_docstore_id[position] for position in positions]
+    )
+
+def save_sparse_index(vector_database, path=SPARSE_INDEX_PATH):
+    sparse_index = build_sparse_index(vector_database)
+    sparse_index.save(path)
+    return sparse_index
+
+def load_sparse_index(vector_database, path=SPARSE_INDEX_PATH):
+    """
+    BM25 index matching the loaded FAISS index. When the saved one is missing or belongs to another index it is
+    rebuilt in memory only: the files are written by save_vector_database(), never from the serving path.
+    """
+    with _sparse_index_lock:
+        cached = _sparse_indexes.get(id(vector_database))
+        if cached is not None and cached[0] is vector_database and len(cached[1].doc_ids) == vector_database.index.ntotal:
+            return cached[1]
+        expected_ids = [vector_database.index_to_docstore_id[i] for i in range(vector_database.index.ntotal)]
+        try:
+            sparse_index = BM25Index.load(path)
+            if sparse_index.doc_ids != expected_ids:
+                sparse_index = None
+        except Exception:
+            sparse_index = None
+        if sparse_index is None:
+            sparse_index = build_sparse_index(vector_database)
+        _sparse_indexes.pop(id(vector_database), None)
+        while len(_sparse_indexes) >= SPARSE_INDEX_CACHE_SIZE:
+            del _sparse_indexes[next(iter(_sparse_indexes))]
+        _sparse_indexes[id(vector_database)] = (vector_database, sparse_index)
+        return sparse_index
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    scores = {}
+    for ranking in rankings:
+        for rank, position in enumerate(ranking):
+            scores[position] = scores.get(position, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda position: scores[position], reverse=True)
+
+def hybrid_search(vector_database, query, source=None, k=VECTOR_SEARCH_K):
+    """
+    Fuse FAISS k-NN and BM25 results with reciprocal-rank fusion, optionally restricted to one source
+    """
+    if not HYBRID_SEARCH_ENABLED:
+        if source is None:
+            return vector_database.similarity_search(query, k=k)
+        return similarity_search_by_source(vector_database, query, source, k)
+    try:
+        dense = similarity_search_positions(vector_database, query, source, k)
+        positions = None if source is None else get_source_search_params(vector_database, source)[0]
+        sparse_results = load_sparse_index(vector_database).search(query, k, positions)
+        fused = reciprocal_rank_fusion([dense, [position for position, _ in sparse_results]])
+        return positions_to_documents(vector_database, fused[:k])
+    except Exception:
+        if source is None:
+            return vector_database.similarity_search(query, k=k)
+        return similarity_search_by_source(vector_database, query, source, k)
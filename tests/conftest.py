@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent.parent / "benchmarks"
+if str(BENCHMARK_DIR) not in sys.path:
+    sys.path.insert(0, str(BENCHMARK_DIR))
+
+# Same offline config.py defaults the benchmarks use; also puts the repository root on sys.path
+import common  # noqa: E402,F401
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from common import synthetic_pdf_chunks
+from fakes import FakeGoogleEmbeddings
+import app as application
+from models.managers import cache
+from models.processors import async_query_processor, llm_chain, query_processor
+
+QUESTION = "học phí học kỳ này đóng khi nào vậy"
+
+class FakeChunk:
+    def __init__(self, content):
+        self.content = content
+
+class FakeStreamingChatModel:
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+
+    def stream(self, prompt):
+        for i in range(5):
+            if i == self.fail_after:
+                raise RuntimeError("503 stream reset")
+            yield FakeChunk(f"từ{i} ")
+
+def events(body):
+    parsed = []
+    for block in body.decode("utf-8").strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        parsed.append((lines["event"], json.loads(lines["data"])))
+    return parsed
+
+@pytest.fixture
+def fake_rag(monkeypatch):
+    """
+    Install an in-memory index and a MySQL miss; returns a function that sets the streaming chat model
+    """
+    chunks = synthetic_pdf_chunks(20)
+    database = FAISS.from_documents(
+        [Document(page_content=c["page_content"], metadata=c["metadata"]) for c in chunks], FakeGoogleEmbeddings()
+    )
+    monkeypatch.setattr(query_processor, "vector_database", database)
+    monkeypatch.setattr(query_processor, "get_gemini_mysql", lambda prompt: None)
+    monkeypatch.setattr(async_query_processor, "get_gemini_mysql", lambda prompt: None)
+    cache.cache.clear()
+    yield lambda model: monkeypatch.setattr(llm_chain, "get_chat_model", lambda: model)
+    cache.cache.clear()
+
+def test_stream_sends_tokens_then_caches_the_answer(fake_rag):
+    fake_rag(FakeStreamingChatModel())
+    client = application.app.test_client()
+
+    streamed = events(client.get("/chat/stream", query_string={"text": QUESTION}).data)
+    names = [name for name, _ in streamed]
+    assert names.count("token") == 5 and names[-1] == "answer"
+    assert "".join(data["text"] for name, data in streamed if name == "token") == streamed[-1][1]["answer"]
+    assert streamed[-1][1]["cached"] is False
+
+    cached = events(client.get("/chat/stream", query_string={"text": QUESTION}).data)
+    assert [name for name, _ in cached] == ["answer"]
+    assert cached[0][1]["answer"] == streamed[-1][1]["answer"]
+
+def test_stream_failing_midway_sends_an_error_and_caches_nothing(fake_rag):
+    fake_rag(FakeStreamingChatModel(fail_after=2))
+    client = application.app.test_client()
+
+    streamed = events(client.get("/chat/stream", query_string={"text": QUESTION}).data)
+    assert [name for name, _ in streamed] == ["token", "token", "error"]
+    assert streamed[-1][1]["status"] == "error"
+    assert query_processor.find_cached_answer(QUESTION) is None
+
+def test_async_stream_failing_midway_raises_and_caches_nothing(fake_rag):
+    fake_rag(FakeStreamingChatModel(fail_after=2))
+
+    async def collect():
+        names = []
+        with pytest.raises(RuntimeError):
+            async for name, _ in async_query_processor.process_query_stream_async(QUESTION):
+                names.append(name)
+        return names
+
+    assert asyncio.run(collect()) == ["token", "token"]
+    assert query_processor.find_cached_answer(QUESTION) is None
@@ -0,0 +1,49 @@
+import numpy as np
+from models.storages.embedding_builder import EmbeddingCache
+
+def vector(value, dimension=4):
+    return np.full(dimension, value, dtype=np.float32)
+
+def append_raw(path, key, value):
+    """
+    Append a row the way a concurrent writer without the lock could have
+    """
+    with open(f"{path}.f32", "ab") as f:
+        f.write(value.tobytes())
+    with open(f"{path}.keys", "ab") as f:
+        f.write(key)
+
+def test_rows_stay_aligned_after_duplicate_rows(tmp_path):
+    path = tmp_path / "cache"
+    cache = EmbeddingCache(path, "model")
+    cache.put_many([(cache.key("shared"), vector(1))])
+    append_raw(path, cache.key("shared"), vector(1))
+
+    reopened = EmbeddingCache(path, "model")
+    assert (reopened.count, len(reopened)) == (2, 1)
+    reopened.put_many([(reopened.key("a"), vector(2))])
+    cache.put_many([(cache.key("b"), vector(3))])
+
+    for current in (cache, reopened, EmbeddingCache(path, "model")):
+        keys = [current.key(text) for text in ("shared", "a", "b")]
+        assert [v[0] for v in current.get_many(keys)] == [1, 2, 3]
+
+def test_appends_from_other_processes_are_picked_up(tmp_path):
+    path = tmp_path / "cache"
+    reader, writer = EmbeddingCache(path, "model"), EmbeddingCache(path, "model")
+    writer.put_many([(writer.key("x"), vector(5))])
+    assert reader.get_many([reader.key("x")])[0][0] == 5
+    writer.put_many([(writer.key("y"), vector(6))])
+    reader.put_many([(reader.key("z"), vector(7))])
+    assert [v[0] for v in EmbeddingCache(path, "model").get_many([writer.key(t) for t in "xyz"])] == [5, 6, 7]
+
+def test_torn_tail_is_truncated_on_load(tmp_path):
+    path = tmp_path / "cache"
+    cache = EmbeddingCache(path, "model")
+    cache.put_many([(cache.key("x"), vector(1))])
+    with open(f"{path}.f32", "ab") as f:
+        f.write(b"\0" * 6)
+    reopened = EmbeddingCache(path, "model")
+    assert reopened.count == 1
+    reopened.put_many([(reopened.key("y"), vector(2))])
+    assert EmbeddingCache(path, "model").get_many([cache.key("y")])[0][0] == 2
@@ -0,0 +1,63 @@
+import numpy as np
+from PyPDF2 import PdfWriter
+from bench_embedding_builder import FlakyEmbeddings
+from fakes import FakeGoogleEmbeddings
+from langchain_community.vectorstores import FAISS
+from config import PDF_FILE, PDF_SOURCE
+from models.managers import pdf
+from models.storages.embedding_builder import EmbeddingBuilder, EmbeddingCache
+from models.storages.vector_database import hybrid_search
+
+def page(number, text, source="handbook.pdf"):
+    return {"text": text, "metadata": {"source": source, "page": number, "total_pages": 3}}
+
+def split_page(pages):
+    return [{"page_content": p["text"], "metadata": p["metadata"]} for p in pages]
+
+def test_builder_retries_a_flaky_model(tmp_path):
+    reference = FakeGoogleEmbeddings()
+    flaky = FlakyEmbeddings(reference, failure_rate=0.5, seed=3)
+    builder = EmbeddingBuilder(
+        flaky, batch_size=4, concurrency=3, requests_per_minute=600000, max_retries=30, base_delay=0,
+        cache=EmbeddingCache(tmp_path / "cache", "model")
+    )
+    texts = [f"điều {i} của quy chế đào tạo" for i in range(40)]
+
+    vectors = builder.embed_texts(texts)
+    assert flaky.failures > 0 and builder.retries > 0
+    assert all(np.allclose(vector, reference.embed_query(text)) for vector, text in zip(vectors, texts))
+
+    # A rebuild is served from the cache without calling the model again
+    calls = flaky.calls
+    assert len(builder.embed_texts(texts)) == len(texts)
+    assert flaky.calls == calls
+
+def test_only_changed_pages_are_rechunked():
+    pages = [page(1, "học phí"), page(2, "ký túc xá"), page(3, "học bổng")]
+    manifest = {}
+    first = list(pdf.changed_page_chunks(pages, {}, manifest, split_page))
+    assert len(first) == 3
+
+    edited = [pages[0], page(2, "ký túc xá khu B")]
+    new_manifest = {}
+    changed = list(pdf.changed_page_chunks(edited, manifest, new_manifest, split_page))
+    assert [chunk["metadata"]["page"] for _, chunk in changed] == [2]
+    assert new_manifest["handbook.pdf#1"] is manifest["handbook.pdf#1"]
+    assert "handbook.pdf#3" not in new_manifest
+
+def test_rag_filter_matches_chunks_of_an_absolute_pdf_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pdf_path = tmp_path / PDF_FILE
+    writer = PdfWriter()
+    writer.add_blank_page(width=200, height=200)
+    with open(pdf_path, "wb") as f:
+        writer.write(f)
+    monkeypatch.setattr(pdf, "extract_page_range", lambda path, start, end: [(1, "Sinh viên đóng học phí mỗi học kỳ")])
+
+    pages = list(pdf.iter_pdf_pages([str(pdf_path)], processes=1))
+    assert pages[0]["metadata"]["source"] == PDF_SOURCE
+    vector_database = FAISS.from_texts(
+        [p["text"] for p in pages], FakeGoogleEmbeddings(), metadatas=[p["metadata"] for p in pages]
+    )
+    assert hybrid_search(vector_database, "học phí", PDF_SOURCE, k=3)
+    assert not hybrid_search(vector_database, "học phí", str(pdf_path), k=3)
@@ -0,0 +1,31 @@
+import os
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from config import RECOMMEND_ANN_FILE
+from models.storages.recommend_index import RecommendAnnIndex, load_or_build_ann_index, save_ann_index
+
+def tfidf_like(rows, seed):
+    matrix = sparse.random(rows, 60, density=0.1, format="csr", random_state=seed, dtype=np.float64)
+    return normalize(matrix)
+
+def test_saved_index_is_read_from_its_generation(tmp_path):
+    matrix = tfidf_like(300, 0)
+    save_ann_index(matrix, tmp_path)
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        f"{RECOMMEND_ANN_FILE}{suffix}" for suffix in (".faiss", "_svd.pkl", ".json")
+    )
+    saved = RecommendAnnIndex.load(tmp_path / RECOMMEND_ANN_FILE)
+    loaded = load_or_build_ann_index(matrix, tmp_path)
+    assert loaded.signature == saved.signature
+    assert loaded.index.ntotal == 300
+
+def test_loading_never_writes(tmp_path):
+    matrix, other = tfidf_like(300, 0), tfidf_like(200, 1)
+    save_ann_index(other, tmp_path)
+    before = {name: os.stat(tmp_path / name).st_mtime_ns for name in os.listdir(tmp_path)}
+
+    # Files of another matrix are ignored and the index is built in memory only
+    assert load_or_build_ann_index(matrix, tmp_path).index.ntotal == 300
+    assert load_or_build_ann_index(matrix).index.ntotal == 300
+    assert {name: os.stat(tmp_path / name).st_mtime_ns for name in os.listdir(tmp_path)} == before
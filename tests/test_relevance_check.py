@@ -0,0 +1,25 @@
+import time
+from models.processors import llm_chain
+
+def fake_check(user_question, question, answer):
+    if question == "lỗi":
+        raise RuntimeError("429 Resource has been exhausted")
+    time.sleep(1.0 if question == "chậm" else 0.2)
+    return question == "liên quan"
+
+def test_checks_run_concurrently(monkeypatch):
+    monkeypatch.setattr(llm_chain, "check_relevance", fake_check)
+    candidates = [("liên quan", "a"), ("không", "b")] * 2
+
+    start = time.perf_counter()
+    results = llm_chain.check_relevance_batch("học phí bao nhiêu", candidates, timeout=5)
+    # Sequential calls would take 0.8s
+    assert time.perf_counter() - start < 0.6
+    assert results == [True, False] * 2
+
+def test_failed_and_timed_out_checks_keep_the_candidate(monkeypatch):
+    monkeypatch.setattr(llm_chain, "check_relevance", fake_check)
+    candidates = [("liên quan", "a"), ("không", "b"), ("lỗi", "c"), ("chậm", "d")]
+
+    results = llm_chain.check_relevance_batch("học phí bao nhiêu", candidates, timeout=0.5)
+    assert results == [True, False, True, True]
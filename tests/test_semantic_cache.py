@@ -0,0 +1,22 @@
+from models.managers.semantic_cache import SemanticCache
+
+VECTOR = [(0, 0.8), (1, 0.6)]
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("models.managers.semantic_cache.time.time", lambda: now[0])
+    cache = SemanticCache(threshold=0.9, ttl=60)
+    cache.set(VECTOR, 1, "học phí bao nhiêu", {"answer": "a"})
+    assert cache.get(VECTOR, 1)[0] == {"answer": "a"}
+
+    now[0] += 61
+    assert cache.get(VECTOR, 1) == (None, 0.0)
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+def test_new_snapshot_generation_drops_entries():
+    cache = SemanticCache(threshold=0.9, ttl=0)
+    cache.set(VECTOR, 1, "học phí bao nhiêu", {"answer": "a"})
+    assert cache.get(VECTOR, 1)[0] == {"answer": "a"}
+    assert cache.get(VECTOR, 2) == (None, 0.0)
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,11 @@
+import pytest
+from bench_small_talk import REGRESSION_CASES
+from models.processors.small_talk import is_small_talk
+
+@pytest.mark.parametrize("question,expected", list(REGRESSION_CASES.items()))
+def test_regression_cases(question, expected):
+    assert is_small_talk(question) == expected
+
+@pytest.mark.parametrize("question", ["Xin Chào", "  xin chào  ", "xin chào!!!"])
+def test_case_and_punctuation_do_not_change_greetings(question):
+    assert is_small_talk(question) == is_small_talk("xin chào")
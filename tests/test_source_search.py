@@ -0,0 +1,35 @@
+from langchain_community.vectorstores import FAISS
+from fakes import FakeGoogleEmbeddings
+from models.processors import query_processor
+from models.storages import vector_database as vdb
+
+TEXTS = ["học phí học kỳ", "đăng ký môn học", "ký túc xá sinh viên"]
+
+def index_with_sources(sources):
+    return FAISS.from_texts(TEXTS, FakeGoogleEmbeddings(), metadatas=[{"source": source} for source in sources])
+
+def test_selectors_follow_the_index_object():
+    first = index_with_sources(["a.pdf", "a.pdf", "b.pdf"])
+    assert vdb.get_source_search_params(first, "a.pdf")[0].tolist() == [0, 1]
+
+    # Same ntotal, different sources: must not reuse the first index's selector
+    second = index_with_sources(["b.pdf", "a.pdf", "a.pdf"])
+    assert vdb.get_source_search_params(second, "a.pdf")[0].tolist() == [1, 2]
+    assert vdb.get_source_search_params(first, "a.pdf")[0].tolist() == [0, 1]
+
+def test_cache_keeps_only_the_latest_indexes():
+    databases = [index_with_sources(["a.pdf"] * 3) for _ in range(vdb.SOURCE_SEARCH_CACHE_SIZE + 2)]
+    for database in databases:
+        vdb.get_source_search_params(database, "a.pdf")
+    assert len(vdb._source_search_params) == vdb.SOURCE_SEARCH_CACHE_SIZE
+    assert all(entry[0] is not databases[0].index for entry in vdb._source_search_params.values())
+
+def test_swapping_the_index_drops_cached_selectors(monkeypatch):
+    for name in ("vector_database", "vector_database_version", "vector_database_generation"):
+        monkeypatch.setattr(query_processor, name, getattr(query_processor, name))
+    monkeypatch.setattr(query_processor, "HYBRID_SEARCH_ENABLED", False)
+    old = index_with_sources(["a.pdf", "a.pdf", "b.pdf"])
+    vdb.get_source_search_params(old, "a.pdf")
+
+    query_processor.swap_vector_database(index_with_sources(["b.pdf", "a.pdf", "a.pdf"]), 1)
+    assert all(entry[0] is not old.index for entry in vdb._source_search_params.values())
@@ -0,0 +1,35 @@
+import os
+import pytest
+from fakes import FakeGoogleEmbeddings
+from langchain_community.vectorstores import FAISS
+from models.storages.sparse_index import BM25Index
+from models.storages.vector_database import load_sparse_index
+
+TEXTS = ["học phí học kỳ", "đăng ký môn học", "ký túc xá sinh viên"]
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "sparse_index")
+    BM25Index.build(TEXTS, ["a", "b", "c"]).save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.doc_ids == ["a", "b", "c"]
+    assert loaded.search("học phí", 1)[0][0] == 0
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+def test_files_from_different_saves_are_rejected(tmp_path):
+    first, second = str(tmp_path / "first"), str(tmp_path / "second")
+    BM25Index.build(TEXTS, ["a", "b", "c"]).save(first)
+    BM25Index.build(TEXTS[:2], ["a", "b"]).save(second)
+    os.replace(f"{second}.json", f"{first}.json")
+    with pytest.raises(ValueError):
+        BM25Index.load(first)
+
+def test_stale_index_is_rebuilt_in_memory_only(tmp_path):
+    path = str(tmp_path / "sparse_index")
+    BM25Index.build(TEXTS[:2], ["a", "b"]).save(path)
+    before = os.stat(f"{path}.json").st_mtime_ns
+    vector_database = FAISS.from_texts(TEXTS, FakeGoogleEmbeddings())
+
+    sparse_index = load_sparse_index(vector_database, path)
+    assert len(sparse_index.doc_ids) == len(TEXTS)
+    assert BM25Index.load(path).doc_ids == ["a", "b"]
+    assert os.stat(f"{path}.json").st_mtime_ns == before
@@ -0,0 +1,44 @@
+import threading
+from langchain_core.documents import Document
+from models.processors import llm_chain, query_processor
+
+class RecordingChain:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, inputs, return_only_outputs=True):
+        self.calls += 1
+        return {"output_text": "Trả lời"}
+
+def test_cancelled_rag_makes_no_model_call(monkeypatch):
+    chain = RecordingChain()
+    monkeypatch.setattr(llm_chain, "get_qa_chain", lambda template: chain)
+    monkeypatch.setattr(llm_chain, "retrieve_rag_documents", lambda *args: [Document(page_content="học phí")])
+    cancelled = threading.Event()
+
+    assert llm_chain.get_gemini_rag(object(), "học phí", cancelled=cancelled)["output_text"] == "Trả lời"
+    cancelled.set()
+    assert llm_chain.get_gemini_rag(object(), "học phí", cancelled=cancelled) is None
+    assert chain.calls == 1
+
+def test_mysql_hit_cancels_the_running_speculative_rag(monkeypatch):
+    started, done, seen = threading.Event(), threading.Event(), []
+
+    def get_rag_answer(prompt, cancelled=None):
+        started.set()
+        seen.append(cancelled.wait(5))
+        done.set()
+        return query_processor.ERROR_MESSAGE, False
+
+    def get_gemini_mysql(prompt):
+        started.wait(5)
+        return "Trả lời từ MySQL"
+
+    monkeypatch.setattr(query_processor, "QUERY_SPECULATIVE", True)
+    monkeypatch.setattr(query_processor, "get_rag_answer", get_rag_answer)
+    monkeypatch.setattr(query_processor, "get_gemini_mysql", get_gemini_mysql)
+    monkeypatch.setattr(query_processor, "store_answer", lambda prompt, result: None)
+
+    assert query_processor.answer_query("học phí bao nhiêu") == "Trả lời từ MySQL"
+    assert done.wait(5)
+    assert seen == [True]